@@ -17,6 +17,53 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 BONNMOTION_DIR = BASE_DIR .parent / "bonnmotion-3.0.1" / "bin" / "bm"
 AUX_PATH = BASE_DIR.parent
 
+# Number of worker processes used for the per-entity metrics (1 runs them in-process)
+METRICS_WORKERS = 1
+
+# How a visit is matched to the known stay points: 'first' within the distance threshold or 'nearest'
+STAY_POINT_MATCHING = 'first'
+
+# How the trajectory correlation visits the entity pairs: 'linear' derives its deviation from
+# sums over the sampled vectors in O(entities) memory; 'blocked' also stores the quartiles of the
+# pairwise similarity, computing every pair in blocks, and 'sampled' estimates them from
+# TRAJECTORY_CORRELATION_SAMPLE_SIZE random pairs
+TRAJECTORY_CORRELATION_MODE = 'linear'
+TRAJECTORY_CORRELATION_SAMPLE_SIZE = 1_000_000
+
+# Maximum size, in bytes, of the rendered dashboard plots kept in memory by each process
+PLOT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Maximum size, in bytes, of the feature matrices and PCA/t-SNE/DBSCAN results kept in memory
+# by each process for the comparative analysis
+ANALYTICS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Traces with more points than this are plotted as a density image rendered on the server,
+# with this many cells per side, coloured by density or by the entities in each cell
+TRACE_RASTER_THRESHOLD = 200_000
+TRACE_RASTER_RESOLUTION = 256
+TRACE_RASTER_ENTITY_COLORS = False
+
+# Uploads larger than this many bytes are read in chunks and staged on disk instead of
+# being loaded with a single read_csv
+INGEST_THRESHOLD = 256 * 1024 * 1024
+INGEST_CHUNK_SIZE = 1_000_000
+INGEST_PARTITIONS = 16
+INGEST_STAGING_DIR = BASE_DIR / "staging"
+
+# Columnar storage of the uploaded traces, one directory per file
+TRACE_STORE_DIR = BASE_DIR / "trace_store"
+
+# Uploads are processed by a background `process_jobs` worker; uploaded files wait here
+JOB_UPLOAD_DIR = BASE_DIR / "uploads"
+# Start a worker automatically after each upload (disable when running one permanently)
+JOB_AUTOSTART_WORKER = True
+# Minimum seconds between two progress updates of a running job
+JOB_PROGRESS_INTERVAL = 1.0
+# Seconds between two heartbeats of a running job, and without one after which its worker
+# is considered dead and the job is failed
+JOB_HEARTBEAT_INTERVAL = 10.0
+JOB_HEARTBEAT_TIMEOUT = 120.0
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -79,6 +126,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # The background worker writes while the dashboard reads
+        'OPTIONS': {'timeout': 20},
     }
 }
 
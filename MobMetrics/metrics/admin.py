@@ -3,7 +3,8 @@ from django.contrib import admin
 from .models import (ConfigModel, MetricsModel, 
                      StayPointModel, JourneyModel, 
                      VisitModel, ContactModel, 
-                     QuadrantEntropyModel, GlobalMetricsModel)
+                     QuadrantEntropyModel, GlobalMetricsModel,
+                     ProcessingJobModel, ExtractionProfileModel)
 
 admin.site.register(ConfigModel)
 admin.site.register(MetricsModel)
@@ -11,6 +12,8 @@ admin.site.register(StayPointModel)
 admin.site.register(JourneyModel)
 admin.site.register(ContactModel)
 admin.site.register(GlobalMetricsModel)
+admin.site.register(ProcessingJobModel)
+admin.site.register(ExtractionProfileModel)
 
 class VisitsModelAdmin(admin.ModelAdmin):
     actions = ['delete_all_visits']
@@ -0,0 +1,216 @@
+# Standard library imports.
+import os
+import platform
+
+# Related third party imports.
+import numpy as np
+
+# Local application/library specific imports.
+from ..metrics.utils.contact_detection import contact_pairs
+from ..models import StayPointModel, VisitModel, JourneyModel, ContactModel, MetricsModel
+from ..process.factory import Factory
+from ..process.instrumentation import ExtractionProfiler
+from ..process.jobs import delete_file_data
+from ..process.parallel import extract_entity
+from ..process.trace_arrays import TraceArrays
+
+CASES = ('pipeline', 'stay_points', 'contacts')
+
+# File name the benchmark rows are stored under
+FILE_NAME = 'benchmark'
+
+# Stages faster than this (in seconds) are too noisy to flag as regressions
+MIN_COMPARED_TIME = 0.25
+
+
+def benchmark_parameters(geo=False, distance_threshold=50.0, time_threshold=30.0,
+                         radius_threshold=5.0, quadrant_parts=10.0, contact_time_threshold=10.0,
+                         skip_contact_detection=False):
+    """
+    Builds the extraction parameters used by the benchmarks, in the order of the upload form.
+
+    Returns:
+        list: Extraction parameters.
+    """
+    return [
+        distance_threshold, time_threshold, radius_threshold, quadrant_parts,
+        FILE_NAME, 'benchmark', geo, contact_time_threshold, skip_contact_detection,
+    ]
+
+
+def run_benchmarks(trace, parameters, cases=CASES, workers=1, repeat=1):
+    """
+    Runs the benchmark cases over a formatted trace.
+
+    `pipeline` runs the full Factory, with a record for each of its stages (one per metric
+    class). `stay_points` and `contacts` run the two detection kernels on their own. Each
+    case runs `repeat` times and the fastest run is kept.
+
+    Must run against a disposable database, since the pipeline writes the benchmark file's
+    rows (replacing the ones of the previous run).
+
+    Args:
+        trace (pd.DataFrame): Trace formatted like Format.extract() output.
+        parameters (list): Extraction parameters, see `benchmark_parameters`.
+        cases (iterable): Names of the cases to run.
+        workers (int): Worker processes of the per-entity stage.
+        repeat (int): Runs per case.
+
+    Returns:
+        dict: Result of each case, keyed by name.
+    """
+    runners = {
+        'pipeline': _pipeline,
+        'stay_points': _stay_points,
+        'contacts': _contacts,
+    }
+    num_points = len(trace)
+    num_entities = trace['id'].nunique()
+
+    results = {}
+
+    for case in cases:
+        runs = [runners[case](trace, parameters, workers) for _ in range(repeat)]
+        profiler, outputs = min(runs, key=lambda run: _wall_time(run[0]))
+
+        wall_time = _wall_time(profiler)
+        stages = profiler.as_dict()
+
+        results[case] = {
+            'wall_time': wall_time,
+            'cpu_time': sum(stage['cpu_time'] for stage in stages),
+            'peak_rss_kib': max(stage['peak_rss_kib'] for stage in stages),
+            'children_peak_rss_kib': max(stage['children_peak_rss_kib'] for stage in stages),
+            'points_per_second': num_points / wall_time if wall_time else None,
+            'entities_per_second': num_entities / wall_time if wall_time else None,
+            'outputs': outputs,
+            'stages': stages,
+        }
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares benchmark results against a baseline run of the same configuration.
+
+    Outputs (detected stay points, visits, contacts...) must match exactly and no stage may
+    issue more database queries. Wall times of the cases and of the pipeline stages may be
+    up to `tolerance` slower.
+
+    Args:
+        results (dict): Results of `run_benchmarks`.
+        baseline (dict): Results of the baseline run.
+        tolerance (float): Allowed relative slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        list: Description of every regression; empty if there is none.
+    """
+    regressions = []
+
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+
+        expected = baseline[case]
+
+        for name, value in result['outputs'].items():
+            if expected['outputs'].get(name) != value:
+                regressions.append(
+                    f"{case}: {name} is {value}, baseline {expected['outputs'].get(name)}"
+                )
+
+        timings = [(case, result['wall_time'], expected['wall_time'])]
+        expected_stages = {stage['stage']: stage for stage in expected['stages']}
+
+        for stage in result['stages']:
+            expected_stage = expected_stages.get(stage['stage'])
+
+            if expected_stage is not None and stage['queries'] > expected_stage['queries']:
+                regressions.append(
+                    f"{case}/{stage['stage']}: {stage['queries']} queries, baseline {expected_stage['queries']}"
+                )
+
+            if expected_stage is not None and len(result['stages']) > 1:
+                timings.append((
+                    f"{case}/{stage['stage']}",
+                    stage['wall_time'],
+                    expected_stage['wall_time'],
+                ))
+
+        for name, wall_time, expected_time in timings:
+            if expected_time >= MIN_COMPARED_TIME and wall_time > expected_time * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {wall_time:.3f}s, baseline {expected_time:.3f}s "
+                    f"({wall_time / expected_time - 1:+.0%})"
+                )
+
+    return regressions
+
+
+def environment():
+    """
+    Returns:
+        dict: Description of the machine and library versions, stored with the results.
+    """
+    import django
+    import pandas as pd
+    import scipy
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scipy': scipy.__version__,
+        'django': django.__version__,
+    }
+
+
+def _pipeline(trace, parameters, workers):
+    """Runs the full extraction and returns its profile and the counts of the stored rows."""
+    delete_file_data(FILE_NAME)
+
+    profiler = ExtractionProfiler()
+
+    with profiler.stage("Storing trace", rows=len(trace)):
+        arrays = TraceArrays.from_frame(FILE_NAME, trace)
+
+    Factory(arrays, parameters, workers=workers, profiler=profiler).extract()
+
+    outputs = {
+        model.__name__: model.objects.filter(file_name=FILE_NAME).count()
+        for model in (MetricsModel, StayPointModel, VisitModel, JourneyModel, ContactModel)
+    }
+
+    return profiler, outputs
+
+
+def _stay_points(trace, parameters, workers):
+    """Runs the per-entity metrics and stay point detection of every entity, in-process."""
+    arrays = TraceArrays.from_frame(FILE_NAME, trace)
+    profiler = ExtractionProfiler()
+    visits = 0
+
+    with profiler.stage("Stay point detection", rows=len(trace)):
+        for index in range(arrays.num_entities):
+            visits += len(extract_entity(arrays, index, parameters)[1])
+
+    return profiler, {'visits': visits}
+
+
+def _contacts(trace, parameters, workers):
+    """Runs the contact detection kernel over the whole trace."""
+    profiler = ExtractionProfiler()
+    columns = [trace[column].to_numpy() for column in ('id', 'x', 'y', 'z', 'time')]
+
+    with profiler.stage("Contact detection", rows=len(trace)):
+        first, _, _ = contact_pairs(*columns, parameters[2], parameters[6])
+
+    return profiler, {'contacts': len(first)}
+
+
+def _wall_time(profiler):
+    return sum(record.wall_time for record in profiler.stages.values())
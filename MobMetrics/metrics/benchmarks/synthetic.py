@@ -0,0 +1,101 @@
+# Related third party imports.
+import numpy as np
+import pandas as pd
+
+# Local application/library specific imports.
+from ..metrics.utils.kernels import EARTH_RADIUS
+
+# Reference point of the geographical traces (longitude, latitude)
+GEO_ORIGIN = (-46.63, -23.55)
+
+
+def synthetic_trace(entities=100, points=1000, dwells=4, dwell_points=60,
+                    contact_density=0.2, geo=False, area=5000.0, speed=1.5,
+                    time_step=1.0, seed=0):
+    """
+    Generates a reproducible synthetic trace, formatted like Format.extract() output.
+
+    Each entity walks with a persistent random heading and stops `dwells` times for
+    `dwell_points` samples, jittering within a few meters of the stop. A share of the
+    entities (`contact_density`) follow another entity at a short distance, so they are
+    in contact for their whole trace and share its stay points.
+
+    Args:
+        entities (int): Number of entities.
+        points (int): Points per entity.
+        dwells (int): Stops per entity.
+        dwell_points (int): Points spent at each stop.
+        contact_density (float): Fraction of entities following another entity, in [0, 1].
+        geo (bool): Whether to emit longitude/latitude instead of meters.
+        area (float): Side of the square the walks start in, in meters.
+        speed (float): Mean walking speed, in meters per time step.
+        time_step (float): Seconds between consecutive points.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        pd.DataFrame: Columns id, time, x, y, z sorted by id and time.
+    """
+    rng = np.random.default_rng(seed)
+
+    leaders = max(1, entities - int(round(contact_density * entities)))
+    x = np.empty((entities, points))
+    y = np.empty((entities, points))
+
+    for entity in range(leaders):
+        x[entity], y[entity] = _walk(rng, points, dwells, dwell_points, area, speed)
+
+    # Followers copy a leader's path, 1 to 3 meters away
+    for entity in range(leaders, entities):
+        leader = rng.integers(leaders)
+        angle = rng.uniform(0, 2 * np.pi)
+        offset = rng.uniform(1, 3)
+
+        x[entity] = x[leader] + offset * np.cos(angle)
+        y[entity] = y[leader] + offset * np.sin(angle)
+
+    if geo:
+        lon, lat = GEO_ORIGIN
+        y, x = (
+            lat + np.degrees(y / EARTH_RADIUS),
+            lon + np.degrees(x / (EARTH_RADIUS * np.cos(np.radians(lat)))),
+        )
+
+    return pd.DataFrame({
+        'id': np.repeat(np.arange(entities), points),
+        'time': np.tile(np.arange(points) * time_step, entities),
+        'x': x.ravel(),
+        'y': y.ravel(),
+        'z': 0.0,
+    })
+
+
+def _walk(rng, points, dwells, dwell_points, area, speed):
+    """
+    Generates the path of one entity: a correlated random walk with `dwells` stops.
+
+    Returns:
+        tuple: (x, y) arrays of `points` positions, in meters.
+    """
+    heading = rng.uniform(0, 2 * np.pi) + np.cumsum(rng.normal(0, 0.2, points))
+    step = rng.gamma(4, speed / 4, points)
+
+    moving = np.ones(points, dtype=bool)
+    dwell_points = min(dwell_points, points // max(dwells, 1))
+
+    if dwells > 0 and dwell_points > 0:
+        starts = rng.choice(points // dwell_points, size=min(dwells, points // dwell_points), replace=False)
+
+        for start in starts * dwell_points:
+            moving[start:start + dwell_points] = False
+
+    dx = np.where(moving, step * np.cos(heading), 0.0)
+    dy = np.where(moving, step * np.sin(heading), 0.0)
+
+    x = rng.uniform(0, area) + np.cumsum(dx)
+    y = rng.uniform(0, area) + np.cumsum(dy)
+
+    # Jitter of the stops, far below any sensible distance threshold
+    x[~moving] += rng.normal(0, 0.5, (~moving).sum())
+    y[~moving] += rng.normal(0, 0.5, (~moving).sum())
+
+    return x, y
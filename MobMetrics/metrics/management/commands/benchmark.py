@@ -0,0 +1,102 @@
+# Standard library imports.
+import json
+import os
+import tempfile
+
+# Related third party imports.
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+# Local application/library specific imports.
+from ...benchmarks.runner import CASES, benchmark_parameters, compare, environment, run_benchmarks
+from ...benchmarks.synthetic import synthetic_trace
+
+
+class Command(BaseCommand):
+    """Benchmarks the extraction pipeline on a synthetic trace, in a disposable database."""
+
+    help = "Benchmarks the extraction pipeline on a synthetic trace and optionally compares against a baseline."
+
+    def add_arguments(self, parser):
+        # Trace
+        parser.add_argument('--entities', type=int, default=100, help="Number of entities.")
+        parser.add_argument('--points', type=int, default=1000, help="Points per entity.")
+        parser.add_argument('--dwells', type=int, default=4, help="Stops per entity.")
+        parser.add_argument('--dwell-points', type=int, default=60, help="Points spent at each stop.")
+        parser.add_argument('--contact-density', type=float, default=0.2,
+                            help="Fraction of entities following another one.")
+        parser.add_argument('--geo', action='store_true', help="Generate longitude/latitude coordinates.")
+        parser.add_argument('--seed', type=int, default=0, help="Seed of the trace generator.")
+
+        # Run
+        parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES), help="Cases to run.")
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes of the per-entity stage.")
+        parser.add_argument('--repeat', type=int, default=1, help="Runs per case; the fastest is kept.")
+
+        # Report
+        parser.add_argument('--output', default='benchmark.json', help="Path of the JSON results.")
+        parser.add_argument('--baseline', help="JSON results of a previous run to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed relative slowdown against the baseline.")
+
+    def handle(self, *args, **options):
+        config = {
+            name: options[name]
+            for name in ('entities', 'points', 'dwells', 'dwell_points', 'contact_density', 'geo', 'seed', 'workers')
+        }
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+            if baseline['config'] != config:
+                raise CommandError(f"The baseline was run with a different configuration: {baseline['config']}")
+
+        trace = synthetic_trace(
+            entities=options['entities'], points=options['points'],
+            dwells=options['dwells'], dwell_points=options['dwell_points'],
+            contact_density=options['contact_density'], geo=options['geo'], seed=options['seed'],
+        )
+        parameters = benchmark_parameters(geo=options['geo'])
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(TRACE_STORE_DIR=directory):
+            results = self._run(directory, trace, parameters, options)
+
+        report = {'config': config, 'environment': environment(), 'results': results}
+
+        for case, result in results.items():
+            self.stdout.write(
+                f"{case}: {result['wall_time']:.3f}s, {result['points_per_second']:,.0f} points/s, "
+                f"{result['entities_per_second']:,.1f} entities/s, peak RSS {result['peak_rss_kib'] / 1024:.0f} MiB"
+            )
+
+        regressions = None
+        if baseline is not None:
+            regressions = report['regressions'] = compare(results, baseline['results'], options['tolerance'])
+
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+        if regressions is not None:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def _run(self, directory, trace, parameters, options):
+        """Runs the benchmarks in a throwaway database created inside `directory`."""
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            return run_benchmarks(
+                trace, parameters, cases=options['cases'],
+                workers=options['workers'], repeat=options['repeat'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,39 @@
+# Standard library imports.
+import time
+
+# Related third party imports.
+from django.core.management.base import BaseCommand
+
+# Local application/library specific imports.
+from ...process.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    """Worker that processes the queued upload jobs, one at a time."""
+
+    help = "Processes queued upload jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drain', action='store_true',
+            help="Exit once the queue is empty instead of waiting for new jobs."
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to wait between checks of an empty queue."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+
+            if job is None:
+                if options['drain']:
+                    return
+
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Processing job {job.id} ({job.file_name})")
+            run_job(job)
+            self.stdout.write(f"Job {job.id} {job.state}")
@@ -1,8 +1,9 @@
-# Standard library imports.
-from math import sqrt
+# Related third party imports.
+import numpy as np
 
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
+from ..utils.aggregation import field_arrays
 from ...models import MetricsModel, GlobalMetricsModel
 
 
@@ -24,21 +25,19 @@ class SpeedVariationCoefficient:
         """
         Extracts the speed variation coefficient and saves it to the GlobalMetricsModel.
         """
-        metric_global = GlobalMetricsModel.objects.filter(file_name=self.file_name).first()
+        global_metrics = GlobalMetricsModel.objects.filter(file_name=self.file_name)
+        avg_speed = global_metrics.values_list('avg_travel_avg_speed', flat=True).first()
 
-        if not metric_global:
+        if avg_speed is None:
             return  # or raise an exception
 
-        avg_speed = metric_global.avg_travel_avg_speed
-
         if avg_speed == 0:
-            metric_global.speed_variation_coefficient = 0
+            variation = 0
         else:
             std_dev = self._standard_deviation(avg_speed)
             variation = round(std_dev / avg_speed, 5)
-            metric_global.speed_variation_coefficient = variation
 
-        metric_global.save()
+        global_metrics.update(speed_variation_coefficient=variation)
 
     def _standard_deviation(self, avg_speed):
         """
@@ -50,16 +49,9 @@ class SpeedVariationCoefficient:
         Returns:
             float: The standard deviation of travel speeds.
         """
-        metrics = MetricsModel.objects.filter(file_name=self.file_name)
-
-        squared_diffs = 0
-        count = 0
-
-        for metric in metrics:
-            squared_diffs += (metric.travel_avg_speed - avg_speed) ** 2
-            count += 1
+        speeds, = field_arrays(MetricsModel.objects.filter(file_name=self.file_name), 'travel_avg_speed')
 
-        if count == 0:
+        if len(speeds) == 0:
             return 0
 
-        return sqrt(squared_diffs / count)
+        return float(np.sqrt(np.mean((speeds - avg_speed) ** 2)))
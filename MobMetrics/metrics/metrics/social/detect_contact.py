@@ -2,14 +2,17 @@
 from typing import List
 
 # Related third party imports.
+import numpy as np
 import pandas as pd
-from tqdm import tqdm
 
 # Local application/library specific imports.
-from ..utils.utils import distance
+from ..utils.kernels import trace_arrays
+from ..utils.contact_detection import contact_pairs
 from ..utils.abs_metric import AbsMetric
 from ...models import ContactModel, MetricsModel
 
+BATCH_SIZE = 1000
+
 
 class DetectContact(AbsMetric):
     """
@@ -18,143 +21,131 @@ class DetectContact(AbsMetric):
     
     Attributes:
         parameters (list): Configuration parameters used to guide the contact detection.
-        trace (DataFrame): Trajectory data containing positions and timestamps.
+        trace (DataFrame or TraceArrays): Trajectory data containing positions and timestamps.
     """
 
-    def __init__(self, parameters: List, trace: pd.DataFrame):
+    def __init__(self, parameters: List, trace):
         """
         Initialize the DetectContact class.
 
         Args:
             parameters (list): Configuration parameters.
-            trace (DataFrame): Data containing positions, timestamps, and entity IDs.
+            trace (DataFrame or TraceArrays): Data containing positions, timestamps, and entity IDs.
         """
         self.parameters = parameters
         self.contact_time_threshold = parameters[7]
         self.file_name = parameters[4]
         self.trace = trace
         self.contacts = []
+        self.periods = None
 
     def extract(self):
         self._find_contacts()
+
+        # Without contacts every entity keeps its zero contact metrics
+        if self.contacts.empty:
+            return
+
         self._find_continuite()
         self._contact_metrics()
 
     def _find_contacts(self):
         """
-        Iterates over all timestamps and checks for proximity-based contact
-        between each pair of entities.
+        Detects every pair of entities in contact at each timestamp, using a spatial
+        index per timestamp instead of comparing every pair.
 
         Returns:
             DataFrame: A pandas DataFrame containing the detected contacts.
         """
-        unique_times = self.trace['time'].unique()
-        contact_records = []
-
-        for t in tqdm(unique_times, desc="Processing contacts"):
-            subset = self.trace[self.trace['time'] == t]
+        ids = np.asarray(self.trace['id'])
+        x, y, z = trace_arrays(self.trace)
 
-            if len(subset) < 2:
-                continue
-
-            objects = subset.to_dict(orient='records')
-
-            for i in range(len(objects)):
-                for j in range(i + 1, len(objects)):
-                    obj1, obj2 = objects[i], objects[j]
+        id1, id2, timestamps = contact_pairs(
+            ids, x, y, z, np.asarray(self.trace['time']),
+            self.parameters[2], self.parameters[6]
+        )
 
-                    dist = distance(obj1, obj2, self.parameters[6])
-
-                    if dist < self.parameters[2]:
-                        contact_records.append({
-                            'file_name': self.parameters[4],
-                            'id1': obj1['id'],
-                            'id2': obj2['id'],
-                            'contact_timestamp': t,
-                        })
-        
-        self.contacts = pd.DataFrame(contact_records)
+        self.contacts = pd.DataFrame({
+            'file_name': self.file_name,
+            'id1': id1,
+            'id2': id2,
+            'contact_timestamp': timestamps,
+        })
 
 
     def _find_continuite(self):
         """
-        Finds and saves continuous contact periods between the same pair of entities.
+        Merges the per-timestamp contacts of each pair of entities into continuous contact
+        periods and saves them.
+
+        Contacts are sorted by pair and timestamp; a new period starts wherever the pair
+        changes or the gap to the previous contact exceeds the contact time threshold.
         """
-        if self.contacts.empty:
-            raise ValueError("No contacts found. Run _find_contacts() first.")
+        id1 = self.contacts['id1'].to_numpy()
+        id2 = self.contacts['id2'].to_numpy()
+        timestamps = self.contacts['contact_timestamp'].to_numpy()
 
         # Sort for proper sequential analysis
-        self.contacts.sort_values(by=['id1', 'id2', 'contact_timestamp'], inplace=True)
-
-        contact_instances = []
-        prev_row = None
-        start_timestamp = end_timestamp = None
-
-        for _, row in self.contacts.iterrows():
-            if (
-                prev_row is not None and
-                row['id1'] == prev_row['id1'] and
-                row['id2'] == prev_row['id2'] and
-                (row['contact_timestamp'] - prev_row['contact_timestamp']) <= self.contact_time_threshold
-            ):
-                # Extend the ongoing contact
-                end_timestamp = row['contact_timestamp']
-            else:
-                # Save the previous contact if one was ongoing
-                if prev_row is not None:
-                    contact_instances.append(ContactModel(
-                        file_name=self.file_name,
-                        id1=prev_row['id1'],
-                        id2=prev_row['id2'],
-                        initial_timestamp=start_timestamp,
-                        final_timestamp=end_timestamp,
-                        contact_time=end_timestamp - start_timestamp
-                    ))
-                # Start a new contact
-                start_timestamp = row['contact_timestamp']
-                end_timestamp = row['contact_timestamp']
-
-            prev_row = row
-
-        # Save the last contact if needed
-        if prev_row is not None:
-            contact_instances.append(ContactModel(
-                file_name=self.file_name,
-                id1=prev_row['id1'],
-                id2=prev_row['id2'],
-                initial_timestamp=start_timestamp,
-                final_timestamp=end_timestamp,
-                contact_time=end_timestamp - start_timestamp
-            ))
+        order = np.lexsort((timestamps, id2, id1))
+        id1, id2, timestamps = id1[order], id2[order], timestamps[order]
+
+        new_period = np.ones(len(timestamps), dtype=bool)
+        new_period[1:] = (
+            (id1[1:] != id1[:-1]) |
+            (id2[1:] != id2[:-1]) |
+            (np.diff(timestamps) > self.contact_time_threshold)
+        )
+
+        period = np.cumsum(new_period) - 1
+        starts = np.flatnonzero(new_period)
+        ends = np.flatnonzero(np.append(period[1:] != period[:-1], True))
+
+        self.periods = pd.DataFrame({
+            'id1': id1[starts],
+            'id2': id2[starts],
+            'initial_timestamp': timestamps[starts],
+            'final_timestamp': timestamps[ends],
+            'contact_time': timestamps[ends] - timestamps[starts],
+        })
+
+        contact_instances = [
+            ContactModel(file_name=self.file_name, **fields)
+            for fields in self.periods.to_dict(orient='records')
+        ]
 
         # Save all contacts to the database at once
-        ContactModel.objects.bulk_create(contact_instances)
-
+        ContactModel.objects.bulk_create(contact_instances, batch_size=BATCH_SIZE)
 
     def _contact_metrics(self):
+        """
+        Adds the contact periods of each entity to its metrics, aggregating every period
+        in a single groupby and writing the metrics with one bulk update.
+        """
+        per_entity = pd.DataFrame({
+            'entity_id': np.concatenate((self.periods['id1'].to_numpy(), self.periods['id2'].to_numpy())),
+            'contact_time': np.tile(self.periods['contact_time'].to_numpy(), 2),
+        })
+        totals = per_entity.groupby('entity_id')['contact_time'].agg(['sum', 'count'])
 
-        contacts = ContactModel.objects.filter(file_name = self.file_name)
-
-        for contact in contacts:
-            id1 = contact.id1
-            id2 = contact.id2
-            contact_time = contact.contact_time
-
-            ids = (id1, id2)
-
-            for n in ids:
-
-                metric = MetricsModel.objects.filter(file_name = self.file_name, entity_id = n).first()
+        metrics = {}
+        for metric in MetricsModel.objects.filter(file_name=self.file_name).order_by('id'):
+            metrics.setdefault(metric.entity_id, metric)
 
-                metric_total_contact_time = (metric.total_contact_time or 0) + contact_time
-                metric_num_contacts = (metric.num_contacts or 0) + 1
-                metric_avg_contact_time = metric_total_contact_time / metric_num_contacts
+        updated = []
+        for entity_id, total_contact_time, num_contacts in totals.itertuples():
+            metric = metrics.get(entity_id)
 
+            if metric is None:
+                continue
 
-                metric.total_contact_time = metric_total_contact_time
-                metric.num_contacts = metric_num_contacts
-                metric.avg_contact_time = metric_avg_contact_time
-                
-                metric.save()
+            metric.total_contact_time = (metric.total_contact_time or 0) + total_contact_time
+            metric.num_contacts = (metric.num_contacts or 0) + num_contacts
+            metric.avg_contact_time = metric.total_contact_time / metric.num_contacts
 
+            updated.append(metric)
 
+        MetricsModel.objects.bulk_update(
+            updated,
+            ['total_contact_time', 'num_contacts', 'avg_contact_time'],
+            batch_size=BATCH_SIZE
+        )
@@ -1,12 +1,11 @@
-# Standard library imports.
-import math
-
 # Related third party imports.
-import tqdm
+import numpy as np
 
 # Local application/library specific imports.
 from ...models import StayPointModel
+from ...process.progress import report
 from ..utils.abs_metric import AbsMetric
+from ..utils.aggregation import field_arrays, update_by_pk
 
 
 class Entropy(AbsMetric):
@@ -41,14 +40,22 @@ class Entropy(AbsMetric):
     def _stay_point_entropy(self):
         """
         Compute entropy for each stay point based on its number of visits.
-        The entropy is saved to the respective model instance.
+        The entropies are computed over the visit counts of every stay point at once and
+        written back with bulk_update.
         """
-        stay_points = StayPointModel.objects.filter(file_name=self.parameters[4])
+        report("Stay Point Entropy")
+
+        ids, num_visits = field_arrays(
+            StayPointModel.objects.filter(file_name=self.parameters[4]), 'id', 'num_visits'
+        )
+
+        if len(ids) == 0:
+            return
 
-        for sp in tqdm.tqdm(stay_points, desc="Stay Point Entropy"):
-            probability = sp.num_visits / self.total_visits
+        probability = num_visits / self.total_visits
+        visited = probability > 0
 
-            if probability > 0:
-                entropy = -probability * math.log2(probability)
-                sp.entropy = entropy
-                sp.save()
+        update_by_pk(
+            StayPointModel, ids[visited],
+            entropy=-probability[visited] * np.log2(probability[visited])
+        )
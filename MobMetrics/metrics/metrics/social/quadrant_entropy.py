@@ -1,9 +1,13 @@
-# Standard library imports.
-from math import log2
+# Related third party imports.
+import numpy as np
 
 # Local application/library specific imports.
 from ...models import QuadrantEntropyModel, GlobalMetricsModel, MetricsModel
 from ..utils.abs_metric import AbsMetric
+from ..utils.kernels import trace_arrays
+from ..utils.quadrant_histogram import quadrant_histogram, cell_entropy
+
+BATCH_SIZE = 1000
 
 
 class QuadrantEntropy(AbsMetric):
@@ -12,7 +16,7 @@ class QuadrantEntropy(AbsMetric):
     This metric evaluates how spread out visits are in a 2D space partitioned into quadrants.
 
     Attributes:
-        trace (pd.DataFrame): Data containing spatial coordinates and entity IDs.
+        trace (pd.DataFrame or TraceArrays): Data containing spatial coordinates and entity IDs.
         parameters (list): Configuration parameters for processing.
         quadrant_size (int): Number of divisions along each axis to form quadrants.
     """
@@ -22,7 +26,7 @@ class QuadrantEntropy(AbsMetric):
         Initialize the QuadrantEntropy class.
 
         Args:
-            trace (pd.DataFrame): DataFrame containing 'x', 'y', and 'id' columns.
+            trace (pd.DataFrame or TraceArrays): Trace containing 'x', 'y', and 'id' columns.
             parameters (list): List of parameters, where index 3 is the quadrant size.
         """
         self.trace = trace
@@ -33,88 +37,87 @@ class QuadrantEntropy(AbsMetric):
         """
         Extract both total and per-entity quadrant entropy metrics.
         """
-        self._total_quadrant_entropy()
-        self._entity_quadrant_entropy()
+        if len(self.trace) == 0:
+            return
+
+        x, y = trace_arrays(self.trace, ('x', 'y'))
+        global_cells, entity_cells = quadrant_histogram(
+            np.asarray(self.trace['id']), x, y, self.quadrant_size
+        )
+
+        self._total_quadrant_entropy(*global_cells)
+        self._entity_quadrant_entropy(*entity_cells)
 
-    def _total_quadrant_entropy(self):
+    def _total_quadrant_entropy(self, qx, qy, counts):
         """
         Compute total entropy over all points in the trace using spatial quadrants.
         Save results to the QuadrantEntropyModel and update the GlobalMetricsModel.
-        """
-        min_x, max_x = self.trace['x'].min(), self.trace['x'].max()
-        min_y, max_y = self.trace['y'].min(), self.trace['y'].max()
-
-        delta_x = (max_x - min_x) / self.quadrant_size
-        delta_y = (max_y - min_y) / self.quadrant_size
 
-        quadrant_visits = {}
-
-        for _, row in self.trace.iterrows():
-            qx = int((row['x'] - min_x) / delta_x)
-            qy = int((row['y'] - min_y) / delta_y)
-            quadrant_index = (qx, qy)
-            quadrant_visits[quadrant_index] = quadrant_visits.get(quadrant_index, 0) + 1
-
-        total_visits = sum(quadrant_visits.values())
-        occupied_quadrants = len(quadrant_visits)
-
-        for quadrant_index, visit_count in quadrant_visits.items():
-            probability = visit_count / total_visits
-            entropy = -probability * log2(probability)
+        Args:
+            qx, qy (np.ndarray): Quadrant of each occupied cell.
+            counts (np.ndarray): Number of points in each cell.
+        """
+        occupied_quadrants = len(counts)
+        entropy = cell_entropy(counts, counts.sum())
 
-            QuadrantEntropyModel.objects.create(
+        QuadrantEntropyModel.objects.bulk_create([
+            QuadrantEntropyModel(
                 file_name=self.parameters[4],
-                x=quadrant_index[0],
-                y=quadrant_index[1],
+                x=cell_x,
+                y=cell_y,
                 visit_count=visit_count,
-                entropy=entropy,
+                entropy=cell,
                 entity_id=None,
                 spatial_cover=occupied_quadrants
             )
+            for cell_x, cell_y, visit_count, cell in zip(
+                qx.tolist(), qy.tolist(), counts.tolist(), entropy.tolist()
+            )
+        ], batch_size=BATCH_SIZE)
 
-        global_metric = GlobalMetricsModel.objects.get(file_name=self.parameters[4])
-        global_metric.total_spatial_cover = occupied_quadrants
-        global_metric.save()
+        GlobalMetricsModel.objects.filter(file_name=self.parameters[4]).update(
+            total_spatial_cover=occupied_quadrants
+        )
 
-    def _entity_quadrant_entropy(self):
+    def _entity_quadrant_entropy(self, entity_ids, qx, qy, counts):
         """
         Compute entropy per entity using quadrant-based partitioning.
         Save results to the QuadrantEntropyModel and update the MetricsModel.
+
+        Args:
+            entity_ids (np.ndarray): Entity of each occupied cell, grouped by entity.
+            qx, qy (np.ndarray): Quadrant of each occupied cell.
+            counts (np.ndarray): Number of points of the entity in each cell.
         """
-        min_x, max_x = self.trace['x'].min(), self.trace['x'].max()
-        min_y, max_y = self.trace['y'].min(), self.trace['y'].max()
-
-        delta_x = (max_x - min_x) / self.quadrant_size
-        delta_y = (max_y - min_y) / self.quadrant_size
-
-        grouped = self.trace.groupby('id')
-
-        for entity_id, group in grouped:
-            quadrant_visits = {}
-
-            for _, row in group.iterrows():
-                qx = int((row['x'] - min_x) / delta_x)
-                qy = int((row['y'] - min_y) / delta_y)
-                quadrant_index = (qx, qy)
-                quadrant_visits[quadrant_index] = quadrant_visits.get(quadrant_index, 0) + 1
-
-            total_visits = sum(quadrant_visits.values())
-            occupied_quadrants = len(quadrant_visits)
-
-            for quadrant_index, visit_count in quadrant_visits.items():
-                probability = visit_count / total_visits
-                entropy = -probability * log2(probability)
-
-                QuadrantEntropyModel.objects.create(
-                    file_name=self.parameters[4],
-                    x=quadrant_index[0],
-                    y=quadrant_index[1],
-                    visit_count=visit_count,
-                    entropy=entropy,
-                    entity_id=entity_id,
-                    spatial_cover=occupied_quadrants
-                )
-
-            metric = MetricsModel.objects.get(file_name=self.parameters[4], entity_id=entity_id)
-            metric.spatial_cover = occupied_quadrants
-            metric.save()
+        entities, entity_codes, occupied_quadrants = np.unique(
+            entity_ids, return_inverse=True, return_counts=True
+        )
+        totals = np.bincount(entity_codes, weights=counts)
+        entropy = cell_entropy(counts, totals[entity_codes])
+
+        QuadrantEntropyModel.objects.bulk_create([
+            QuadrantEntropyModel(
+                file_name=self.parameters[4],
+                x=cell_x,
+                y=cell_y,
+                visit_count=visit_count,
+                entropy=cell,
+                entity_id=entity_id,
+                spatial_cover=int(occupied_quadrants[code])
+            )
+            for entity_id, code, cell_x, cell_y, visit_count, cell in zip(
+                entity_ids.tolist(), entity_codes.tolist(), qx.tolist(), qy.tolist(),
+                counts.tolist(), entropy.tolist()
+            )
+        ], batch_size=BATCH_SIZE)
+
+        spatial_cover = dict(zip(entities.tolist(), occupied_quadrants.tolist()))
+        metrics = [
+            metric for metric in MetricsModel.objects.filter(file_name=self.parameters[4])
+            if metric.entity_id in spatial_cover
+        ]
+
+        for metric in metrics:
+            metric.spatial_cover = spatial_cover[metric.entity_id]
+
+        MetricsModel.objects.bulk_update(metrics, ['spatial_cover'], batch_size=BATCH_SIZE)
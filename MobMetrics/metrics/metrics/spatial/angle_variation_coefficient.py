@@ -1,9 +1,6 @@
-# Standard library imports.
-from math import sqrt
-
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
-from ..utils.utils import direction_angle
+from ..utils.kernels import trace_arrays, step_bearings, angle_deviation
 
 
 class AngleVariationCoefficient(AbsMetric):
@@ -45,18 +42,7 @@ class AngleVariationCoefficient(AbsMetric):
         Returns:
             float: Standard deviation of angles between consecutive points.
         """
-        sum_squared_diffs = 0
-        count = 0
-
-        for prev_row, curr_row in zip(self.trace_file.iloc[:-1].iterrows(),
-                                       self.trace_file.iloc[1:].iterrows()):
-            _, prev_row = prev_row
-            _, curr_row = curr_row
+        x, y = trace_arrays(self.trace_file, ('x', 'y'))
+        angles = step_bearings(x, y, self.is_geographical_coordinates)
 
-            count += 1
-            angle = direction_angle(prev_row, curr_row, self.is_geographical_coordinates)
-            sum_squared_diffs += (angle - self.avg_angle) ** 2
-
-        if count == 0:
-            return 0.0  # Prevent division by zero
-        return sqrt(sum_squared_diffs / count)
+        return angle_deviation(angles, self.avg_angle)
@@ -1,6 +1,6 @@
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
-from ..utils.utils import distance
+from ..utils.kernels import trace_arrays, step_distances
 
 
 class JourneyDistance(AbsMetric):
@@ -32,28 +32,9 @@ class JourneyDistance(AbsMetric):
         Returns:
             float: The total journey distance.
         """
-        total_distance = 0.0
-
         if len(self.traces) < 2:
-            return total_distance
-
-        previous_trace = self.traces.iloc[0]
-
-        for i in range(1, len(self.traces)):
-            current_trace = self.traces.iloc[i]
-
-            first_point = {
-                'x': previous_trace['x'],
-                'y': previous_trace['y'],
-                'z': previous_trace['z']
-            }
-            second_point = {
-                'x': current_trace['x'],
-                'y': current_trace['y'],
-                'z': current_trace['z']
-            }
+            return 0.0
 
-            total_distance += distance(first_point, second_point, self.is_geographical_coordinates)
-            previous_trace = current_trace
+        x, y, z = trace_arrays(self.traces)
 
-        return total_distance
+        return float(step_distances(x, y, z, self.is_geographical_coordinates).sum())
@@ -1,8 +1,6 @@
-# Standard library imports.
-from math import sqrt
-
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
+from ..utils.kernels import trace_arrays, gyration_radius
 
 
 class RadiusOfGyration(AbsMetric):
@@ -33,14 +31,7 @@ class RadiusOfGyration(AbsMetric):
         Returns:
             float: The radius of gyration rounded to 5 decimal places.
         """
-        radius_of_gyration = 0.0
-
-        for _, row in self.trace.iterrows():
-            x = (row['x'] - self.center_of_mass[0]) ** 2
-            y = (row['y'] - self.center_of_mass[1]) ** 2
-            z = (row['z'] - self.center_of_mass[2]) ** 2
-            radius_of_gyration += x + y + z
-
-        radius_of_gyration = sqrt(radius_of_gyration / len(self.trace))
+        x, y, z = trace_arrays(self.trace)
+        radius_of_gyration = gyration_radius(x, y, z, self.center_of_mass)
 
         return round(radius_of_gyration, 5)
@@ -1,9 +1,11 @@
 # Related third party imports.
-import tqdm
+import numpy as np
 
 # Local application/library specific imports.
 from ...models import StayPointModel
+from ...process.progress import report
 from ..utils.abs_metric import AbsMetric
+from ..utils.aggregation import field_arrays, update_by_pk
 
 
 class StaypointImportanceDegree(AbsMetric):
@@ -32,53 +34,48 @@ class StaypointImportanceDegree(AbsMetric):
         """
         self._compute_importance_degree()
 
-    def _normalize(self, value, min_val, max_val):
+    def _normalize(self, values):
         """
-        Normalize a given value within a specified range.
+        Normalize values to the range of the dataset.
 
         Args:
-            value (float): Value to be normalized.
-            min_val (float): Minimum value in the dataset.
-            max_val (float): Maximum value in the dataset.
+            values (np.ndarray): Values to be normalized.
 
         Returns:
-            float: Normalized value between 0 and 1. Returns 0 if min_val == max_val.
+            np.ndarray: Normalized values between 0 and 1. All 0 if every value is the same.
         """
+        min_val, max_val = values.min(), values.max()
+
         if max_val == min_val:
-            return 0.0
-        return (value - min_val) / (max_val - min_val)
+            return np.zeros(len(values))
+        return (values - min_val) / (max_val - min_val)
 
     def _compute_importance_degree(self):
         """
         Compute the importance degree for each stay point based on normalized values
-        of visit count, total visit time, and entropy.
+        of visit count, total visit time, and entropy, over every stay point at once.
         """
-        stay_points = StayPointModel.objects.filter(file_name=self.parameters[4])
+        report("Stay Point Importance Degree")
 
-        visits_list = [sp.num_visits for sp in stay_points]
-        visit_time_list = [sp.total_visits_time for sp in stay_points]
-        entropy_list = [sp.entropy for sp in stay_points]
+        ids, num_visits, total_visits_time, entropy = field_arrays(
+            StayPointModel.objects.filter(file_name=self.parameters[4]),
+            'id', 'num_visits', 'total_visits_time', 'entropy'
+        )
 
-        if not visits_list:
+        if len(ids) == 0:
             return
 
-        min_visits, max_visits = min(visits_list), max(visits_list)
-        min_time, max_time = min(visit_time_list), max(visit_time_list)
-        min_entropy, max_entropy = min(entropy_list), max(entropy_list)
+        norm_visits = self._normalize(num_visits)
+        norm_time = self._normalize(total_visits_time)
+        norm_entropy = self._normalize(entropy)
 
         # Weights for the importance calculation
         alpha, beta, gamma = 0.4, 0.4, 0.2
 
-        for sp in tqdm.tqdm(stay_points, desc="Stay Point Importance Degree"):
-            norm_visits = self._normalize(sp.num_visits, min_visits, max_visits)
-            norm_time = self._normalize(sp.total_visits_time, min_time, max_time)
-            norm_entropy = self._normalize(sp.entropy, min_entropy, max_entropy)
-
-            importance = (
-                alpha * norm_visits +
-                beta * norm_time +
-                gamma * (1 - norm_entropy)
-            )
+        importance = (
+            alpha * norm_visits +
+            beta * norm_time +
+            gamma * (1 - norm_entropy)
+        )
 
-            sp.importance_degree = importance
-            sp.save()
+        update_by_pk(StayPointModel, ids, importance_degree=importance)
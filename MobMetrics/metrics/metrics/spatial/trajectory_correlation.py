@@ -2,12 +2,22 @@
 import numpy as np
 
 # Related third party imports.
-import tqdm
-from sklearn.metrics.pairwise import cosine_similarity
+from django.conf import settings
 
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
+from ..utils.cosine_statistics import cosine_moments, cosine_percentiles
+from ..utils.kernels import trace_arrays
 from ...models import GlobalMetricsModel
+from ...process.partition import entity_offsets
+from ...process.progress import report
+
+LINEAR = 'linear'
+BLOCKED = 'blocked'
+SAMPLED = 'sampled'
+
+# Percentiles of the pairwise similarity stored by the blocked and sampled modes
+QUARTILES = (25, 50, 75)
 
 
 class TrajectoryCorrelationDegree(AbsMetric):
@@ -16,51 +26,102 @@ class TrajectoryCorrelationDegree(AbsMetric):
     The higher the similarity between trajectories, the higher the correlation degree.
 
     Attributes:
-        trace (pd.DataFrame): Data containing coordinates, timestamp, and entity ID.
+        trace (pd.DataFrame or TraceArrays): Data containing coordinates, timestamp, and entity ID,
+                                             sorted by entity ID and time.
         parameters (list): Configuration parameters for processing.
         fraction (float): Fraction of points to sample from the shortest trajectory.
         min_points (int): Minimum number of points required for sampling.
         fixed_n_points (int): Number of points to sample uniformly from each trajectory.
+        mode (str): 'linear' only derives the deviation, from sums over the vectors in O(E*d)
+                    memory. 'blocked' also computes the quartiles of the pairwise similarity
+                    by visiting every pair in blocks, and 'sampled' estimates them from
+                    `sample_size` random pairs.
+        sample_size (int): Pairs drawn by the 'sampled' mode.
     """
 
-    def __init__(self, trace, parameters):
+    def __init__(self, trace, parameters, mode=None):
         """
         Initialize the TrajectoryCorrelationDegree class.
 
         Args:
-            trace (pd.DataFrame): Trajectory data with 'x', 'y', 'time', and 'id' columns.
+            trace (pd.DataFrame or TraceArrays): Trajectory data with 'x', 'y', 'time', and 'id'
+                                                 columns, sorted by 'id' and 'time'.
             parameters (list): A list of configuration parameters.
+            mode (str, optional): 'linear', 'blocked' or 'sampled'. Defaults to
+                                  settings.TRAJECTORY_CORRELATION_MODE, or 'linear'.
         """
         self.trace = trace
         self.parameters = parameters
+        self.mode = mode or getattr(settings, 'TRAJECTORY_CORRELATION_MODE', LINEAR)
+        self.sample_size = getattr(settings, 'TRAJECTORY_CORRELATION_SAMPLE_SIZE', 1_000_000)
 
         self.fraction = 0.8
         self.min_points = 20
 
-        group_sizes = self.trace.groupby('id').size()
+        self.x, self.y = trace_arrays(self.trace, ('x', 'y'))
+        _, self.offsets = entity_offsets(np.asarray(self.trace['id']))
+
+        group_sizes = np.diff(self.offsets)
         self.fixed_n_points = max(self.min_points, int(self.fraction * group_sizes.min()))
 
-    def _uniform_sample_traj(self, df_id):
+    def _uniform_sample_trajs(self):
         """
-        Uniformly sample a fixed number of points from a single trajectory.
+        Uniformly sample a fixed number of points from every trajectory at once.
+
+        The sampled positions match np.linspace(0, size - 1, fixed_n_points, dtype=int) for
+        each trajectory, and are gathered with a single fancy index.
+
+        Returns:
+            np.ndarray: (entities, 2 * fixed_n_points) array of flattened (x, y) samples, one row
+                        per trajectory with at least fixed_n_points points.
+        """
+        starts = self.offsets[:-1]
+        sizes = np.diff(self.offsets)
+
+        keep = sizes >= self.fixed_n_points
+        starts, sizes = starts[keep], sizes[keep]
+
+        # Same arithmetic as np.linspace: i * step, with the last sample on the endpoint
+        step = (sizes - 1) / (self.fixed_n_points - 1)
+        positions = np.arange(self.fixed_n_points) * step[:, None]
+        positions[:, -1] = sizes - 1
+
+        sampled = starts[:, None] + positions.astype(int)
+
+        return np.stack((self.x[sampled], self.y[sampled]), axis=2).reshape(len(sampled), -1)
+
+    def _similarity_deviation(self, vectors):
+        """
+        Standard deviation of the pairwise cosine similarities (and distances) of the vectors.
 
         Args:
-            df_id (pd.DataFrame): Trajectory data for a single entity.
+            vectors (np.ndarray): One row per trajectory.
 
         Returns:
-            np.ndarray or None: Flattened array of sampled (x, y) coordinates,
-                                or None if trajectory is too short.
+            float: The population standard deviation over every pair.
+        """
+        _, _, variance = cosine_moments(vectors)
+
+        return np.sqrt(variance)
+
+    def _similarity_quartiles(self, vectors):
         """
-        df_id_sorted = df_id.sort_values('time')
+        Quartiles of the pairwise cosine similarities of the vectors, in the blocked and
+        sampled modes.
 
-        if len(df_id_sorted) < self.fixed_n_points:
-            return None
+        Args:
+            vectors (np.ndarray): One row per trajectory.
 
-        sampled = df_id_sorted.iloc[
-            np.linspace(0, len(df_id_sorted) - 1, self.fixed_n_points, dtype=int)
-        ]
+        Returns:
+            np.ndarray or None: The 25th, 50th and 75th percentiles, or None in linear mode.
+        """
+        if self.mode == BLOCKED:
+            return cosine_percentiles(vectors, QUARTILES)
 
-        return sampled[['x', 'y']].to_numpy().flatten()
+        if self.mode == SAMPLED:
+            return cosine_percentiles(vectors, QUARTILES, sample_size=self.sample_size)
+
+        return None
 
     def extract(self):
         """
@@ -70,26 +131,21 @@ class TrajectoryCorrelationDegree(AbsMetric):
         Returns:
             None
         """
-        vectors = []
-
-        for ent_id, df_ent in tqdm.tqdm(self.trace.groupby('id'), desc="Trajectory Correlation Degree"):
-            traj_vector = self._uniform_sample_traj(df_ent)
+        report("Trajectory Correlation Degree")
 
-            if traj_vector is not None:
-                vectors.append(traj_vector)
+        vectors = self._uniform_sample_trajs()
 
         if len(vectors) < 2:
             return 0.0
 
-        vectors = np.array(vectors)
-        sim_matrix = cosine_similarity(vectors)
+        # The distances 1 - similarity have the same deviation as the similarities
+        metrics = {'trajectory_correlation': 1 - self._similarity_deviation(vectors)}
 
-        upper_indices = np.triu_indices_from(sim_matrix, k=1)
-        sim_values = sim_matrix[upper_indices]
+        quartiles = self._similarity_quartiles(vectors)
 
-        dist_values = 1 - sim_values
-        correlation_degree = 1 - np.std(dist_values)
+        if quartiles is not None:
+            (metrics['trajectory_similarity_q1'],
+             metrics['trajectory_similarity_median'],
+             metrics['trajectory_similarity_q3']) = (float(value) for value in quartiles)
 
-        global_metric = GlobalMetricsModel.objects.get(file_name=self.parameters[4])
-        global_metric.trajectory_correlation = correlation_degree
-        global_metric.save()
+        GlobalMetricsModel.objects.filter(file_name=self.parameters[4]).update(**metrics)
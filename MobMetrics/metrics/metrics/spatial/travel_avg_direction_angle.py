@@ -1,6 +1,6 @@
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
-from ..utils.utils import direction_angle
+from ..utils.kernels import trace_arrays, step_bearings
 
 
 class TravelAvgDirectionAngle(AbsMetric):
@@ -19,7 +19,6 @@ class TravelAvgDirectionAngle(AbsMetric):
         """
         self.trace_file = trace_file
 
-        # Assuming this attribute is required by direction_angle
         self.is_geographical_coordinates = parameters[6]
 
     def extract(self):
@@ -29,18 +28,10 @@ class TravelAvgDirectionAngle(AbsMetric):
         Returns:
             float: The average direction angle rounded to 5 decimal places.
         """
-        angle_sum = 0
-        count = 0
+        x, y = trace_arrays(self.trace_file, ('x', 'y'))
+        angles = step_bearings(x, y, self.is_geographical_coordinates)
 
-        for prev_row, curr_row in zip(self.trace_file.iloc[:-1].iterrows(),
-                                       self.trace_file.iloc[1:].iterrows()):
-            _, prev_row = prev_row
-            _, curr_row = curr_row
-
-            count += 1
-            angle_sum += direction_angle(prev_row, curr_row, self.is_geographical_coordinates)
-
-        if count == 0:
+        if len(angles) == 0:
             return 0.0  # Prevent division by zero
 
-        return round(angle_sum / count, 5)
+        return round(float(angles.mean()), 5)
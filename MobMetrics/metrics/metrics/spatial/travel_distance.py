@@ -1,6 +1,6 @@
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
-from ..utils.utils import distance
+from ..utils.kernels import trace_arrays, step_distances
 
 
 class TravelDistance(AbsMetric):
@@ -31,12 +31,7 @@ class TravelDistance(AbsMetric):
         Returns:
             float: The total travel distance rounded to 5 decimal places.
         """
-        travel_distance = 0.0
-
-        for prev_row, curr_row in zip(self.trace.iloc[:-1].iterrows(), self.trace.iloc[1:].iterrows()):
-            _, prev_row = prev_row
-            _, curr_row = curr_row
-
-            travel_distance += distance(prev_row, curr_row, self.is_geographical_coordinates)
+        x, y, z = trace_arrays(self.trace)
+        travel_distance = float(step_distances(x, y, z, self.is_geographical_coordinates).sum())
 
         return round(travel_distance, 5)
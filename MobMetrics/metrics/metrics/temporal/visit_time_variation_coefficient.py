@@ -1,8 +1,9 @@
-# Standard library imports.
-from math import sqrt
+# Related third party imports.
+import numpy as np
 
 # Local application/library specific imports.
 from ..utils.abs_metric import AbsMetric
+from ..utils.aggregation import field_arrays, group_positions, update_by_pk
 from ...models import MetricsModel, VisitModel
 
 
@@ -26,28 +27,33 @@ class VisitTimeVariationCoefficient(AbsMetric):
         Extract and compute the visit time variation coefficient for each metric entry
         associated with the file name. The coefficient is calculated as the standard 
         deviation of visit durations divided by the average visit time.
-        """
-        metrics = MetricsModel.objects.filter(file_name=self.file_name)
-
-        for metric in metrics:
-            metric_id = metric.entity_id
-            metric_avg_time_visit = metric.avg_time_visit
-
-            visits = VisitModel.objects.filter(
-                file_name=self.file_name,
-                entity_id=metric_id
-            )
-
-            deviation_sum = 0
-            num_visits = 0
 
-            for visit in visits:
-                num_visits += 1
-                deviation_sum += (visit.visit_time - metric_avg_time_visit) ** 2
-
-            if num_visits > 0 and metric_avg_time_visit != 0:
-                standard_deviation = sqrt(deviation_sum / num_visits)
-                visit_time_variation_coefficient = standard_deviation / metric_avg_time_visit
-                metric.visit_time_variation_coefficient = visit_time_variation_coefficient
-
-                metric.save()
+        Visits and metrics are loaded with one query each, the deviations are summed per
+        entity in a single NumPy pass and the coefficients are written with bulk_update.
+        """
+        metric_ids, entity_ids, avg_time_visit = field_arrays(
+            MetricsModel.objects.filter(file_name=self.file_name),
+            'id', 'entity_id', 'avg_time_visit'
+        )
+        visit_entities, visit_times = field_arrays(
+            VisitModel.objects.filter(file_name=self.file_name).order_by('id'),
+            'entity_id', 'visit_time'
+        )
+
+        if len(metric_ids) == 0 or len(visit_times) == 0:
+            return
+
+        # Metric row of the entity of each visit
+        positions = group_positions(visit_entities, entity_ids)
+
+        deviation_sum = np.bincount(positions, weights=(visit_times - avg_time_visit[positions]) ** 2,
+                                    minlength=len(metric_ids))
+        num_visits = np.bincount(positions, minlength=len(metric_ids))
+
+        valid = (num_visits > 0) & (avg_time_visit != 0) & ~np.isnan(avg_time_visit)
+        standard_deviation = np.sqrt(deviation_sum[valid] / num_visits[valid])
+
+        update_by_pk(
+            MetricsModel, metric_ids[valid],
+            visit_time_variation_coefficient=standard_deviation / avg_time_visit[valid]
+        )
@@ -0,0 +1,70 @@
+# Related third party imports.
+import numpy as np
+
+# Rows written per bulk_update query
+BATCH_SIZE = 1000
+
+
+def field_arrays(queryset, *fields):
+    """
+    Loads fields of a queryset as NumPy arrays, in a single values_list query.
+
+    Args:
+        queryset (QuerySet): Rows to load.
+        *fields (str): Names of the fields to load.
+
+    Returns:
+        tuple: One array per field. Nullable fields are returned as float arrays with NaN for None.
+    """
+    rows = list(queryset.values_list(*fields))
+
+    if not rows:
+        return tuple(np.array([], dtype=float) for _ in fields)
+
+    arrays = []
+
+    for column in zip(*rows):
+        array = np.array(column)
+        arrays.append(array.astype(float) if array.dtype == object else array)
+
+    return tuple(arrays)
+
+
+def group_positions(keys, group_keys):
+    """
+    Maps every key to the position of the same key in `group_keys`.
+
+    Args:
+        keys (np.ndarray): Keys to look up, e.g. the entity of each visit.
+        group_keys (np.ndarray): Unique keys of the groups, e.g. the entity of each metric row.
+
+    Returns:
+        np.ndarray: Position in `group_keys` of each key.
+    """
+    order = np.argsort(group_keys, kind='stable')
+
+    return order[np.searchsorted(group_keys[order], keys)]
+
+
+def update_by_pk(model, pks, batch_size=BATCH_SIZE, **columns):
+    """
+    Writes computed columns back to existing rows with bulk_update, without loading them.
+
+    Args:
+        model (Model): Model of the rows.
+        pks (np.ndarray): Primary key of each row to update.
+        batch_size (int): Rows written per query.
+        **columns (np.ndarray): Value of each field for each row, aligned with `pks`.
+    """
+    if len(pks) == 0:
+        return
+
+    names = list(columns)
+    values = [np.asarray(columns[name]).tolist() for name in names]
+
+    objects = [
+        model(pk=pk, **dict(zip(names, row)))
+        for pk, *row in zip(np.asarray(pks).tolist(), *values)
+    ]
+
+    model.objects.bulk_update(objects, names, batch_size=batch_size)
@@ -1,5 +1,6 @@
-import logging
+# Local application/library specific imports.
 from .abs_metric import AbsMetric
+from .kernels import trace_arrays, centroid
 
 
 class CenterOfMass(AbsMetric):
@@ -8,17 +9,6 @@ class CenterOfMass(AbsMetric):
         self.trace = trace
 
     def extract(self):
-        x, y, z = 0, 0, 0
-
-        for _, row in self.trace.iterrows():
-            x += row['x']
-            y += row['y']
-            z += row['z']
-
-        num_points = len(self.trace)
-        
-        x_center = x / num_points
-        y_center = y / num_points
-        z_center = z / num_points
+        x_center, y_center, z_center = centroid(*trace_arrays(self.trace))
 
         return round(x_center, 5), round(y_center, 5), round(z_center, 5)
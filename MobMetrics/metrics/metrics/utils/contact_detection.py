@@ -0,0 +1,100 @@
+# Related third party imports.
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Local application/library specific imports.
+from .kernels import EARTH_RADIUS, pairwise_distances
+from ...process.partition import entity_offsets
+from ...process.progress import ProgressBar
+
+# Relative slack on the tree query radius, so rounding never drops a pair that the exact
+# distance check would keep.
+QUERY_SLACK = 1e-9
+
+
+def contact_pairs(ids, x, y, z, time, radius, is_geo_coords):
+    """
+    Finds every pair of entities closer than `radius` at the same timestamp.
+
+    The trace is grouped by timestamp with a single stable sort, and the points of each
+    timestamp are loaded into a cKDTree whose `query_pairs` returns the candidate pairs.
+    Geographical points are embedded as their Earth-centered cartesian position plus the
+    altitude; the chord never exceeds the haversine distance, so the tree returns every
+    candidate. Candidates are then filtered with the exact `distance` semantics.
+
+    Args:
+        ids (np.ndarray): Entity id of each point.
+        x, y, z (np.ndarray): Coordinates of each point.
+        time (np.ndarray): Timestamp of each point.
+        radius (float): Points strictly closer than this are in contact.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        tuple: (id1, id2, timestamps) arrays with one entry per contact. For each pair,
+               id1 is the entity that appears first in the trace.
+    """
+    ids = np.asarray(ids)
+    time = np.asarray(time)
+
+    order = np.argsort(time, kind='stable')
+    times, offsets = entity_offsets(time[order])
+
+    points = _embed(x, y, z, is_geo_coords)[order]
+    x, y, z, ids = x[order], y[order], z[order], ids[order]
+
+    first, second, stamps = [], [], []
+
+    if radius > 0:
+        query_radius = radius * (1 + QUERY_SLACK)
+
+        for index in ProgressBar(range(len(times)), desc="Processing contacts"):
+            start, end = offsets[index], offsets[index + 1]
+
+            if end - start < 2:
+                continue
+
+            pairs = cKDTree(points[start:end]).query_pairs(query_radius, output_type='ndarray')
+
+            if len(pairs) == 0:
+                continue
+
+            i, j = pairs[:, 0] + start, pairs[:, 1] + start
+            dist = pairwise_distances(x[i], y[i], z[i], x[j], y[j], z[j], is_geo_coords)
+            keep = dist < radius
+
+            first.append(i[keep])
+            second.append(j[keep])
+            stamps.append(np.full(int(keep.sum()), times[index]))
+
+    if not first:
+        return ids[:0], ids[:0], times[:0]
+
+    i = np.concatenate(first)
+    j = np.concatenate(second)
+
+    return ids[i], ids[j], np.concatenate(stamps)
+
+
+def _embed(x, y, z, is_geo_coords):
+    """
+    Maps the points to the space searched by the tree.
+
+    Args:
+        x, y, z (np.ndarray): Coordinates of the points.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        np.ndarray: An (n, 3) cartesian array, or (n, 4) with the altitude for geographical points.
+    """
+    if not is_geo_coords:
+        return np.column_stack((x, y, z))
+
+    lat = np.radians(y)
+    lon = np.radians(x)
+
+    return np.column_stack((
+        EARTH_RADIUS * np.cos(lat) * np.cos(lon),
+        EARTH_RADIUS * np.cos(lat) * np.sin(lon),
+        EARTH_RADIUS * np.sin(lat),
+        z,
+    ))
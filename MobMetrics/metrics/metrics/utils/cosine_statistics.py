@@ -0,0 +1,169 @@
+# Related third party imports.
+import numpy as np
+
+# Elements of the largest Gram block held in memory at once
+BLOCK_ELEMENTS = 1 << 22
+
+
+def normalize_rows(vectors):
+    """
+    Scales every row to unit length; zero rows are kept as zeros, as in cosine_similarity.
+
+    Args:
+        vectors (np.ndarray): An (n, d) array.
+
+    Returns:
+        np.ndarray: The normalized (n, d) array.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(vectors, axis=1)
+    norms[norms == 0] = 1
+
+    return vectors / norms[:, None]
+
+
+def cosine_moments(vectors):
+    """
+    Mean and variance of the cosine similarity over every pair of rows, in linear memory.
+
+    The unit rows are written around their mean m as u_i = m + r_i, so that
+
+        u_i.u_j - |m|^2 = a_i + a_j + r_i.r_j,  with a_i = m.r_i
+
+    and the sums of these shifted similarities and of their squares over every ordered pair
+    follow from sum_i a_i, sum_i a_i^2, sum_i a_i r_i, sum_i r_i and |R^T R|_F^2, where
+    |R^T R|_F = |R R^T|_F is accumulated over blocks of whichever side is smaller. The E x E
+    similarity matrix is never built, and since the shifted terms are only as large as the
+    spread of the rows, nearly parallel rows keep the precision of the pairwise computation
+    instead of losing it to E[s^2] - E[s]^2.
+
+    Args:
+        vectors (np.ndarray): An (n, d) array with n >= 2.
+
+    Returns:
+        tuple: (number of pairs, mean, variance) of the pairwise cosine similarities.
+    """
+    units = normalize_rows(vectors)
+    n = len(units)
+    num_pairs = n * (n - 1) / 2
+
+    mean_unit = units.mean(axis=0)
+    shift = mean_unit @ mean_unit
+    residuals = units - mean_unit
+
+    projections = residuals @ mean_unit
+    projection_sum = projections.sum()
+    residual_sum = residuals.sum(axis=0)
+
+    # Sums over every ordered pair (i, j), the diagonal included, then without it
+    total = 2 * n * projection_sum + residual_sum @ residual_sum
+    squares = (
+        2 * n * (projections @ projections) + _gram_squared_norm(residuals) +
+        2 * projection_sum ** 2 + 4 * (projections @ residuals) @ residual_sum
+    )
+    diagonal = np.einsum('ij,ij->i', units, units) - shift
+
+    pair_mean = (total - diagonal.sum()) / 2 / num_pairs
+    pair_squares = (squares - (diagonal ** 2).sum()) / 2 / num_pairs
+
+    # A single pair has no spread; the expansion would only leave rounding noise
+    variance = max(pair_squares - pair_mean ** 2, 0.0) if n > 2 else 0.0
+
+    return num_pairs, shift + pair_mean, variance
+
+
+def cosine_blocks(vectors, block_size=None):
+    """
+    Yields the cosine similarity of every pair of rows (i < j), one block of rows at a time.
+
+    Memory is bounded by the block size; the values of all blocks together are the upper
+    triangle of the similarity matrix, row by row.
+
+    Args:
+        vectors (np.ndarray): An (n, d) array.
+        block_size (int): Rows per block. Defaults to a block of about BLOCK_ELEMENTS values.
+
+    Yields:
+        np.ndarray: Similarities of the pairs whose first row is in the block.
+    """
+    units = normalize_rows(vectors)
+    n = len(units)
+    block_size = block_size or max(1, BLOCK_ELEMENTS // max(n, 1))
+
+    for start in range(0, n - 1, block_size):
+        end = min(start + block_size, n - 1)
+        similarity = units[start:end] @ units[start + 1:].T
+
+        # Pairs (i, j) with j > i, i.e. column j - start - 1 >= row - start
+        rows, columns = np.indices(similarity.shape)
+        yield similarity[columns >= rows]
+
+
+def cosine_percentiles(vectors, q, sample_size=None, bins=1 << 16, block_size=None, seed=0):
+    """
+    Percentiles of the pairwise cosine similarities without holding all of them.
+
+    By default every pair is visited in blocks and counted in a fine histogram over [-1, 1],
+    so each percentile lands within a bin width (2 / bins) of the order statistic at its
+    rank. With `sample_size`, the percentiles of that many uniformly sampled pairs are
+    returned instead, in O(sample_size * d).
+
+    Args:
+        vectors (np.ndarray): An (n, d) array with n >= 2.
+        q (float or array-like): Percentiles to compute, in [0, 100].
+        sample_size (int, optional): Number of random pairs to estimate from.
+        bins (int): Histogram bins of the blocked mode.
+        block_size (int, optional): Rows per block of the blocked mode.
+        seed (int): Seed of the pair sampling.
+
+    Returns:
+        np.ndarray or float: The percentiles, shaped like `q`.
+    """
+    if sample_size is not None:
+        units = normalize_rows(vectors)
+        rng = np.random.default_rng(seed)
+
+        first = rng.integers(len(units), size=sample_size)
+        second = rng.integers(len(units) - 1, size=sample_size)
+        second += second >= first  # Uniform over j != i
+
+        similarity = np.einsum('ij,ij->i', units[first], units[second])
+        return np.percentile(similarity, q)
+
+    counts = np.zeros(bins, dtype=np.int64)
+
+    for similarity in cosine_blocks(vectors, block_size):
+        positions = ((np.clip(similarity, -1, 1) + 1) * (bins / 2)).astype(np.int64)
+        counts += np.bincount(np.minimum(positions, bins - 1), minlength=bins)
+
+    # Rank of each percentile, interpolated inside its bin
+    cumulative = np.cumsum(counts)
+    ranks = np.asarray(q, dtype=np.float64) / 100 * (cumulative[-1] - 1)
+    positions = np.searchsorted(cumulative, ranks, side='right')
+
+    before = np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0)
+    fraction = (ranks - before + 0.5) / np.maximum(counts[positions], 1)
+
+    return -1 + (positions + np.clip(fraction, 0, 1)) * (2 / bins)
+
+
+def _gram_squared_norm(rows):
+    """
+    Returns |R^T R|_F^2, accumulated over column blocks of R^T R (d <= n) or row blocks of
+    R R^T (n < d), so at most about BLOCK_ELEMENTS products are held at once.
+    """
+    n, d = rows.shape
+    total = 0.0
+
+    if d <= n:
+        step = max(1, BLOCK_ELEMENTS // d)
+        for start in range(0, d, step):
+            block = rows[:, start:start + step].T @ rows
+            total += np.einsum('ij,ij->', block, block)
+    else:
+        step = max(1, BLOCK_ELEMENTS // n)
+        for start in range(0, n, step):
+            block = rows[start:start + step] @ rows.T
+            total += np.einsum('ij,ij->', block, block)
+
+    return total
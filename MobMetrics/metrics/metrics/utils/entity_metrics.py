@@ -0,0 +1,73 @@
+# Local application/library specific imports.
+from .abs_metric import AbsMetric
+from .kernels import step_distances, step_bearings, centroid, gyration_radius, angle_deviation
+from ..kinematic.travel_average_speed import TravelAverageSpeed
+
+
+class EntityMetrics(AbsMetric):
+    """
+    Fused engine that computes every per-entity travel metric in a single pass.
+
+    Step distances and bearings are computed once and shared by the travel distance,
+    average speed, average direction angle and angle variation coefficient, so the
+    results match TravelTime, TravelDistance, TravelAverageSpeed, CenterOfMass,
+    RadiusOfGyration, TravelAvgDirectionAngle and AngleVariationCoefficient.
+
+    Attributes:
+        x, y, z (np.ndarray): Coordinates of the entity, in chronological order.
+        time (np.ndarray): Timestamps of the entity, in chronological order.
+        is_geographical_coordinates (bool): Flag indicating if coordinates are geographical.
+    """
+
+    def __init__(self, x, y, z, time, parameters):
+        """
+        Initialize the EntityMetrics engine.
+
+        Args:
+            x, y, z (np.ndarray): Contiguous float64 coordinate arrays of a single entity.
+            time (np.ndarray): Contiguous float64 timestamps of the same entity.
+            parameters (list): A list of parameters where the 7th element (index 6)
+                               indicates if the coordinates are geographical.
+        """
+        self.x = x
+        self.y = y
+        self.z = z
+        self.time = time
+        self.is_geographical_coordinates = parameters[6]
+
+    def extract(self):
+        """
+        Compute all per-entity travel metrics from shared intermediates.
+
+        Returns:
+            dict: Values keyed by the matching MetricsModel field names.
+        """
+        travel_time = float(self.time[-1] - self.time[0])
+
+        distances = step_distances(self.x, self.y, self.z, self.is_geographical_coordinates)
+        travel_distance = round(float(distances.sum()), 5)
+        travel_avg_speed = TravelAverageSpeed(travel_time, travel_distance).extract()
+
+        x_center, y_center, z_center = centroid(self.x, self.y, self.z)
+        center_of_mass = (round(x_center, 5), round(y_center, 5), round(z_center, 5))
+        radius_of_gyration = round(gyration_radius(self.x, self.y, self.z, center_of_mass), 5)
+
+        angles = step_bearings(self.x, self.y, self.is_geographical_coordinates)
+        avg_direction_angle = round(float(angles.mean()), 5) if len(angles) else 0.0
+
+        if avg_direction_angle == 0:
+            angle_variation_coefficient = 0.0
+        else:
+            angle_variation_coefficient = angle_deviation(angles, avg_direction_angle) / avg_direction_angle
+
+        return {
+            'x_center': center_of_mass[0],
+            'y_center': center_of_mass[1],
+            'z_center': center_of_mass[2],
+            'travel_time': travel_time,
+            'travel_distance': travel_distance,
+            'travel_avg_speed': travel_avg_speed,
+            'travel_avg_angle_dirct': avg_direction_angle,
+            'radius_of_gyration': radius_of_gyration,
+            'angle_variation_coefficient': angle_variation_coefficient,
+        }
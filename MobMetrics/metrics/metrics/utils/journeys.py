@@ -1,130 +1,109 @@
+# Related third party imports.
+import numpy as np
+
 # Local application/library specific imports.
-from ...models import VisitModel, JourneyModel
-from ..spatial.journey_distance import JourneyDistance
+from .kernels import trace_arrays, step_distances
 from ..temporal.journey_time import JourneyTime
 from ..kinematic.journey_average_speed import JourneyAverageSpeed
 
 
 class Journey:
-    def __init__(self, trace, entity_id, parameters):
+    def __init__(self, trace, entity_id, parameters, session):
         """
         Initializes the Journey processor.
 
         Args:
-            trace (pd.DataFrame): DataFrame with trace data.
+            trace (pd.DataFrame): DataFrame with the entity trace data, sorted by time,
+                                  including the 'spId' column assigned by StayPoints.
             entity_id (int): Identifier for the entity.
             parameters (list): List of parameters; index 4 should contain file_name.
+            session (ExtractionSession): Session buffering the journeys of the file.
         """
         self.trace = trace
         self.entity_id = entity_id
         self.parameters = parameters
         self.file_name = parameters[4]
+        self.is_geographical_coordinates = parameters[6]
+        self.session = session
 
-    def process_journey(self):
+    def process_journey(self, visits):
         """
-        Processes journeys between visits and calculates summary statistics.
+        Processes journeys between the entity's visits and calculates summary statistics.
+
+        A journey is the stretch of trace before the first visit, between two consecutive
+        visits, or after the last visit. Its bounds are located with a binary search on the
+        sorted time array and its distance is read from the cumulative step distances, so
+        the whole entity is processed in O(n + v).
+
+        Args:
+            visits (list): The entity's visits in chronological order, as returned by
+                           StayPoints.detect() (only 'arrival_time' and 'leave_time' are used).
 
         Returns:
             tuple: (num_journeys, avg_journey_time, avg_journey_distance, avg_journey_avg_speed)
         """
-        visits = list(
-            VisitModel.objects.filter(file_name=self.file_name).order_by('arv_time')
-        )
-
-        num_journeys = 0
-        total_journey_time = 0
-        total_journey_distance = 0
-        total_journey_avg_speed = 0
-
         if not visits:
             return 0, 0.0, 0.0, 0.0
 
-        # Before first visit
-        first_visit = visits[0]
-        journey_traces = self._get_traces_between(
-            self.trace, self.trace['time'].min(), first_visit.arv_time
+        x, y, z, time = trace_arrays(self.trace, ('x', 'y', 'z', 'time'))
+        self.time = time
+        self.sp_ids = self.trace['spId'].to_numpy()
+        self.cumulative_distance = np.concatenate(
+            ([0.0], np.cumsum(step_distances(x, y, z, self.is_geographical_coordinates)))
         )
 
-        if len(journey_traces) >= 2:
-            num_journeys += 1
-            j_time, j_dist, j_speed = self._create_journey(journey_traces, first_visit.entity_id)
-            total_journey_time += j_time
-            total_journey_distance += j_dist
-            total_journey_avg_speed += j_speed
+        # Before first visit, between visits and after last visit
+        bounds = [time[0]]
+        for visit in visits:
+            bounds.extend((visit['arrival_time'], visit['leave_time']))
+        bounds.append(time[-1])
 
-        # Between visits
-        for i in range(len(visits) - 1):
-            current_visit = visits[i]
-            next_visit = visits[i + 1]
+        starts = np.searchsorted(time, bounds[0::2], side='left')
+        ends = np.searchsorted(time, bounds[1::2], side='right')
 
-            journey_traces = self._get_traces_between(
-                self.trace, current_visit.lev_time, next_visit.arv_time
-            )
+        num_journeys = 0
+        total_journey_time = 0
+        total_journey_distance = 0
+        total_journey_avg_speed = 0
 
-            if len(journey_traces) >= 2:
+        for start_idx, end_idx in zip(starts, ends):
+            if end_idx - start_idx >= 2:
                 num_journeys += 1
-                j_time, j_dist, j_speed = self._create_journey(journey_traces, current_visit.entity_id)
+                j_time, j_dist, j_speed = self._create_journey(start_idx, end_idx)
                 total_journey_time += j_time
                 total_journey_distance += j_dist
                 total_journey_avg_speed += j_speed
 
-        # After last visit
-        last_visit = visits[-1]
-        journey_traces = self._get_traces_between(
-            self.trace, last_visit.lev_time, self.trace['time'].max()
-        )
-
-        if len(journey_traces) >= 2:
-            num_journeys += 1
-            j_time, j_dist, j_speed = self._create_journey(journey_traces, last_visit.entity_id)
-            total_journey_time += j_time
-            total_journey_distance += j_dist
-            total_journey_avg_speed += j_speed
-
         if num_journeys == 0:
             return 0, 0.0, 0.0, 0.0
 
-        
         avg_time = total_journey_time / num_journeys
         avg_distance = total_journey_distance / num_journeys
         avg_speed = total_journey_avg_speed / num_journeys
 
         return num_journeys, avg_time, avg_distance, avg_speed
 
-    def _get_traces_between(self, trace_df, start_time, end_time):
+    def _create_journey(self, start_idx, end_idx):
         """
-        Filters trace data between two timestamps.
+        Buffers a journey entry in the session and calculates metrics.
 
         Args:
-            trace_df (pd.DataFrame): The full trace data.
-            start_time: Start timestamp.
-            end_time: End timestamp.
-
-        Returns:
-            pd.DataFrame: Filtered traces.
-        """
-        return trace_df[(trace_df['time'] >= start_time) & (trace_df['time'] <= end_time)]
-
-    def _create_journey(self, traces, entity_id):
-        """
-        Creates a journey entry in the database and calculates metrics.
-
-        Args:
-            traces (pd.DataFrame): Trace segment.
-            entity_id (int): Entity identifier.
+            start_idx (int): Index of the first trace point of the journey.
+            end_idx (int): Exclusive index of the last trace point of the journey.
 
         Returns:
             tuple: (journey_time, journey_distance, journey_speed)
         """
-        journey_distance = JourneyDistance(traces, self.parameters).extract()
-        journey_time = JourneyTime(traces.iloc[-1]['time'], traces.iloc[0]['time']).extract()
+        last_idx = end_idx - 1
+
+        journey_distance = float(self.cumulative_distance[last_idx] - self.cumulative_distance[start_idx])
+        journey_time = JourneyTime(float(self.time[last_idx]), float(self.time[start_idx])).extract()
         journey_speed = JourneyAverageSpeed(journey_distance, journey_time).extract()
 
-        JourneyModel.objects.create(
-            file_name = self.file_name,
-            entity_id = entity_id,
-            lev_id = traces.iloc[0]['spId'],
-            arv_id = traces.iloc[-1]['spId'],
+        self.session.add_journey(
+            entity_id = self.entity_id,
+            lev_id = self.sp_ids[start_idx],
+            arv_id = self.sp_ids[last_idx],
             journey_distance = journey_distance,
             journey_time = journey_time,
             journey_avg_speed = journey_speed
@@ -0,0 +1,157 @@
+# Related third party imports.
+import numpy as np
+
+EARTH_RADIUS = 6371000  # in meters
+
+
+def trace_arrays(trace, columns=('x', 'y', 'z')):
+    """
+    Extracts the requested columns of a trace as contiguous float64 arrays.
+
+    Args:
+        trace (pd.DataFrame or TraceArrays): Trace data containing the requested columns.
+        columns (tuple): Names of the columns to extract.
+
+    Returns:
+        tuple: One contiguous np.ndarray (float64) per requested column.
+    """
+    return tuple(
+        np.ascontiguousarray(np.asarray(trace[column], dtype=np.float64))
+        for column in columns
+    )
+
+
+def haversine(lon_a, lat_a, lon_b, lat_b):
+    """
+    Computes the great-circle distance between arrays of geographical points.
+
+    Args:
+        lon_a (np.ndarray): Longitudes of the first points, in degrees.
+        lat_a (np.ndarray): Latitudes of the first points, in degrees.
+        lon_b (np.ndarray): Longitudes of the second points, in degrees.
+        lat_b (np.ndarray): Latitudes of the second points, in degrees.
+
+    Returns:
+        np.ndarray: Horizontal distances in meters.
+    """
+    lat1 = np.radians(lat_a)
+    lon1 = np.radians(lon_a)
+    lat2 = np.radians(lat_b)
+    lon2 = np.radians(lon_b)
+
+    delta_lat = lat2 - lat1
+    delta_lon = lon2 - lon1
+
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS * c
+
+
+def pairwise_distances(x_a, y_a, z_a, x_b, y_b, z_b, is_geo_coords):
+    """
+    Vectorized counterpart of `utils.distance` for arrays of point pairs.
+
+    Args:
+        x_a, y_a, z_a (np.ndarray): Coordinates of the first points.
+        x_b, y_b, z_b (np.ndarray): Coordinates of the second points.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        np.ndarray: The 3D distance between each pair of points.
+    """
+    delta_z = z_b - z_a
+
+    if is_geo_coords:
+        horizontal_distance = haversine(x_a, y_a, x_b, y_b)
+        return np.sqrt(horizontal_distance ** 2 + delta_z ** 2)
+
+    return np.sqrt((x_b - x_a) ** 2 + (y_b - y_a) ** 2 + delta_z ** 2)
+
+
+def step_distances(x, y, z, is_geo_coords):
+    """
+    Computes the distance between every pair of consecutive points.
+
+    Args:
+        x, y, z (np.ndarray): Coordinates of the trace, in chronological order.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        np.ndarray: Array of length len(x) - 1 with the step distances.
+    """
+    return pairwise_distances(x[:-1], y[:-1], z[:-1], x[1:], y[1:], z[1:], is_geo_coords)
+
+
+def step_bearings(x, y, is_geo_coords):
+    """
+    Vectorized counterpart of `utils.direction_angle` for consecutive points.
+
+    Args:
+        x, y (np.ndarray): Horizontal coordinates of the trace, in chronological order.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        np.ndarray: Array of length len(x) - 1 with angles in degrees, in [0, 360).
+    """
+    if is_geo_coords:
+        lat = np.radians(y)
+        lon = np.radians(x)
+
+        lat1, lat2 = lat[:-1], lat[1:]
+        delta_lon = lon[1:] - lon[:-1]
+
+        east = np.sin(delta_lon) * np.cos(lat2)
+        north = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(delta_lon)
+
+        angle_rad = np.arctan2(east, north)
+    else:
+        angle_rad = np.arctan2(np.diff(y), np.diff(x))
+
+    return (np.degrees(angle_rad) + 360) % 360
+
+
+def centroid(x, y, z):
+    """
+    Computes the center of mass of a set of points.
+
+    Args:
+        x, y, z (np.ndarray): Coordinates of the points.
+
+    Returns:
+        tuple: (x_center, y_center, z_center) as floats.
+    """
+    return float(np.mean(x)), float(np.mean(y)), float(np.mean(z))
+
+
+def gyration_radius(x, y, z, center):
+    """
+    Computes the radius of gyration of a set of points around a center.
+
+    Args:
+        x, y, z (np.ndarray): Coordinates of the points.
+        center (tuple): The (x, y, z) reference center.
+
+    Returns:
+        float: Root mean squared distance of the points to the center.
+    """
+    squared = (x - center[0]) ** 2 + (y - center[1]) ** 2 + (z - center[2]) ** 2
+
+    return float(np.sqrt(np.mean(squared)))
+
+
+def angle_deviation(angles, avg_angle):
+    """
+    Computes the standard deviation of angles around a given average angle.
+
+    Args:
+        angles (np.ndarray): Direction angles in degrees.
+        avg_angle (float): The reference average angle.
+
+    Returns:
+        float: Population standard deviation, or 0.0 when there are no angles.
+    """
+    if len(angles) == 0:
+        return 0.0
+
+    return float(np.sqrt(np.mean((angles - avg_angle) ** 2)))
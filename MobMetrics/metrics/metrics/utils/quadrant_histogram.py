@@ -0,0 +1,94 @@
+# Related third party imports.
+import numpy as np
+
+
+def quadrant_indices(values, quadrant_size):
+    """
+    Computes the quadrant index of every value along one axis.
+
+    The axis extent is split into `quadrant_size` parts; the maximum value falls in the
+    index `quadrant_size`, as it always has. When every value is the same there is a
+    single quadrant, index 0.
+
+    Args:
+        values (np.ndarray): Coordinates along the axis.
+        quadrant_size (int): Number of divisions of the axis.
+
+    Returns:
+        np.ndarray: Integer quadrant index of each value.
+    """
+    min_value = values.min()
+    delta = (values.max() - min_value) / quadrant_size
+
+    if delta == 0:
+        return np.zeros(len(values), dtype=np.int64)
+
+    return ((values - min_value) / delta).astype(np.int64)
+
+
+def quadrant_histogram(ids, x, y, quadrant_size):
+    """
+    Counts the points of every entity and of the whole trace in each quadrant.
+
+    Cell indices are computed for the whole trace at once and combined with the entity
+    into a single integer key, so one `np.unique` gives the per-entity counts and a
+    bincount over them gives the global counts. Cells are listed in order of first
+    appearance in the trace, per entity sorted by entity id.
+
+    Args:
+        ids (np.ndarray): Entity id of each point.
+        x, y (np.ndarray): Coordinates of each point.
+        quadrant_size (int): Number of divisions along each axis.
+
+    Returns:
+        tuple: (global_cells, entity_cells) where global_cells is a (qx, qy, counts) tuple
+               of arrays and entity_cells is an (entity_ids, qx, qy, counts) tuple of arrays.
+    """
+    qx = quadrant_indices(x, quadrant_size)
+    qy = quadrant_indices(y, quadrant_size)
+
+    entities, entity_codes = np.unique(ids, return_inverse=True)
+    num_y = int(qy.max()) + 1
+    num_cells = (int(qx.max()) + 1) * num_y
+
+    cells = qx * num_y + qy
+    keys, first_index, counts = np.unique(
+        entity_codes.astype(np.int64) * num_cells + cells,
+        return_index=True,
+        return_counts=True
+    )
+    key_entities, key_cells = np.divmod(keys, num_cells)
+
+    # Per entity, keep the order in which its cells first appear
+    order = np.lexsort((first_index, key_entities))
+    key_entities, key_cells, first_index, counts = (
+        key_entities[order], key_cells[order], first_index[order], counts[order]
+    )
+
+    global_counts = np.bincount(key_cells, weights=counts, minlength=num_cells).astype(np.int64)
+    global_first = np.full(num_cells, len(ids), dtype=np.int64)
+    np.minimum.at(global_first, key_cells, first_index)
+
+    occupied = np.flatnonzero(global_counts)
+    occupied = occupied[np.argsort(global_first[occupied], kind='stable')]
+
+    global_cells = (occupied // num_y, occupied % num_y, global_counts[occupied])
+    entity_cells = (entities[key_entities], key_cells // num_y, key_cells % num_y, counts)
+
+    return global_cells, entity_cells
+
+
+def cell_entropy(counts, totals):
+    """
+    Computes the entropy contribution -p * log2(p) of each cell.
+
+    Args:
+        counts (np.ndarray): Visits of each cell.
+        totals (np.ndarray): Total visits of the group each cell belongs to.
+
+    Returns:
+        np.ndarray: The entropy term of each cell.
+    """
+    probability = counts / totals
+
+    return -probability * np.log2(probability)
@@ -0,0 +1,129 @@
+# Related third party imports.
+from django.db import transaction
+from django.db.models import Max
+
+# Local application/library specific imports.
+from ...models import StayPointModel, VisitModel, JourneyModel, MetricsModel
+from .stay_point_index import StayPointIndex, MATCH_FIRST
+
+
+class ExtractionSession:
+    """
+    In-memory buffer for the rows produced while extracting a trace file.
+
+    Stay points, visits, journeys and per-entity metrics are accumulated here for the
+    whole upload, stay point IDs are assigned locally, and everything is written with
+    bulk operations inside a single transaction when `flush` is called.
+
+    Attributes:
+        file_name (str): Name of the file being extracted.
+        stay_point_index (StayPointIndex): Index of every stay point of the file.
+        stay_points (list): Stay points created during this session, in creation order.
+        visits (list): Buffered VisitModel instances, in creation order.
+        journeys (list): Buffered JourneyModel instances.
+        metrics (dict): Buffered MetricsModel instances keyed by entity ID.
+        batch_size (int): Number of rows per bulk query.
+    """
+
+    def __init__(self, parameters, strategy=MATCH_FIRST, batch_size=1000):
+        """
+        Initialize the ExtractionSession, loading the stay points already stored for the file.
+
+        Args:
+            parameters (list): A list of parameters where:
+                parameters[0] - distance threshold for matching stay points
+                parameters[4] - file name (str)
+                parameters[6] - boolean indicating if coordinates are geographical
+            strategy (str): Stay point matching strategy, either 'first' or 'nearest'.
+            batch_size (int): Number of rows per bulk query.
+        """
+        self.file_name = parameters[4]
+        self.batch_size = batch_size
+
+        existing = StayPointModel.objects.filter(file_name=self.file_name).order_by('id')
+        self.stay_point_index = StayPointIndex.from_stay_points(existing, parameters[0], parameters[6], strategy)
+
+        last_id = existing.aggregate(last_id=Max('stay_point_id'))['last_id']
+        self._next_stay_point_id = (last_id or 0) + 1
+
+        self.stay_points = []
+        self.visits = []
+        self.journeys = []
+        self.metrics = {}
+        self._updated_stay_points = {}
+
+    def new_stay_point(self, x_center, y_center, z_center, duration):
+        """
+        Creates a stay point with the next local ID and registers it in the index.
+
+        Returns:
+            StayPointModel: The unsaved stay point.
+        """
+        stay_point = StayPointModel(
+            file_name = self.file_name,
+            stay_point_id = self._next_stay_point_id,
+            x_center = x_center,
+            y_center = y_center,
+            z_center = z_center,
+            num_visits = 1,
+            total_visits_time = duration,
+        )
+        self._next_stay_point_id += 1
+
+        self.stay_points.append(stay_point)
+        self.stay_point_index.add(stay_point)
+
+        return stay_point
+
+    def visit_stay_point(self, stay_point, duration):
+        """
+        Accounts one more visit of the given duration to an existing stay point.
+        """
+        stay_point.num_visits += 1
+        stay_point.total_visits_time += duration
+
+        # Stay points created in this session are written with their final values on flush
+        if not stay_point._state.adding:
+            self._updated_stay_points[stay_point.pk] = stay_point
+
+    def add_visit(self, **fields):
+        """Buffers a VisitModel row."""
+        visit = VisitModel(file_name=self.file_name, **fields)
+        self.visits.append(visit)
+
+        return visit
+
+    def add_journey(self, **fields):
+        """Buffers a JourneyModel row."""
+        journey = JourneyModel(file_name=self.file_name, **fields)
+        self.journeys.append(journey)
+
+        return journey
+
+    def add_metrics(self, entity_id, **fields):
+        """Buffers the MetricsModel row of an entity."""
+        metric = MetricsModel(file_name=self.file_name, entity_id=entity_id, **fields)
+        self.metrics[entity_id] = metric
+
+        return metric
+
+    def flush(self):
+        """
+        Writes every buffered row to the database in one transaction and empties the buffers.
+        """
+        with transaction.atomic():
+            StayPointModel.objects.bulk_create(self.stay_points, batch_size=self.batch_size)
+            StayPointModel.objects.bulk_update(
+                list(self._updated_stay_points.values()),
+                ['num_visits', 'total_visits_time'],
+                batch_size=self.batch_size
+            )
+            VisitModel.objects.bulk_create(self.visits, batch_size=self.batch_size)
+            JourneyModel.objects.bulk_create(self.journeys, batch_size=self.batch_size)
+            MetricsModel.objects.bulk_create(list(self.metrics.values()), batch_size=self.batch_size)
+
+        self.stay_points = []
+        self.visits = []
+        self.journeys = []
+        self.metrics = {}
+        self._updated_stay_points = {}
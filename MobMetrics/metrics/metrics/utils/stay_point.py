@@ -1,15 +1,23 @@
+# Related third party imports.
+import numpy as np
+
 # Local application/library specific imports.
 from .visits import Visit
 from .journeys import Journey
-from ...models import StayPointModel
-from .utils import distance
+from .session import ExtractionSession
+from .kernels import trace_arrays
+from .stay_point_detection import detect_visits
 
 
 class StayPoints:
-    def __init__(self, trace, entity_id, parameters):
+    def __init__(self, trace, entity_id, parameters, session=None):
         """
         Class that detects Stay Points from a mobility trace and configuration parameters.
         Also invokes the Visit and Journey processing modules.
+
+        An ExtractionSession shared across the entities of a file can be passed so stay
+        points, visits and journeys are buffered and written in bulk by its owner. Without
+        one, `register` uses a private session and flushes it before returning.
         """
         # Defensive copy to avoid SettingWithCopyWarning
         self.trace = trace.copy()
@@ -20,9 +28,7 @@ class StayPoints:
         self.time_threshold = parameters[1]
         self.file_name = parameters[4]
         self.is_geographical_coordinates = parameters[6]
-
-        self.visit_processor = Visit(self.trace, self.entity_id, self.parameters)
-        self.journey_processor = Journey(self.trace, self.entity_id, self.parameters)
+        self.session = session
 
     def extract(self):
         """
@@ -36,63 +42,56 @@ class StayPoints:
             avg_journey_distance (float): average journey distance
             avg_journey_avg_speed (float): average journey speed
         """
-        # Safe assignment without chained warning
-        self.trace.loc[:, 'spId'] = 0
+        return self.register(self.detect())
+
+    def detect(self):
+        """
+        Detects the candidate visits of the trace without touching the database.
 
-        last_sp = StayPointModel.objects.filter(file_name=self.file_name).order_by('stay_point_id').last()
-        stay_point_id = last_sp.stay_point_id + 1 if last_sp else 1
+        Returns:
+            list: One dict per detected visit with the keys 'start_idx', 'end_idx',
+                  'x_avg', 'y_avg', 'z_avg', 'arrival_time', 'leave_time' and 'duration'.
+        """
+        x, y, z, time = trace_arrays(self.trace, ('x', 'y', 'z', 'time'))
+
+        return detect_visits(
+            x, y, z, time,
+            self.distance_threshold, self.time_threshold,
+            self.is_geographical_coordinates
+        )
+
+    def register(self, visits):
+        """
+        Registers detected visits as stay points and computes journey metrics.
 
-        start_idx = 0
+        Args:
+            visits (list): Candidate visits, as returned by `detect`.
+
+        Returns:
+            tuple: Same values as `extract`.
+        """
+        session = self.session or ExtractionSession(self.parameters)
+        visit_processor = Visit(self.trace, self.entity_id, self.parameters, session)
+        journey_processor = Journey(self.trace, self.entity_id, self.parameters, session)
+
+        sp_ids = np.zeros(len(self.trace), dtype=np.int64)
         visit_count = 0
         time_visit_count = 0
 
-        while start_idx < len(self.trace):
-            result = self._detect_stay_point(start_idx, stay_point_id)
-            if result:
-                end_idx, updated_sp_id, duration, created_new = result
-                self.trace.iloc[start_idx:end_idx, self.trace.columns.get_loc('spId')] = updated_sp_id
-                if created_new:
-                    stay_point_id += 1
-                visit_count += 1
-                time_visit_count += duration
-                start_idx = end_idx
-            else:
-                start_idx += 1
-
-        num_journeys, avg_journey_time, avg_journey_distance, avg_journey_avg_speed = self.journey_processor.process_journey()
+        for visit in visits:
+            stay_point_id, _ = visit_processor.process_visit(
+                visit['x_avg'], visit['y_avg'], visit['z_avg'],
+                visit['arrival_time'], visit['leave_time'], visit['duration']
+            )
+            sp_ids[visit['start_idx']:visit['end_idx']] = stay_point_id
+            visit_count += 1
+            time_visit_count += visit['duration']
 
-        return visit_count, time_visit_count, num_journeys, avg_journey_time, avg_journey_distance, avg_journey_avg_speed
+        self.trace['spId'] = sp_ids
 
-    def _detect_stay_point(self, start_idx, stay_point_id):
-        arrival_time = self.trace.iloc[start_idx]['time']
-        x_total = self.trace.iloc[start_idx]['x']
-        y_total = self.trace.iloc[start_idx]['y']
-        z_total = self.trace.iloc[start_idx]['z']
-        point_count = 1
-
-        end_idx = start_idx + 1
-        while (
-            end_idx < len(self.trace) and
-            distance(self.trace.iloc[start_idx], self.trace.iloc[end_idx], self.is_geographical_coordinates) <= self.distance_threshold
-        ):
-            x_total += self.trace.iloc[end_idx]['x']
-            y_total += self.trace.iloc[end_idx]['y']
-            z_total += self.trace.iloc[end_idx]['z']
-            point_count += 1
-            end_idx += 1
-
-        leave_time = self.trace.iloc[end_idx - 1]['time']
-        duration = leave_time - arrival_time
-
-        if duration >= self.time_threshold:
-            x_avg = round(x_total / point_count, 5)
-            y_avg = round(y_total / point_count, 5)
-            z_avg = round(z_total / point_count, 5)
-
-            return self.visit_processor.process_visit(
-                x_avg, y_avg, z_avg,
-                arrival_time, leave_time,
-                duration, stay_point_id, end_idx
-            )
+        num_journeys, avg_journey_time, avg_journey_distance, avg_journey_avg_speed = journey_processor.process_journey(visits)
 
-        return None
+        if self.session is None:
+            session.flush()
+
+        return visit_count, time_visit_count, num_journeys, avg_journey_time, avg_journey_distance, avg_journey_avg_speed
@@ -0,0 +1,106 @@
+# Related third party imports.
+import numpy as np
+
+# Local application/library specific imports.
+from .kernels import pairwise_distances, step_distances
+
+INITIAL_BLOCK_SIZE = 32
+
+
+def detect_visits(x, y, z, time, distance_threshold, time_threshold, is_geo_coords):
+    """
+    Detects stay point visits over the raw arrays of a single entity.
+
+    A visit starts at an anchor point and extends over the following points while they
+    stay within `distance_threshold` of the anchor; it is kept if it lasts at least
+    `time_threshold`, and detection resumes after it. Otherwise detection resumes at the
+    next anchor. Distances from the anchor are computed in growing vectorized blocks, and
+    anchors whose very next point is already out of range are skipped in bulk, since they
+    can only produce zero-length visits.
+
+    Args:
+        x, y, z (np.ndarray): Coordinates of the entity, in chronological order.
+        time (np.ndarray): Timestamps of the entity, in chronological order.
+        distance_threshold (float): Maximum distance from the anchor within a visit.
+        time_threshold (float): Minimum duration of a visit.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        list: One dict per visit with the keys 'start_idx', 'end_idx', 'x_avg', 'y_avg',
+              'z_avg', 'arrival_time', 'leave_time' and 'duration'.
+    """
+    n = len(x)
+    visits = []
+
+    if n == 0:
+        return visits
+
+    # Anchors that can start a visit: the next point is within range, or it is the last point
+    if time_threshold > 0:
+        steps = step_distances(x, y, z, is_geo_coords)
+        candidates = np.append(np.flatnonzero(steps <= distance_threshold), n - 1)
+    else:
+        candidates = np.arange(n)
+
+    start_idx = 0
+
+    while start_idx < n:
+        start_idx = int(candidates[np.searchsorted(candidates, start_idx)])
+        end_idx = _visit_end(x, y, z, start_idx, distance_threshold, is_geo_coords)
+
+        arrival_time = float(time[start_idx])
+        leave_time = float(time[end_idx - 1])
+        duration = leave_time - arrival_time
+
+        if duration >= time_threshold:
+            visits.append({
+                'start_idx': start_idx,
+                'end_idx': end_idx,
+                'x_avg': round(float(x[start_idx:end_idx].mean()), 5),
+                'y_avg': round(float(y[start_idx:end_idx].mean()), 5),
+                'z_avg': round(float(z[start_idx:end_idx].mean()), 5),
+                'arrival_time': arrival_time,
+                'leave_time': leave_time,
+                'duration': duration,
+            })
+            start_idx = end_idx
+        else:
+            start_idx += 1
+
+    return visits
+
+
+def _visit_end(x, y, z, start_idx, distance_threshold, is_geo_coords):
+    """
+    Finds the first point after `start_idx` that is out of range of the anchor.
+
+    Args:
+        x, y, z (np.ndarray): Coordinates of the entity.
+        start_idx (int): Index of the anchor point.
+        distance_threshold (float): Maximum distance from the anchor.
+        is_geo_coords (bool): Whether x/y are longitude/latitude.
+
+    Returns:
+        int: Exclusive end index of the points within range of the anchor.
+    """
+    n = len(x)
+    block_start = start_idx + 1
+    block_size = INITIAL_BLOCK_SIZE
+
+    while block_start < n:
+        block_end = min(block_start + block_size, n)
+
+        dist = pairwise_distances(
+            x[start_idx], y[start_idx], z[start_idx],
+            x[block_start:block_end], y[block_start:block_end], z[block_start:block_end],
+            is_geo_coords
+        )
+        out_of_range = np.flatnonzero(~(dist <= distance_threshold))
+
+        if len(out_of_range):
+            return block_start + int(out_of_range[0])
+
+        block_start = block_end
+        block_size *= 2
+
+    return n
@@ -0,0 +1,137 @@
+# Standard library imports.
+from collections import defaultdict
+from itertools import product
+from math import radians, sin, cos, floor
+
+# Local application/library specific imports.
+from .utils import distance
+from .kernels import EARTH_RADIUS
+
+MATCH_FIRST = 'first'
+MATCH_NEAREST = 'nearest'
+
+
+class StayPointIndex:
+    """
+    In-memory grid index of the stay point centers of a single file.
+
+    Centers are hashed into cubic cells whose side equals the distance threshold, so
+    every stay point within the threshold of a query lies in one of the 27 cells around
+    it. Geographical centers are hashed on their Earth-centered cartesian position; the
+    chord between two surface points never exceeds their haversine distance, so the
+    neighbourhood still contains every candidate. Candidates are then checked with the
+    exact `distance` function.
+
+    Attributes:
+        distance_threshold (float): Maximum distance for a visit to match a stay point.
+        is_geographical_coordinates (bool): Whether x/y are longitude/latitude.
+        strategy (str): 'first' returns the earliest registered stay point within the
+                        threshold (the historical behaviour); 'nearest' returns the closest.
+    """
+
+    def __init__(self, distance_threshold, is_geographical_coordinates, strategy=MATCH_FIRST):
+        """
+        Initialize an empty StayPointIndex.
+
+        Args:
+            distance_threshold (float): Maximum matching distance.
+            is_geographical_coordinates (bool): Whether x/y are longitude/latitude.
+            strategy (str): Matching strategy, either 'first' or 'nearest'.
+        """
+        if strategy not in (MATCH_FIRST, MATCH_NEAREST):
+            raise ValueError(f"Unknown stay point matching strategy: {strategy}")
+
+        self.distance_threshold = distance_threshold
+        self.is_geographical_coordinates = is_geographical_coordinates
+        self.strategy = strategy
+
+        self._cell_size = distance_threshold if distance_threshold > 0 else 1.0
+        self._cells = defaultdict(list)
+        self._count = 0
+
+    @classmethod
+    def from_stay_points(cls, stay_points, distance_threshold, is_geographical_coordinates,
+                         strategy=MATCH_FIRST):
+        """
+        Builds an index from existing stay points, in registration order.
+
+        Args:
+            stay_points (iterable): StayPointModel instances.
+            distance_threshold (float): Maximum matching distance.
+            is_geographical_coordinates (bool): Whether x/y are longitude/latitude.
+            strategy (str): Matching strategy, either 'first' or 'nearest'.
+
+        Returns:
+            StayPointIndex: The populated index.
+        """
+        index = cls(distance_threshold, is_geographical_coordinates, strategy)
+
+        for stay_point in stay_points:
+            index.add(stay_point)
+
+        return index
+
+    def __len__(self):
+        return self._count
+
+    def add(self, stay_point):
+        """
+        Registers a stay point in the index.
+
+        Args:
+            stay_point: Object with 'x_center', 'y_center' and 'z_center' attributes.
+        """
+        cell = self._cell(stay_point.x_center, stay_point.y_center, stay_point.z_center)
+        self._cells[cell].append((self._count, stay_point))
+        self._count += 1
+
+    def match(self, x, y, z):
+        """
+        Finds the stay point that a visit centered at (x, y, z) belongs to.
+
+        Args:
+            x, y, z (float): Center of the visit.
+
+        Returns:
+            The matched stay point, or None if no stay point is within the threshold.
+        """
+        cx, cy, cz = self._cell(x, y, z)
+        point = {'x': x, 'y': y, 'z': z}
+        best = None
+
+        for dx, dy, dz in product((-1, 0, 1), repeat=3):
+            for order, stay_point in self._cells.get((cx + dx, cy + dy, cz + dz), ()):
+                dist = distance(
+                    {'x': stay_point.x_center, 'y': stay_point.y_center, 'z': stay_point.z_center},
+                    point,
+                    self.is_geographical_coordinates
+                )
+
+                if dist > self.distance_threshold:
+                    continue
+
+                key = (order,) if self.strategy == MATCH_FIRST else (dist, order)
+                if best is None or key < best[0]:
+                    best = (key, stay_point)
+
+        return best[1] if best else None
+
+    def _cell(self, x, y, z):
+        """
+        Computes the grid cell of a point.
+
+        Args:
+            x, y, z (float): Coordinates of the point.
+
+        Returns:
+            tuple: Integer (i, j, k) cell coordinates.
+        """
+        if self.is_geographical_coordinates:
+            lat, lon = radians(y), radians(x)
+            x = EARTH_RADIUS * cos(lat) * cos(lon)
+            y = EARTH_RADIUS * cos(lat) * sin(lon)
+            z = EARTH_RADIUS * sin(lat)
+
+        size = self._cell_size
+
+        return floor(x / size), floor(y / size), floor(z / size)
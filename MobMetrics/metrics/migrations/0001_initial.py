@@ -0,0 +1,161 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('label', models.TextField()),
+                ('is_geographical_coordinates', models.BooleanField()),
+                ('distance_threshold', models.FloatField()),
+                ('time_threshold', models.FloatField()),
+                ('radius_threshold', models.FloatField()),
+                ('quadrant_parts', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContactModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('id1', models.IntegerField()),
+                ('id2', models.IntegerField()),
+                ('initial_timestamp', models.FloatField()),
+                ('final_timestamp', models.FloatField()),
+                ('contact_time', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GlobalMetricsModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('label', models.TextField()),
+                ('avg_x_center', models.FloatField()),
+                ('avg_y_center', models.FloatField()),
+                ('avg_z_center', models.FloatField()),
+                ('avg_travel_time', models.FloatField()),
+                ('avg_travel_distance', models.FloatField()),
+                ('avg_travel_avg_speed', models.FloatField()),
+                ('avg_radius_of_gyration', models.FloatField()),
+                ('num_stay_points', models.IntegerField()),
+                ('avg_num_stay_points_visits', models.FloatField()),
+                ('stay_points_visits', models.IntegerField()),
+                ('avg_stay_point_entropy', models.FloatField()),
+                ('avg_quadrant_entropy', models.FloatField()),
+                ('num_contacts', models.IntegerField()),
+                ('total_num_journeys', models.IntegerField()),
+                ('total_avg_journey_time', models.FloatField()),
+                ('total_avg_journey_distance', models.FloatField()),
+                ('total_avg_journey_avg_speed', models.FloatField()),
+                ('trajectory_correlation', models.FloatField(blank=True, null=True)),
+                ('total_spatial_cover', models.IntegerField(blank=True, null=True)),
+                ('mobility_profile', models.FloatField(blank=True, null=True)),
+                ('speed_variation_coefficient', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JourneyModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('entity_id', models.IntegerField()),
+                ('lev_id', models.IntegerField()),
+                ('arv_id', models.IntegerField()),
+                ('journey_time', models.FloatField()),
+                ('journey_distance', models.FloatField()),
+                ('journey_avg_speed', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MetricsModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('label', models.TextField()),
+                ('entity_id', models.IntegerField()),
+                ('x_center', models.FloatField()),
+                ('y_center', models.FloatField()),
+                ('z_center', models.FloatField()),
+                ('travel_time', models.FloatField()),
+                ('travel_distance', models.FloatField()),
+                ('travel_avg_speed', models.FloatField()),
+                ('travel_avg_angle_dirct', models.FloatField()),
+                ('radius_of_gyration', models.FloatField()),
+                ('spatial_cover', models.IntegerField(blank=True, null=True)),
+                ('total_contact_time', models.FloatField(default=0)),
+                ('num_contacts', models.FloatField(default=0)),
+                ('avg_contact_time', models.FloatField(default=0)),
+                ('angle_variation_coefficient', models.FloatField()),
+                ('stay_points_visits', models.IntegerField(blank=True, null=True)),
+                ('avg_time_visit', models.FloatField(blank=True, null=True)),
+                ('visit_time_variation_coefficient', models.FloatField(blank=True, null=True)),
+                ('num_journeys', models.IntegerField(blank=True, null=True)),
+                ('avg_journey_time', models.FloatField(blank=True, null=True)),
+                ('avg_journey_distance', models.FloatField(blank=True, null=True)),
+                ('avg_journey_avg_speed', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuadrantEntropyModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('entity_id', models.IntegerField(blank=True, null=True)),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('visit_count', models.IntegerField()),
+                ('entropy', models.FloatField()),
+                ('spatial_cover', models.IntegerField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StayPointModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('stay_point_id', models.IntegerField()),
+                ('x_center', models.FloatField()),
+                ('y_center', models.FloatField()),
+                ('z_center', models.FloatField()),
+                ('num_visits', models.IntegerField()),
+                ('total_visits_time', models.FloatField(blank=True, null=True)),
+                ('entropy', models.FloatField(blank=True, null=True)),
+                ('importance_degree', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TraceModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('entity_id', models.IntegerField()),
+                ('x', models.FloatField()),
+                ('y', models.FloatField()),
+                ('timestamp', models.IntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VisitModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('entity_id', models.IntegerField()),
+                ('stay_point_id', models.IntegerField()),
+                ('arv_time', models.FloatField()),
+                ('lev_time', models.FloatField()),
+                ('visit_time', models.FloatField()),
+            ],
+        ),
+    ]
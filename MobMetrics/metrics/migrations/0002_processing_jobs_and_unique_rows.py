@@ -0,0 +1,123 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:24
+
+from django.db import migrations, models
+from django.db.models import Min
+
+# Rows that the unique constraints below allow once per key. Processing the same file twice
+# could store a second copy of them, so only the first copy of each key is kept.
+UNIQUE_ROWS = (
+    ('ConfigModel', ('file_name',)),
+    ('GlobalMetricsModel', ('file_name',)),
+    ('MetricsModel', ('file_name', 'entity_id')),
+    ('StayPointModel', ('file_name', 'stay_point_id')),
+)
+
+
+def remove_duplicate_rows(apps, schema_editor):
+    for model_name, fields in UNIQUE_ROWS:
+        model = apps.get_model('metrics', model_name)
+        first_rows = model.objects.values(*fields).annotate(first=Min('pk')).values('first')
+
+        model.objects.exclude(pk__in=first_rows).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionProfileModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField(unique=True)),
+                ('stages', models.JSONField()),
+                ('total_wall_time', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProcessingJobModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.TextField()),
+                ('trace_path', models.TextField()),
+                ('parameters', models.JSONField()),
+                ('state', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('stage', models.TextField(blank=True, default='')),
+                ('progress', models.IntegerField(default=0)),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='globalmetricsmodel',
+            name='trajectory_similarity_median',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='globalmetricsmodel',
+            name='trajectory_similarity_q1',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='globalmetricsmodel',
+            name='trajectory_similarity_q3',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='contactmodel',
+            index=models.Index(fields=['file_name', 'id1', 'id2'], name='contact_file_pair_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='journeymodel',
+            index=models.Index(fields=['file_name', 'entity_id'], name='journey_file_entity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quadrantentropymodel',
+            index=models.Index(fields=['file_name', 'entity_id'], name='quadrant_file_entity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tracemodel',
+            index=models.Index(fields=['file_name', 'entity_id', 'timestamp'], name='trace_file_entity_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visitmodel',
+            index=models.Index(fields=['file_name', 'entity_id'], name='visit_file_entity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visitmodel',
+            index=models.Index(fields=['file_name', 'stay_point_id'], name='visit_file_stay_point_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='configmodel',
+            constraint=models.UniqueConstraint(fields=('file_name',), name='unique_config_file_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='globalmetricsmodel',
+            constraint=models.UniqueConstraint(fields=('file_name',), name='unique_global_metrics_file_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='metricsmodel',
+            constraint=models.UniqueConstraint(fields=('file_name', 'entity_id'), name='unique_metrics_file_entity'),
+        ),
+        migrations.AddConstraint(
+            model_name='staypointmodel',
+            constraint=models.UniqueConstraint(fields=('file_name', 'stay_point_id'), name='unique_stay_point_file_id'),
+        ),
+        migrations.AddIndex(
+            model_name='processingjobmodel',
+            index=models.Index(fields=['state', 'id'], name='job_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingjobmodel',
+            index=models.Index(fields=['file_name', 'state'], name='job_file_state_idx'),
+        ),
+    ]
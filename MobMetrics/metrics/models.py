@@ -19,6 +19,11 @@ class ConfigModel(models.Model):
     # Quadrant Entropy
     quadrant_parts = models.FloatField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file_name'], name='unique_config_file_name'),
+        ]
+
 
 class MetricsModel(models.Model):
     """Model responsible for saving all metrics data for each entity."""
@@ -60,6 +65,11 @@ class MetricsModel(models.Model):
     avg_journey_distance = models.FloatField(null=True, blank=True)
     avg_journey_avg_speed = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file_name', 'entity_id'], name='unique_metrics_file_entity'),
+        ]
+
 class GlobalMetricsModel(models.Model):
     """Model responsible for saving all global metrics data from the trace."""
 
@@ -98,12 +108,20 @@ class GlobalMetricsModel(models.Model):
 
     # Other Spatial Metrics
     trajectory_correlation = models.FloatField(null=True, blank=True)
+    trajectory_similarity_q1 = models.FloatField(null=True, blank=True)
+    trajectory_similarity_median = models.FloatField(null=True, blank=True)
+    trajectory_similarity_q3 = models.FloatField(null=True, blank=True)
     total_spatial_cover = models.IntegerField(null=True, blank=True)
     mobility_profile = models.FloatField(null=True, blank=True)
 
     # Other Temporal Metrics
     speed_variation_coefficient = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file_name'], name='unique_global_metrics_file_name'),
+        ]
+
 
 class StayPointModel(models.Model):
     """Model responsible for saving all Stay Points."""
@@ -123,6 +141,11 @@ class StayPointModel(models.Model):
     entropy = models.FloatField(null=True, blank=True)
     importance_degree = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['file_name', 'stay_point_id'], name='unique_stay_point_file_id'),
+        ]
+
 
 class JourneyModel(models.Model):
     """Model responsible for saving all Journeys (travels between stay points)."""
@@ -142,6 +165,11 @@ class JourneyModel(models.Model):
     journey_distance = models.FloatField()
     journey_avg_speed = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['file_name', 'entity_id'], name='journey_file_entity_idx'),
+        ]
+
 
 class VisitModel(models.Model):
     """Model responsible for saving all Stay Point visits."""
@@ -160,6 +188,12 @@ class VisitModel(models.Model):
     # Metrics
     visit_time = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['file_name', 'entity_id'], name='visit_file_entity_idx'),
+            models.Index(fields=['file_name', 'stay_point_id'], name='visit_file_stay_point_idx'),
+        ]
+
 
 class ContactModel(models.Model):
     """Model responsible for saving all detected contacts."""
@@ -176,6 +210,11 @@ class ContactModel(models.Model):
 
     contact_time = models.FloatField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['file_name', 'id1', 'id2'], name='contact_file_pair_idx'),
+        ]
+
 
 class QuadrantEntropyModel(models.Model):
     """Model responsible for saving all quadrant entropy data."""
@@ -195,6 +234,11 @@ class QuadrantEntropyModel(models.Model):
     entropy = models.FloatField()
     spatial_cover = models.IntegerField(null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['file_name', 'entity_id'], name='quadrant_file_entity_idx'),
+        ]
+
 class TraceModel(models.Model):
     """Model responsible for saving all the trace files."""
 
@@ -205,4 +249,60 @@ class TraceModel(models.Model):
     x = models.FloatField()
     y = models.FloatField()
 
-    timestamp = models.IntegerField()
\ No newline at end of file
+    timestamp = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['file_name', 'entity_id', 'timestamp'], name='trace_file_entity_time_idx'),
+        ]
+
+class ProcessingJobModel(models.Model):
+    """Model responsible for tracking the background processing of an uploaded trace."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # File
+    file_name = models.TextField()
+    trace_path = models.TextField()
+    parameters = models.JSONField()
+
+    # State
+    state = models.CharField(max_length=16, choices=STATE_CHOICES, default=QUEUED)
+    stage = models.TextField(blank=True, default='')
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'id'], name='job_state_idx'),
+            models.Index(fields=['file_name', 'state'], name='job_file_state_idx'),
+        ]
+
+class ExtractionProfileModel(models.Model):
+    """Model responsible for saving the per-stage resource usage of a file's extraction."""
+
+    # File
+    file_name = models.TextField(unique=True)
+
+    # Profile (one entry per stage with wall/CPU time, peak RSS, rows and query count)
+    stages = models.JSONField()
+    total_wall_time = models.FloatField()
+
+    updated_at = models.DateTimeField(auto_now=True)
@@ -68,11 +68,11 @@ class DBscan(AbsData):
         dbscan = DBSCAN(eps=self.eps, min_samples=self.min_samples)
         cluster_labels = dbscan.fit_predict(scaled_data)
 
-        # Add the cluster labels to the original data
-        self.data['cluster'] = cluster_labels
+        # Add the cluster labels to a copy of the data, which may be shared
+        data = self.data.assign(cluster=cluster_labels)
 
         # Create a DataFrame with the clustered data
-        clusters_df = self.data[['cluster'] + self.columns if self.columns else self.data.columns.tolist()]
+        clusters_df = data[['cluster'] + self.columns if self.columns else data.columns.tolist()]
 
         return {
             'clusters': clusters_df,
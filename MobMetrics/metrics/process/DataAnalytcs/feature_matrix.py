@@ -0,0 +1,127 @@
+# Standard library imports.
+import sys
+
+# Related third party imports.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from sklearn.preprocessing import StandardScaler
+
+# Local application/library specific imports.
+from ...models import ConfigModel
+from ...utils.lru_cache import LRUCache
+
+# Feature matrices and analytics results of this process, keyed by
+# (datasets version, model, columns[, algorithm, parameters])
+analytics_cache = LRUCache(getattr(settings, 'ANALYTICS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+
+def datasets_version():
+    """
+    Returns the version of the set of processed files: the ids of their ConfigModel rows.
+
+    A row is created when a file finishes processing and deleted with the file, so the
+    version changes whenever a file is added, reprocessed or removed.
+
+    Returns:
+        tuple: The sorted ids.
+    """
+    return tuple(ConfigModel.objects.order_by('pk').values_list('pk', flat=True))
+
+
+class FeatureMatrix:
+    """
+    Standardized features of the rows of a metrics model for every processed file.
+
+    It is built once per datasets version and shared by PCA, t-SNE and DBSCAN, which also
+    keep their results in analytics_cache under the key of the matrix.
+
+    Attributes:
+        data (pd.DataFrame): The rows of the model.
+        columns (list): Names of the feature columns.
+        scaled (np.ndarray): The standardized features, read-only.
+        key (tuple): (datasets version, model name, columns) of the matrix.
+    """
+
+    def __init__(self, data, columns, key):
+        """
+        Args:
+            data (pd.DataFrame): The rows of the model.
+            columns (list): Names of the feature columns.
+            key (tuple): (datasets version, model name, columns) of the matrix.
+        """
+        self.data = data
+        self.columns = list(columns)
+        self.key = key
+
+        self.scaled = StandardScaler().fit_transform(data[self.columns])
+        self.scaled.setflags(write=False)
+
+    @classmethod
+    def load(cls, model, columns, version=None):
+        """
+        Returns the cached matrix of a model, loading its rows only if the processed files
+        changed since it was built.
+
+        Args:
+            model (Model): MetricsModel or GlobalMetricsModel.
+            columns (list): Names of the feature columns.
+            version (tuple): Datasets version. Defaults to datasets_version().
+
+        Returns:
+            FeatureMatrix: The matrix of the processed files.
+        """
+        version = datasets_version() if version is None else version
+        key = (version, model.__name__, tuple(columns))
+
+        features = analytics_cache.get(key)
+
+        if features is None:
+            # Entries of older versions can no longer be requested
+            analytics_cache.discard(lambda cached_key: cached_key[0] != version)
+
+            file_names = ConfigModel.objects.filter(pk__in=version).values_list('file_name', flat=True)
+            data = pd.DataFrame.from_records(model.objects.filter(file_name__in=file_names).values())
+
+            features = cls(data, columns, key)
+            analytics_cache.set(key, features, size=features.nbytes())
+
+        return features
+
+    def cached(self, algorithm, parameters, compute):
+        """
+        Returns the result of an algorithm on this matrix, computing it on the first call.
+
+        Args:
+            algorithm (str): Name of the algorithm.
+            parameters (tuple): Every parameter the result depends on.
+            compute (callable): Called without arguments to compute the result. Arrays of the
+                                result are made read-only, as they are shared.
+
+        Returns:
+            Any: The result.
+        """
+        key = self.key + (algorithm, parameters)
+        result = analytics_cache.get(key)
+
+        if result is None:
+            result = compute()
+
+            for value in (result if isinstance(result, tuple) else (result,)):
+                if isinstance(value, np.ndarray):
+                    value.setflags(write=False)
+
+            analytics_cache.set(key, result, size=_size(result))
+
+        return result
+
+    def nbytes(self):
+        """Returns the memory held by the matrix and its rows."""
+        return self.scaled.nbytes + int(self.data.memory_usage(deep=True).sum())
+
+
+def _size(result):
+    """Returns the size of a result: the bytes of its arrays, or sys.getsizeof otherwise."""
+    values = result if isinstance(result, tuple) else (result,)
+
+    return sum(value.nbytes if isinstance(value, np.ndarray) else sys.getsizeof(value) for value in values)
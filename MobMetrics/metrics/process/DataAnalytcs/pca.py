@@ -1,7 +1,6 @@
 # Related third party imports.
 import pandas as pd
 from sklearn.decomposition import PCA as SKPCA
-from sklearn.preprocessing import StandardScaler
 
 # Local application/library specific imports.
 from ...utils.abs_data import AbsData
@@ -13,17 +12,18 @@ class PCA(AbsData):
     on a specified subset of a DataFrame.
     """
 
-    def __init__(self, n_components, data, columns, dbscan_paramters):
+    def __init__(self, n_components, features, dbscan_paramters):
         """
         Initializes the PCA extractor.
 
         Args:
             n_components (int): Number of principal components to retain.
-            data (pd.DataFrame): Input dataset.
-            columns (list): List of column names to apply PCA on.
+            features (FeatureMatrix): Standardized columns to apply PCA on.
+            dbscan_paramters (tuple): (eps, min_samples) of the DBSCAN run on the components.
         """
-        self.data = data
-        self.columns = columns
+        self.features = features
+        self.data = features.data
+        self.columns = features.columns
         self.n_components = n_components
         self.dbscan_paramters = dbscan_paramters
 
@@ -68,20 +68,16 @@ class PCA(AbsData):
 
         Returns:
             dict: Contains the PCA components, explained variance,
-                  fitted model, feature loadings and top contributors.
+                  feature loadings and top contributors.
         """
-        # Select and standardize the data
-        selected_data = self.data[self.columns]
-        scaler = StandardScaler()
-        scaled_data = scaler.fit_transform(selected_data)
-
-        # Fit PCA
-        pca = SKPCA(n_components=self.n_components)
-        principal_components = pca.fit_transform(scaled_data)
+        # Fit PCA on the shared standardized data, once per datasets version and parameters
+        principal_components, explained_variance, pca_components = self.features.cached(
+            'pca', (self.n_components,), self._fit
+        )
 
         # Loadings: contribution of each feature to each PC
         loadings = pd.DataFrame(
-            pca.components_.T,
+            pca_components.T,
             index=self.columns,
             columns=[f'PC{i+1}' for i in range(self.n_components)]
         )
@@ -93,12 +89,23 @@ class PCA(AbsData):
 
         return {
             'components': components_df,
-            'explained_variance': pca.explained_variance_ratio_,
-            'pca_model': pca,
+            'explained_variance': explained_variance,
             'loadings': loadings,
             'top_contributors': top_contributors,
         }
 
+    def _fit(self):
+        """
+        Fits PCA on the standardized data.
+
+        Returns:
+            tuple: (principal components, explained variance ratios, components of the model).
+        """
+        pca = SKPCA(n_components=self.n_components)
+        principal_components = pca.fit_transform(self.features.scaled)
+
+        return principal_components, pca.explained_variance_ratio_, pca.components_
+
     def _label_dataframe(self, result):
         """
         Adds original labels to the PCA components if present.
@@ -137,7 +144,10 @@ class PCA(AbsData):
 
     def _clustering(self, result):
 
-        dbscan_result = DBscan(self.dbscan_paramters, result).extract()
-        result['dbscan_cluster'] = dbscan_result['cluster_labels']
+        cluster_labels = self.features.cached(
+            'pca_dbscan', (self.n_components, *self.dbscan_paramters),
+            lambda: DBscan(self.dbscan_paramters, result).extract()['cluster_labels']
+        )
+        result['dbscan_cluster'] = cluster_labels
 
         return result
\ No newline at end of file
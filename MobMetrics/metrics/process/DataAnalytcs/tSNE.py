@@ -1,7 +1,6 @@
 # Related third party imports.
 import pandas as pd
 from sklearn.manifold import TSNE
-from sklearn.preprocessing import StandardScaler
 
 # Local application/library specific imports.
 from ...utils.abs_data import AbsData
@@ -13,18 +12,19 @@ class tSNE(AbsData):
     on selected columns of a DataFrame.
     """
 
-    def __init__(self, n_components, perplexity, data, columns, dbscan_paramters):
+    def __init__(self, n_components, perplexity, features, dbscan_paramters):
         """
         Initializes the TSNEEmbedding extractor.
 
         Args:
             n_components (int): Number of dimensions to embed into.
             perplexity (float): Perplexity parameter for t-SNE.
-            data (pd.DataFrame): Input dataset.
-            columns (list): List of column names to apply t-SNE on.
+            features (FeatureMatrix): Standardized columns to apply t-SNE on.
+            dbscan_paramters (tuple): (eps, min_samples) of the DBSCAN run on the components.
         """
-        self.data = data
-        self.columns = columns
+        self.features = features
+        self.data = features.data
+        self.columns = features.columns
         self.n_components = n_components
         self.perplexity = perplexity
         self.dbscan_paramters = dbscan_paramters
@@ -34,7 +34,10 @@ class tSNE(AbsData):
         Executes the t-SNE transformation and returns the result as JSON.
 
         Returns:
-            str or None: JSON string with t-SNE components, or None if invalid.
+            dict: A dictionary containing:
+                - 'tsne': DataFrame with the t-SNE components, labels and DBSCAN clusters.
+                - 'components': JSON representation of that DataFrame.
+                - 'n_components': Number of components computed.
         """
         self.n_components = min(self.n_components, len(self.columns))
 
@@ -49,7 +52,11 @@ class tSNE(AbsData):
 
         tsne_json = tsne.to_json(orient='records') if tsne_result else None
 
-        return tsne_json
+        return {
+            'tsne': tsne,
+            'components': tsne_json,
+            'n_components': self.n_components,
+        }
 
     def _tsne(self):
         """
@@ -61,11 +68,7 @@ class tSNE(AbsData):
         Raises:
             ValueError: If n_components is not 2 or 3.
         """
-        selected_data = self.data[self.columns]
-
-        # Standardize the data
-        scaler = StandardScaler()
-        scaled_data = scaler.fit_transform(selected_data)
+        scaled_data = self.features.scaled
 
         # Validate n_components
         if self.n_components not in [2, 3]:
@@ -73,11 +76,10 @@ class tSNE(AbsData):
 
         # Validate and adjust perplexity
         n_samples = scaled_data.shape[0]
-        effective_perplexity = min(self.perplexity, max(1, n_samples - 1))
+        self.perplexity = min(self.perplexity, max(1, n_samples - 1))
 
-        # Fit t-SNE
-        tsne = TSNE(n_components=self.n_components, perplexity=effective_perplexity, random_state=42)
-        tsne_components = tsne.fit_transform(scaled_data)
+        # Fit t-SNE, once per datasets version and parameters
+        tsne_components = self.features.cached('tsne', (self.n_components, self.perplexity), self._fit)
 
         component_names = [f'TSNE{i+1}' for i in range(tsne_components.shape[1])]
         components_df = pd.DataFrame(tsne_components, columns=component_names)
@@ -86,6 +88,17 @@ class tSNE(AbsData):
             'components': components_df
         }
 
+    def _fit(self):
+        """
+        Fits t-SNE on the standardized data.
+
+        Returns:
+            np.ndarray: The embedded components.
+        """
+        tsne = TSNE(n_components=self.n_components, perplexity=self.perplexity, random_state=42)
+
+        return tsne.fit_transform(self.features.scaled)
+
 
     def _label_dataframe(self, result):
         """
@@ -104,7 +117,10 @@ class tSNE(AbsData):
 
     def _clustering(self, result):
 
-        dbscan_result = DBscan(self.dbscan_paramters, result).extract()
-        result['dbscan_cluster'] = dbscan_result['cluster_labels']
+        cluster_labels = self.features.cached(
+            'tsne_dbscan', (self.n_components, self.perplexity, *self.dbscan_paramters),
+            lambda: DBscan(self.dbscan_paramters, result).extract()['cluster_labels']
+        )
+        result['dbscan_cluster'] = cluster_labels
 
         return result
\ No newline at end of file
@@ -1,28 +1,24 @@
 # Related third party imports.
-from tqdm import tqdm
+from django.conf import settings
 
 # Local application/library specific imports.
-from ..models import MetricsModel
+from .instrumentation import ExtractionProfiler
+from .parallel import entity_records
+from .progress import ProgressBar
 ## from utils
 from ..metrics.utils.stay_point import StayPoints
+from ..metrics.utils.session import ExtractionSession
 from ..metrics.utils.utils import compute_global_metrics
 ## from temporal
-from ..metrics.temporal.travel_time import TravelTime
 from ..metrics.temporal.visit_time_variation_coefficient import VisitTimeVariationCoefficient
 ## from social
 from ..metrics.social.quadrant_entropy import QuadrantEntropy
 from ..metrics.social.entropy import Entropy
 from ..metrics.social.detect_contact import DetectContact
 ## from spatial
-from ..metrics.spatial.angle_variation_coefficient import AngleVariationCoefficient
-from ..metrics.spatial.travel_avg_direction_angle import TravelAvgDirectionAngle
-from ..metrics.spatial.travel_distance import TravelDistance
-from ..metrics.utils.center_of_mass import CenterOfMass
-from ..metrics.spatial.radius_of_gyration import RadiusOfGyration
 from ..metrics.spatial.trajectory_correlation import TrajectoryCorrelationDegree
 from ..metrics.spatial.staypoint_importance_degree import StaypointImportanceDegree
 ## from kinematic
-from ..metrics.kinematic.travel_average_speed import TravelAverageSpeed
 from ..metrics.kinematic.speed_variation_coefficient import SpeedVariationCoefficient
 
 class Factory:
@@ -30,118 +26,139 @@ class Factory:
     A factory class to extract and compute different types of metrics for an individual trace file.
 
     Attributes:
-        trace_file (DataFrame): The trace data containing the information of movement.
+        trace (TraceArrays): The memory-mapped trace shared by every extraction stage.
         parameters (list): List of parameters required for metric extraction.
         file_name (String): File name extracted from parameters
         file_label (String): Label extracted from parameters
         total_visits (int): The total number of visits recorded across all individuals.
+        workers (int): Number of processes used for the per-entity metrics.
+        session (ExtractionSession): Buffers the per-entity rows until they are written in bulk.
+        profiler (ExtractionProfiler): Records the resources used by each extraction stage.
 
     Methods:
         extract(): Extracts the metrics for each individual in the trace file.
-        metrics(id, filtered_trace): Extracts specific metrics for each individual.
-        stayPoint(filtered_trace, id): Extracts stay point-related metrics for an individual.
+        metrics(id, metrics): Stores the travel metrics computed for an individual.
+        stayPoint(filtered_trace, id, visits): Registers stay point-related metrics for an individual.
     """
 
-    def __init__(self, trace_file, parameters):
+    def __init__(self, trace, parameters, workers=None, profiler=None):
         """
         Initializes the Factory with the trace file and parameters.
 
         Args:
-            trace_file (DataFrame): The trace data containing movement information.
+            trace (TraceArrays): The mapped trace of the file, e.g. from TraceArrays.from_frame.
             parameters (list): List of parameters required for metric extraction.
+            workers (int, optional): Number of worker processes for the per-entity metrics.
+                                     Defaults to settings.METRICS_WORKERS.
+            profiler (ExtractionProfiler, optional): Profiler the stages are recorded in, so the
+                                                     caller can add its own stages. A new one is
+                                                     created by default.
         """
-        self.trace_file = trace_file
         self.parameters = parameters
         self.file_name = parameters[4]
+        self.trace = trace
         self.file_label = parameters[5]
         self.total_visits = 0
+        self.workers = workers if workers is not None else getattr(settings, 'METRICS_WORKERS', 1)
+        self.session = ExtractionSession(parameters, getattr(settings, 'STAY_POINT_MATCHING', 'first'))
+        self.profiler = profiler if profiler is not None else ExtractionProfiler()
 
     def extract(self):
         """
         Extracts metrics for each individual in the trace file.
 
-        This method iterates over each unique individual ID in the trace file, applies filtering 
-        to isolate their data, and computes various metrics such as total travel time, distance, 
-        average speed, stay points, and entropy. It also calls other global metrics and social metrics.
+        This method hands each individual's range of the mapped trace to the per-entity
+        extractors, and computes various metrics such as
+        total travel time, distance, average speed, stay points, and entropy. It also calls other
+        global metrics and social metrics.
+
+        The per-entity extractors may run in worker processes; their records are merged here in
+        entity order, so stay point IDs are assigned exactly as in a serial run.
         """
+        profile = self.profiler.stage
+        num_points = len(self.trace)
+        num_entities = self.trace.num_entities
 
-        
-        ids = self.trace_file['id'].unique()
+        records = entity_records(self.trace, self.parameters, self.workers)
+
+        with self.profiler.interleaved("Per-entity metrics", "Stay points") as lap:
+            for index in ProgressBar(range(num_entities), desc="Individual Metrics"):
+                metrics, visits = next(records)
+                lap("Per-entity metrics", int(self.trace.offsets[index + 1] - self.trace.offsets[index]))
+
+                id = self.trace.entities[index]
 
-        for id in tqdm(ids, desc="Individual Metrics"):
-            filtered_trace = self.trace_file[self.trace_file['id'] == id]
+                self._metrics(id, metrics)
+                self._stayPoint(self.trace.entity_frame(index), id, visits)
+                lap("Stay points", len(visits))
 
-            self._metrics(id, filtered_trace)
-            self._stayPoint(filtered_trace, id)
+            # Shutting the worker pool down, so the CPU time of the workers is accounted
+            records.close()
+            lap("Per-entity metrics")
+
+        # Writing the buffered metrics, stay points, visits and journeys at once
+        with profile("Write entity rows", rows=num_entities):
+            self.session.flush()
 
         # Extracting additional global and social metrics
-        Entropy(self.total_visits, self.parameters, self.trace_file).extract()
-        StaypointImportanceDegree(self.parameters).extract()
+        with profile("Entropy", rows=self.total_visits):
+            Entropy(self.total_visits, self.parameters, self.trace).extract()
+
+        with profile("Importance degree", rows=self.total_visits):
+            StaypointImportanceDegree(self.parameters).extract()
         
         skip_contact_detection = self.parameters[-1]
 
         if not skip_contact_detection:
-            DetectContact(self.parameters, self.trace_file).extract()
+            with profile("Contacts", rows=num_points):
+                DetectContact(self.parameters, self.trace).extract()
+
+        with profile("Global metrics", rows=num_entities):
+            compute_global_metrics(self.file_name)
 
-        compute_global_metrics(self.file_name)
+        with profile("Quadrant entropy", rows=num_points):
+            QuadrantEntropy(self.trace, self.parameters).extract()
 
-        QuadrantEntropy(self.trace_file, self.parameters).extract()
-        TrajectoryCorrelationDegree(self.trace_file, self.parameters).extract()
-        VisitTimeVariationCoefficient(self.file_name).extract()
-        SpeedVariationCoefficient(self.file_name).extract()
+        with profile("Trajectory correlation", rows=num_points):
+            TrajectoryCorrelationDegree(self.trace, self.parameters).extract()
+
+        with profile("Visit time CV", rows=self.total_visits):
+            VisitTimeVariationCoefficient(self.file_name).extract()
+
+        with profile("Speed CV", rows=num_entities):
+            SpeedVariationCoefficient(self.file_name).extract()
+
+        self.profiler.save(self.file_name)
         
-    def _metrics(self, id, filtered_trace):
+    def _metrics(self, id, metrics):
         """
-        Extracts individual-specific metrics and stores them in the database.
+        Buffers individual-specific metrics in the extraction session.
 
         Args:
             id (str): The ID of the individual.
-            filtered_trace (DataFrame): The trace data filtered for the specific individual.
+            metrics (dict): Temporal, spatial and kinematic metrics computed by EntityMetrics.
         """
-        # Extracting temporal, spatial and kinematic metrics
-        travel_time = TravelTime(filtered_trace).extract()
-        travel_distance = TravelDistance(filtered_trace, self.parameters).extract()
-        travel_average_speed = TravelAverageSpeed(travel_time, travel_distance).extract()
-        center_of_mass = CenterOfMass(filtered_trace).extract()
-        radius_of_gyration = RadiusOfGyration(filtered_trace, center_of_mass).extract()
-        avg_direction_angle = TravelAvgDirectionAngle(filtered_trace, self.parameters).extract()
-        angle_variation_coefficient = AngleVariationCoefficient(filtered_trace, avg_direction_angle, self.parameters).extract()
-
-        # Creating a new entry in the database for the computed metrics
-        MetricsModel.objects.create(
-            file_name = self.file_name,
-            label = self.file_label,
-            entity_id = id,
-            x_center = center_of_mass[0],
-            y_center = center_of_mass[1],
-            z_center = center_of_mass[2],
-
-            travel_time = travel_time,
-            travel_distance = travel_distance,
-            travel_avg_speed = travel_average_speed,
-            travel_avg_angle_dirct = avg_direction_angle,
-            radius_of_gyration = radius_of_gyration,
-
-            angle_variation_coefficient = angle_variation_coefficient,
-        )
-
-    def _stayPoint(self, filtered_trace, id):
+        # Creating a new entry in the session for the computed metrics
+        self.session.add_metrics(id, label = self.file_label, **metrics)
+
+    def _stayPoint(self, filtered_trace, id, visits):
         """
-        Extracts stay point metrics and updates the database.
+        Registers stay point metrics and updates the buffered metrics.
 
         Args:
             filtered_trace (DataFrame): The trace data filtered for the specific individual.
             id (str): The ID of the individual.
+            visits (list): Candidate visits detected by StayPoints.detect().
         """
-        # Extracting stay point metrics
+        # Registering stay point metrics
         (visit_count, time_visit_count, 
          num_journeys, avg_journey_time, 
-         avg_journey_distance, avg_journey_avg_speed) = StayPoints(filtered_trace, 
-                                                                 id, self.parameters).extract()
+         avg_journey_distance, avg_journey_avg_speed) = StayPoints(filtered_trace, id, self.parameters,
+                                                                 self.session).register(visits)
         # Fetching the corresponding MetricsModel for the individual
-        metric = MetricsModel.objects.get(file_name = self.file_name, entity_id = id)
+        metric = self.session.metrics[id]
 
-        # Updating the extracted stay point metrics in the database
+        # Updating the extracted stay point metrics
         metric.stay_points_visits = visit_count
         metric.avg_time_visit = time_visit_count / visit_count if visit_count != 0 else 0
         metric.num_journeys = num_journeys
@@ -149,7 +166,5 @@ class Factory:
         metric.avg_journey_distance = avg_journey_distance
         metric.avg_journey_avg_speed = avg_journey_avg_speed
 
-        metric.save()
-
         # Accumulating total visits for global metrics
         self.total_visits += visit_count
@@ -0,0 +1,267 @@
+# Standard library imports.
+import os
+import shutil
+import tempfile
+
+# Related third party imports.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+# Local application/library specific imports.
+from .format import Format
+from .trace_store import TraceStore
+
+# Coordinates and time are kept in double precision: geographical coordinates lose
+# metre-level precision in float32.
+COLUMN_DTYPES = {
+    'id': np.int32,
+    'time': np.float64,
+    'x': np.float64,
+    'y': np.float64,
+    'z': np.float64,
+}
+
+
+class TraceStaging:
+    """
+    On-disk columnar staging area of a trace, partitioned by entity.
+
+    Every partition is a directory with one raw binary file per column; rows are appended
+    chunk by chunk, so the whole trace never has to be held in memory while it is read.
+    An entity always lands in the same partition (id modulo the number of partitions),
+    and the number of rows of every entity is counted as the rows come in.
+
+    Attributes:
+        directory (str): Root directory of the staging area.
+        num_partitions (int): Number of entity partitions.
+        time_offset (float): Value subtracted from every timestamp when reading back.
+        num_rows (int): Number of rows staged so far.
+    """
+
+    def __init__(self, directory, num_partitions):
+        """
+        Initialize an empty TraceStaging.
+
+        Args:
+            directory (str): Existing, empty directory to stage the trace into.
+            num_partitions (int): Number of entity partitions.
+        """
+        self.directory = directory
+        self.num_partitions = num_partitions
+        self.time_offset = 0.0
+        self.num_rows = 0
+        self._entities = np.empty(0, dtype=COLUMN_DTYPES['id'])
+        self._entity_rows = np.empty(0, dtype=np.int64)
+
+    def append(self, columns):
+        """
+        Appends a chunk of rows, routing each row to its entity partition.
+
+        Args:
+            columns (dict): One array per column of COLUMN_DTYPES, all of the same length.
+        """
+        partition = columns['id'] % self.num_partitions
+        order = np.argsort(partition, kind='stable')
+        bounds = np.searchsorted(partition[order], np.arange(self.num_partitions + 1))
+
+        for index in range(self.num_partitions):
+            rows = order[bounds[index]:bounds[index + 1]]
+
+            if len(rows) == 0:
+                continue
+
+            path = self._partition_path(index)
+            os.makedirs(path, exist_ok=True)
+
+            for column, dtype in COLUMN_DTYPES.items():
+                with open(os.path.join(path, column), 'ab') as column_file:
+                    columns[column][rows].astype(dtype, copy=False).tofile(column_file)
+
+        self.num_rows += len(partition)
+        self._count_entities(columns['id'])
+
+    def index(self):
+        """
+        Returns:
+            tuple: (entities, offsets) of the staged trace once sorted by 'id' and 'time':
+                   entity `entities[i]` will occupy the rows [offsets[i], offsets[i + 1]).
+        """
+        offsets = np.zeros(len(self._entities) + 1, dtype=np.int64)
+        np.cumsum(self._entity_rows, out=offsets[1:])
+
+        return self._entities, offsets
+
+    def partitions(self):
+        """
+        Reads the partitions back one at a time.
+
+        Yields:
+            dict: The columns of a partition, sorted by 'id' and 'time', with the
+                  time offset applied.
+        """
+        for index in range(self.num_partitions):
+            path = self._partition_path(index)
+
+            if not os.path.isdir(path):
+                continue
+
+            columns = {
+                column: np.fromfile(os.path.join(path, column), dtype=dtype)
+                for column, dtype in COLUMN_DTYPES.items()
+            }
+            columns['time'] -= self.time_offset
+
+            order = np.lexsort((columns['time'], columns['id']))
+
+            yield {column: values[order] for column, values in columns.items()}
+
+    def to_store(self, file_name, root=None):
+        """
+        Writes the staged trace to the TraceStore of a file, one partition at a time, so
+        the whole trace is never held in memory.
+
+        Args:
+            file_name (str): Name of the file the trace belongs to.
+            root (str): Directory holding every store. Defaults to settings.TRACE_STORE_DIR.
+
+        Returns:
+            TraceStore: The store of the file.
+        """
+        entities, offsets = self.index()
+
+        return TraceStore.write_parts(file_name, entities, offsets, self.partitions(), root)
+
+    def cleanup(self):
+        """Removes the staging directory from disk."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _partition_path(self, index):
+        return os.path.join(self.directory, f'part-{index:04d}')
+
+    def _count_entities(self, ids):
+        """Adds the rows of a chunk to the row count of each entity."""
+        chunk_entities, chunk_rows = np.unique(ids, return_counts=True)
+
+        entities, inverse = np.unique(np.concatenate((self._entities, chunk_entities)), return_inverse=True)
+        rows = np.bincount(inverse, weights=np.concatenate((self._entity_rows, chunk_rows)))
+
+        self._entities, self._entity_rows = entities, rows.astype(np.int64)
+
+
+class ChunkedIngest:
+    """
+    Streaming counterpart of Format for large uploads.
+
+    The CSV is read in chunks with explicit dtypes; each chunk gets the same defaults as
+    Format (id 1, z 0), its date-time strings are converted to epoch seconds, and it is
+    spilled to a TraceStaging area. Relative time is applied when the staging area is
+    read back, once the earliest timestamp of the whole file is known.
+    """
+
+    def __init__(self, trace_file, chunk_size=None, num_partitions=None, staging_dir=None):
+        """
+        Initialize the ChunkedIngest.
+
+        Args:
+            trace_file (file): Uploaded CSV file with at least 'x', 'y' and 'time' columns.
+            chunk_size (int): Rows per chunk. Defaults to settings.INGEST_CHUNK_SIZE.
+            num_partitions (int): Entity partitions. Defaults to settings.INGEST_PARTITIONS.
+            staging_dir (str): Parent directory of the staging area. Defaults to
+                               settings.INGEST_STAGING_DIR.
+        """
+        self.trace_file = trace_file
+        self.chunk_size = chunk_size or settings.INGEST_CHUNK_SIZE
+        self.num_partitions = num_partitions or settings.INGEST_PARTITIONS
+        self.staging_dir = staging_dir or settings.INGEST_STAGING_DIR
+
+    def extract(self):
+        """
+        Reads the whole file into a staging area.
+
+        Returns:
+            TraceStaging: The staged trace. The caller is responsible for calling cleanup().
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        staging = TraceStaging(tempfile.mkdtemp(dir=self.staging_dir), self.num_partitions)
+
+        header = pd.read_csv(self.trace_file, nrows=0).columns
+        self.trace_file.seek(0)
+
+        dtypes = {column: dtype for column, dtype in COLUMN_DTYPES.items() if column in header and column != 'time'}
+        is_date_time = None
+        first_time = None
+
+        try:
+            for chunk in pd.read_csv(self.trace_file, dtype=dtypes, chunksize=self.chunk_size):
+                if is_date_time is None and len(chunk):
+                    is_date_time = isinstance(chunk['time'].iloc[0], str)
+
+                columns = self._normalize(chunk, is_date_time)
+
+                if is_date_time and len(chunk):
+                    chunk_first = columns['time'].min()
+                    first_time = chunk_first if first_time is None else min(first_time, chunk_first)
+
+                staging.append(columns)
+        except Exception:
+            staging.cleanup()
+            raise
+
+        if is_date_time and first_time is not None:
+            staging.time_offset = first_time
+
+        return staging
+
+    def _normalize(self, chunk, is_date_time):
+        """
+        Converts a chunk into typed column arrays.
+
+        Args:
+            chunk (pd.DataFrame): A chunk of the CSV.
+            is_date_time (bool): Whether the 'time' column holds date-time strings.
+
+        Returns:
+            dict: One array per column of COLUMN_DTYPES.
+        """
+        size = len(chunk)
+
+        if is_date_time:
+            date_time = pd.to_datetime(chunk['time'], utc=True).dt.tz_convert(None)
+            time = date_time.to_numpy().astype('datetime64[ns]').astype(np.int64) / 1e9
+        else:
+            time = chunk['time'].to_numpy(dtype=np.float64)
+
+        return {
+            'id': chunk['id'].to_numpy(dtype=np.int32) if 'id' in chunk else np.ones(size, dtype=np.int32),
+            'time': time,
+            'x': chunk['x'].to_numpy(dtype=np.float64),
+            'y': chunk['y'].to_numpy(dtype=np.float64),
+            'z': chunk['z'].to_numpy(dtype=np.float64) if 'z' in chunk else np.zeros(size),
+        }
+
+
+def store_trace(file_name, path, root=None):
+    """
+    Reads and formats a trace CSV into the TraceStore of a file. Files above
+    settings.INGEST_THRESHOLD are read in chunks through an on-disk staging area and
+    streamed into the store partition by partition, to bound peak memory.
+
+    Args:
+        file_name (str): Name of the file the trace belongs to.
+        path (str): Path of the CSV file.
+        root (str): Directory holding every store. Defaults to settings.TRACE_STORE_DIR.
+
+    Returns:
+        TraceStore: The store of the file.
+    """
+    if os.path.getsize(path) <= settings.INGEST_THRESHOLD:
+        return TraceStore.write(file_name, Format(pd.read_csv(path)).extract(), root)
+
+    with open(path, 'rb') as trace_file:
+        staging = ChunkedIngest(trace_file).extract()
+
+    try:
+        return staging.to_store(file_name, root)
+    finally:
+        staging.cleanup()
@@ -0,0 +1,242 @@
+# Standard library imports.
+import os
+import time
+from contextlib import contextmanager
+
+# Related third party imports.
+from django.db import connection
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+class StageRecord:
+    """
+    Resources used by one extraction stage, accumulated over every time it was entered.
+
+    Attributes:
+        name (str): Name of the stage.
+        wall_time (float): Elapsed seconds.
+        cpu_time (float): User and system CPU seconds of the process and its finished children.
+        peak_rss (int): Peak resident set size of the process during the stage, in KiB.
+        children_peak_rss (int): Largest peak RSS among finished child processes, in KiB.
+        rows (int): Rows processed by the stage.
+        queries (int): Database queries issued by the stage.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.peak_rss = 0
+        self.children_peak_rss = 0
+        self.rows = 0
+        self.queries = 0
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'peak_rss_kib': self.peak_rss,
+            'children_peak_rss_kib': self.children_peak_rss,
+            'rows': self.rows,
+            'queries': self.queries,
+        }
+
+
+class ExtractionProfiler:
+    """
+    Records wall time, CPU time, peak RSS, rows processed and query count for each stage
+    of an extraction.
+
+    A stage may be entered many times; its record accumulates. Stages that alternate within
+    one loop (e.g. twice per entity) are profiled together with `interleaved`, so the loop
+    is measured once instead of once per iteration.
+    Peak RSS is the process high-water mark, reset whenever a stage is entered where the
+    platform allows it (Linux), and otherwise the lifetime peak reached by the end of the stage.
+
+    Attributes:
+        stages (dict): StageRecord of every stage, in the order they first ran.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        """
+        Profiles the block as (part of) the stage `name`.
+
+        Args:
+            name (str): Name of the stage.
+            rows (int): Rows processed by this run of the block. More can be added through
+                        the yielded record's `rows` attribute.
+
+        Yields:
+            StageRecord: The record of the stage.
+        """
+        record = self._record(name)
+        usage = StageRecord(name)
+
+        try:
+            with _measure(usage):
+                yield record
+        finally:
+            record.wall_time += usage.wall_time
+            record.cpu_time += usage.cpu_time
+            record.queries += usage.queries
+            record.rows += rows
+            record.peak_rss = max(record.peak_rss, usage.peak_rss)
+            record.children_peak_rss = max(record.children_peak_rss, usage.children_peak_rss)
+
+    @contextmanager
+    def interleaved(self, *names):
+        """
+        Profiles a loop whose iterations run several stages in turn, as a single block.
+
+        Each iteration only reads perf_counter, through the yielded `lap(name, rows=0)`, which
+        attributes the time and queries since the previous lap to the stage `name`. The CPU
+        time of the block is read once and shared among the stages in proportion to their
+        wall time; every stage gets the peak RSS of the block.
+
+        Args:
+            *names (str): Names of the stages, in the order they first run.
+
+        Yields:
+            callable: lap(name, rows=0).
+        """
+        records = [self._record(name) for name in names]
+        wall_times = dict.fromkeys(names, 0.0)
+        queries = dict.fromkeys(names, 0)
+        rows = dict.fromkeys(names, 0)
+
+        usage = StageRecord(None)
+        perf_counter = time.perf_counter
+        last = [perf_counter(), 0]
+
+        def lap(name, count=0):
+            now = perf_counter()
+            wall_times[name] += now - last[0]
+            queries[name] += usage.queries - last[1]
+            rows[name] += count
+            last[0], last[1] = now, usage.queries
+
+        try:
+            with _measure(usage):
+                yield lap
+        finally:
+            total = sum(wall_times.values())
+
+            for record in records:
+                share = wall_times[record.name] / total if total else 1 / len(records)
+
+                record.wall_time += wall_times[record.name]
+                record.cpu_time += usage.cpu_time * share
+                record.queries += queries[record.name]
+                record.rows += rows[record.name]
+                record.peak_rss = max(record.peak_rss, usage.peak_rss)
+                record.children_peak_rss = max(record.children_peak_rss, usage.children_peak_rss)
+
+    def as_dict(self):
+        """
+        Returns:
+            list: One dict per stage, in the order they first ran.
+        """
+        return [record.as_dict() for record in self.stages.values()]
+
+    def save(self, file_name):
+        """
+        Stores the profile as the ExtractionProfileModel row of a file.
+
+        Args:
+            file_name (str): Name of the extracted file.
+        """
+        from ..models import ExtractionProfileModel
+
+        stages = self.as_dict()
+
+        ExtractionProfileModel.objects.update_or_create(
+            file_name = file_name,
+            defaults = {
+                'stages': stages,
+                'total_wall_time': sum(stage['wall_time'] for stage in stages),
+            }
+        )
+
+    def _record(self, name):
+        """Returns the record of a stage, creating it the first time the stage runs."""
+        record = self.stages.get(name)
+
+        if record is None:
+            record = self.stages[name] = StageRecord(name)
+
+        return record
+
+
+@contextmanager
+def _measure(usage):
+    """
+    Measures the wall time, CPU time, queries and peak RSS of the block into a StageRecord.
+
+    Args:
+        usage (StageRecord): Empty record that receives the measurements.
+    """
+    _reset_peak_rss()
+
+    def count_query(execute, sql, params, many, context):
+        usage.queries += 1
+        return execute(sql, params, many, context)
+
+    start_wall = time.perf_counter()
+    start_cpu = _cpu_time()
+
+    try:
+        with connection.execute_wrapper(count_query):
+            yield usage
+    finally:
+        usage.wall_time = time.perf_counter() - start_wall
+        usage.cpu_time = _cpu_time() - start_cpu
+        usage.peak_rss, usage.children_peak_rss = _peak_rss()
+
+
+def _cpu_time():
+    """Returns the CPU seconds used by the process and its finished children."""
+    times = os.times()
+
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _reset_peak_rss():
+    """Resets the peak RSS of the process, where the kernel allows it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+
+def _peak_rss():
+    """
+    Returns:
+        tuple: (process peak RSS, largest children peak RSS) in KiB.
+    """
+    children_peak_rss = 0
+
+    if resource is not None:
+        children_peak_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]), children_peak_rss
+    except OSError:
+        pass
+
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, children_peak_rss
+
+    return 0, children_peak_rss
@@ -0,0 +1,350 @@
+# Standard library imports.
+import os
+import subprocess
+import sys
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+from time import monotonic
+
+# Related third party imports.
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+# Local application/library specific imports.
+from .factory import Factory
+from .ingest import store_trace
+from .instrumentation import ExtractionProfiler
+from .progress import listen, report
+from .trace_arrays import TraceArrays
+from .trace_lod import TraceLOD
+from .trace_store import TraceStore
+from ..visualizations.plot_cache import invalidate_plots
+from ..models import (ConfigModel, MetricsModel,
+                      JourneyModel, StayPointModel,
+                      VisitModel, ContactModel,
+                      QuadrantEntropyModel, GlobalMetricsModel,
+                      TraceModel, ProcessingJobModel,
+                      ExtractionProfileModel)
+
+# Every model holding rows of a processed file
+FILE_MODELS = [
+    ConfigModel, MetricsModel,
+    JourneyModel, StayPointModel,
+    VisitModel, ContactModel,
+    QuadrantEntropyModel, GlobalMetricsModel,
+    TraceModel, ExtractionProfileModel
+]
+
+ACTIVE_STATES = [ProcessingJobModel.QUEUED, ProcessingJobModel.RUNNING]
+
+
+class JobProgress:
+    """
+    Progress listener that records the running stage of a job in its ProcessingJobModel row.
+
+    Updates are written at most every settings.JOB_PROGRESS_INTERVAL seconds, except when
+    the stage changes or completes, so the polling endpoint stays current without turning
+    every progress tick into a query.
+    """
+
+    def __init__(self, job):
+        """
+        Args:
+            job (ProcessingJobModel): The running job.
+        """
+        self.job = job
+        self.interval = settings.JOB_PROGRESS_INTERVAL
+        self._last_write = None
+
+    def __call__(self, stage, n, total):
+        now = monotonic()
+        finished = total is not None and n >= total
+
+        if (
+            stage == self.job.stage and not finished and
+            self._last_write is not None and now - self._last_write < self.interval
+        ):
+            return
+
+        self.job.stage, self.job.progress, self.job.total = stage, n, total
+        ProcessingJobModel.objects.filter(pk=self.job.pk).update(stage=stage, progress=n, total=total)
+        self._last_write = now
+
+
+class JobHeartbeat:
+    """
+    Context manager that refreshes the heartbeat of a running job from a background thread
+    every settings.JOB_HEARTBEAT_INTERVAL seconds, including through long stages that report
+    no progress. A running job whose heartbeat stops belongs to a worker that died, and is
+    failed by `fail_stale_jobs`.
+    """
+
+    def __init__(self, job):
+        """
+        Args:
+            job (ProcessingJobModel): The running job.
+        """
+        self.job = job
+        self.interval = settings.JOB_HEARTBEAT_INTERVAL
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    ProcessingJobModel.objects.filter(
+                        pk=self.job.pk, state=ProcessingJobModel.RUNNING
+                    ).update(heartbeat_at=timezone.now())
+                except DatabaseError:
+                    # The database may be locked by the extraction; the next beat retries
+                    continue
+        finally:
+            # The thread has its own connection
+            connection.close()
+
+
+def save_upload(uploaded_file):
+    """
+    Writes an uploaded trace to settings.JOB_UPLOAD_DIR so a worker can process it later.
+
+    Args:
+        uploaded_file (UploadedFile): The uploaded CSV file.
+
+    Returns:
+        str: Path of the saved file.
+    """
+    os.makedirs(settings.JOB_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(settings.JOB_UPLOAD_DIR, f'{uuid.uuid4().hex}.csv')
+
+    with open(path, 'wb') as destination:
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+
+    return path
+
+
+def enqueue(trace_path, parameters):
+    """
+    Queues a trace file for processing.
+
+    Args:
+        trace_path (str): Path of the trace CSV.
+        parameters (list): Extraction parameters, as built by the upload form.
+
+    Returns:
+        ProcessingJobModel: The queued job.
+    """
+    return ProcessingJobModel.objects.create(
+        file_name = parameters[4],
+        trace_path = str(trace_path),
+        parameters = list(parameters),
+    )
+
+
+def is_active(file_name):
+    """
+    Returns whether a job for the file is queued or running. Stale jobs of the file are
+    failed first, so a worker that died never keeps its file busy.
+    """
+    fail_stale_jobs(file_name)
+
+    return ProcessingJobModel.objects.filter(file_name=file_name, state__in=ACTIVE_STATES).exists()
+
+
+def is_taken(file_name):
+    """
+    Returns whether a file name is already used, by a processed file or by a queued or
+    running job. Uploads under a taken name are refused.
+    """
+    return ConfigModel.objects.filter(file_name=file_name).exists() or is_active(file_name)
+
+
+def fail_stale_jobs(file_name=None):
+    """
+    Fails the running jobs without a heartbeat for settings.JOB_HEARTBEAT_TIMEOUT seconds,
+    whose worker crashed or was killed, and removes their partial rows and upload.
+
+    Args:
+        file_name (str): Only check the jobs of this file. Defaults to every job.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_HEARTBEAT_TIMEOUT)
+    stale = ProcessingJobModel.objects.filter(state=ProcessingJobModel.RUNNING, heartbeat_at__lt=cutoff)
+
+    if file_name is not None:
+        stale = stale.filter(file_name=file_name)
+
+    for job in stale:
+        # Conditional, so each stale job is failed and cleaned up by a single caller
+        failed = ProcessingJobModel.objects.filter(
+            pk=job.pk, state=ProcessingJobModel.RUNNING, heartbeat_at=job.heartbeat_at
+        ).update(
+            state=ProcessingJobModel.FAILED,
+            error="The worker processing this job stopped responding.",
+            finished_at=timezone.now(),
+        )
+
+        if failed:
+            delete_file_data(job.file_name)
+            _remove_upload(job.trace_path)
+
+
+def claim_next_job():
+    """
+    Atomically moves the oldest queued job to the running state, after failing the running
+    jobs whose worker died.
+
+    The claim is a conditional UPDATE, so concurrent workers never run the same job.
+
+    Returns:
+        ProcessingJobModel or None: The claimed job, or None if the queue is empty.
+    """
+    fail_stale_jobs()
+
+    while True:
+        job = ProcessingJobModel.objects.filter(state=ProcessingJobModel.QUEUED).order_by('id').first()
+
+        if job is None:
+            return None
+
+        claimed = ProcessingJobModel.objects.filter(pk=job.pk, state=ProcessingJobModel.QUEUED).update(
+            state=ProcessingJobModel.RUNNING, started_at=timezone.now(), heartbeat_at=timezone.now()
+        )
+
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """
+    Processes a claimed job: formats and stores the trace, extracts every metric and
+    registers the file. On failure the partial rows of the file are removed and the error
+    is kept on the job.
+
+    A job whose file name is already processed, or being processed by another job, fails
+    before writing anything, so the data of that file is never overwritten nor removed. A
+    job failed by fail_stale_jobs while it was still running stays failed.
+
+    Args:
+        job (ProcessingJobModel): A job in the running state.
+    """
+    parameters = job.parameters
+    owns_file = False
+
+    try:
+        if _name_in_use(job):
+            raise FileExistsError(f"A file named '{job.file_name}' is already processed or being processed.")
+
+        owns_file = True
+        profiler = ExtractionProfiler()
+
+        with JobHeartbeat(job), listen(JobProgress(job)):
+            report("Storing trace")
+            with profiler.stage("Storing trace") as record:
+                trace = TraceArrays(store_trace(job.file_name, job.trace_path))
+                record.rows = len(trace)
+
+            report("Building trace levels")
+            with profiler.stage("Building trace levels", rows=len(trace)):
+                TraceLOD.build(trace.store)
+
+            Factory(trace, parameters, profiler=profiler).extract()
+
+        create_config_model(parameters)
+    except Exception:
+        # Only the rows this job wrote are removed
+        if owns_file:
+            delete_file_data(job.file_name)
+
+        job.state = ProcessingJobModel.FAILED
+        job.error = traceback.format_exc()
+    else:
+        job.state = ProcessingJobModel.DONE
+    finally:
+        _remove_upload(job.trace_path)
+
+    # Conditional, so a job failed meanwhile by fail_stale_jobs is not reported as done
+    finished = ProcessingJobModel.objects.filter(pk=job.pk, state=ProcessingJobModel.RUNNING).update(
+        state=job.state, error=job.error, finished_at=timezone.now()
+    )
+
+    if not finished:
+        # Its rows were removed while it kept writing: the job stays failed and what it wrote
+        # since is removed too, unless a new job already took over the file name
+        taken_over = ProcessingJobModel.objects.filter(
+            file_name=job.file_name, state__in=ACTIVE_STATES
+        ).exclude(pk=job.pk).exists()
+
+        if owns_file and not taken_over:
+            delete_file_data(job.file_name)
+
+    job.refresh_from_db()
+
+
+def start_worker():
+    """
+    Starts a background `process_jobs --drain` worker, which exits once the queue is empty.
+    Concurrent workers are safe, since each job is claimed atomically.
+    """
+    subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'process_jobs', '--drain'],
+        cwd=settings.BASE_DIR,
+        start_new_session=True,
+    )
+
+
+def create_config_model(parameters):
+    """ Function Responsable to create ConfigModel with all parameters"""
+    ConfigModel.objects.create(
+        file_name = parameters[4],
+        label = parameters[5],
+        is_geographical_coordinates = parameters[6],
+        distance_threshold = parameters[0],
+        time_threshold = parameters[1],
+        radius_threshold = parameters[2],
+        quadrant_parts = parameters[3],
+    )
+
+
+def delete_file_data(file_name):
+    """
+    Deletes every row, the stored trace and the cached plots of a file.
+
+    Args:
+        file_name (str): Name of the file.
+    """
+    for model in FILE_MODELS:
+        model.objects.filter(file_name=file_name).delete()
+
+    TraceStore(file_name).delete()
+    invalidate_plots(file_name)
+
+
+def _name_in_use(job):
+    """Returns whether the file name of a job belongs to a processed file or another running job."""
+    return (
+        ConfigModel.objects.filter(file_name=job.file_name).exists() or
+        ProcessingJobModel.objects.filter(
+            file_name=job.file_name, state=ProcessingJobModel.RUNNING
+        ).exclude(pk=job.pk).exists()
+    )
+
+
+def _remove_upload(path):
+    """Deletes a processed upload, leaving files that live outside settings.JOB_UPLOAD_DIR."""
+    upload_dir = os.path.realpath(settings.JOB_UPLOAD_DIR)
+
+    if os.path.dirname(os.path.realpath(path)) == upload_dir and os.path.exists(path):
+        os.remove(path)
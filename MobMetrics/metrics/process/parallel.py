@@ -0,0 +1,84 @@
+# Standard library imports.
+from concurrent.futures import ProcessPoolExecutor
+
+# Related third party imports.
+import django
+
+# Local application/library specific imports.
+from ..metrics.utils.entity_metrics import EntityMetrics
+from ..metrics.utils.stay_point_detection import detect_visits
+
+# Trace mapped by each worker process when the pool starts
+_worker_trace = None
+
+
+def _init_worker(trace):
+    """
+    Makes sure the Django app registry is ready in spawned worker processes and keeps
+    the worker's mapping of the trace.
+    """
+    global _worker_trace
+
+    django.setup()
+    _worker_trace = trace
+
+
+def extract_entity(trace, index, parameters):
+    """
+    Computes the database-independent part of an entity's metrics.
+
+    This is the unit of work run by worker processes, so it only returns plain
+    records: the travel metrics and the candidate stay-point visits. Registering
+    visits against the shared stay-point registry is left to the parent process.
+
+    Args:
+        trace (TraceArrays): The memory-mapped trace.
+        index (int): Position of the entity in `trace.entities`.
+        parameters (list): Configuration parameters.
+
+    Returns:
+        tuple: (metrics, visits) where metrics is a dict keyed by MetricsModel fields
+               and visits is the list returned by StayPoints.detect().
+    """
+    x, y, z, time = trace.entity(index)
+
+    metrics = EntityMetrics(x, y, z, time, parameters).extract()
+    visits = detect_visits(x, y, z, time, parameters[0], parameters[1], parameters[6])
+
+    return metrics, visits
+
+
+def _extract_in_worker(task):
+    """Runs `extract_entity` on the worker's own mapping of the trace."""
+    index, parameters = task
+
+    return extract_entity(_worker_trace, index, parameters)
+
+
+def entity_records(trace, parameters, workers=1):
+    """
+    Yields the per-entity records of a mapped trace, in entity order.
+
+    With more than one worker the entities are sharded across a ProcessPoolExecutor.
+    Each worker maps the trace files once when it starts and only receives entity
+    positions, so no trace data is pickled. Results are still yielded in the same order
+    as the serial run so the parent can merge them deterministically.
+
+    Args:
+        trace (TraceArrays): The memory-mapped trace.
+        parameters (list): Configuration parameters.
+        workers (int): Number of worker processes. 1 runs everything in-process.
+
+    Yields:
+        tuple: (metrics, visits) for each entity, as returned by `extract_entity`.
+    """
+    if workers <= 1:
+        for index in range(trace.num_entities):
+            yield extract_entity(trace, index, parameters)
+        return
+
+    tasks = ((index, parameters) for index in range(trace.num_entities))
+    chunksize = max(1, trace.num_entities // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(trace,)) as executor:
+        yield from executor.map(_extract_in_worker, tasks, chunksize=chunksize)
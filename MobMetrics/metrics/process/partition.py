@@ -0,0 +1,25 @@
+# Related third party imports.
+import numpy as np
+
+
+def entity_offsets(ids):
+    """
+    Computes the boundaries of each entity run in an id-sorted array.
+
+    Args:
+        ids (np.ndarray): Entity ids, sorted so that each entity is contiguous.
+
+    Returns:
+        tuple: (entity_ids, offsets) where entity `entity_ids[i]` occupies the
+               half-open range [offsets[i], offsets[i + 1]).
+    """
+    ids = np.asarray(ids)
+
+    if len(ids) == 0:
+        return ids[:0], np.zeros(1, dtype=np.int64)
+
+    starts = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    offsets = np.concatenate(([0], starts, [len(ids)])).astype(np.int64)
+
+    return ids[offsets[:-1]], offsets
+
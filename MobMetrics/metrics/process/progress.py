@@ -0,0 +1,58 @@
+# Standard library imports.
+from contextlib import contextmanager
+
+# Related third party imports.
+from tqdm import tqdm
+
+# Callback receiving (stage, n, total) while a listener is active in this process
+_listener = None
+
+
+class ProgressBar(tqdm):
+    """
+    tqdm progress bar that also reports its position to the active progress listener.
+
+    Stages use it exactly like tqdm; outside of a background job no listener is set and it
+    behaves as a plain progress bar. Reports follow tqdm's own refresh throttling.
+    """
+
+    def display(self, msg=None, pos=None):
+        report(self.desc, self.n, self.total)
+
+        return super().display(msg, pos)
+
+    def close(self):
+        if not self.disable:
+            report(self.desc, self.n, self.total)
+
+        super().close()
+
+
+def report(stage, n=0, total=None):
+    """
+    Sends the current stage and its progress to the active listener, if any.
+
+    Args:
+        stage (str): Name of the running stage.
+        n (int): Units of work done in the stage.
+        total (int): Units of work of the stage, if known.
+    """
+    if _listener is not None:
+        _listener(stage, n, total)
+
+
+@contextmanager
+def listen(callback):
+    """
+    Routes the progress of every stage run inside the block to `callback`.
+
+    Args:
+        callback (callable): Called with (stage, n, total).
+    """
+    global _listener
+
+    previous, _listener = _listener, callback
+    try:
+        yield
+    finally:
+        _listener = previous
@@ -0,0 +1,94 @@
+# Related third party imports.
+import numpy as np
+import pandas as pd
+
+# Local application/library specific imports.
+from .trace_store import TraceStore
+
+
+class TraceArrays:
+    """
+    Memory-mapped columns of a stored trace, shared by every stage of an extraction.
+
+    The normalized trace is written once as a TraceStore; its `.npy` columns are then
+    reopened with `np.load(mmap_mode='r')`, so stages and worker processes read the same
+    pages from the OS cache instead of receiving pickled or copied DataFrames. Pickling a
+    TraceArrays only sends its store location; the columns are mapped again on load.
+
+    Attributes:
+        store (TraceStore): The store the columns are mapped from.
+        entities (np.ndarray): Entity ids, in storage order.
+        offsets (np.ndarray): Start row of each entity, followed by the number of rows.
+    """
+
+    def __init__(self, store):
+        """
+        Maps the columns of a stored trace.
+
+        Args:
+            store (TraceStore): An existing trace store.
+        """
+        self.store = store
+        self.entities, self.offsets = store.index()
+        self._columns = {column: store.column(column) for column in TraceStore.COLUMNS}
+
+    @classmethod
+    def from_frame(cls, file_name, trace, root=None):
+        """
+        Writes a formatted trace to its TraceStore and maps it.
+
+        Args:
+            file_name (str): Name of the file the trace belongs to.
+            trace (pd.DataFrame): Trace with 'id', 'time', 'x', 'y' and 'z' columns.
+            root (str): Directory holding every store. Defaults to settings.TRACE_STORE_DIR.
+
+        Returns:
+            TraceArrays: The mapped trace.
+        """
+        return cls(TraceStore.write(file_name, trace, root))
+
+    def __reduce__(self):
+        return self.__class__, (self.store,)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, column):
+        """
+        Returns a whole column as a read-only array backed by the mapped file.
+
+        Args:
+            column (str): One of TraceStore.COLUMNS.
+        """
+        return np.asarray(self._columns[column])
+
+    @property
+    def num_entities(self):
+        return len(self.entities)
+
+    def entity(self, index, columns=('x', 'y', 'z', 'time')):
+        """
+        Returns the columns of one entity as views over the mapped files.
+
+        Args:
+            index (int): Position of the entity in `entities`.
+            columns (tuple): Columns to return.
+
+        Returns:
+            tuple: One array per requested column, sorted by time.
+        """
+        start, end = self.offsets[index], self.offsets[index + 1]
+
+        return tuple(self[column][start:end] for column in columns)
+
+    def entity_frame(self, index):
+        """
+        Returns one entity as a small DataFrame in the layout produced by Format.
+
+        Args:
+            index (int): Position of the entity in `entities`.
+
+        Returns:
+            pd.DataFrame: The rows of the entity, sorted by time.
+        """
+        return pd.DataFrame(dict(zip(TraceStore.COLUMNS, self.entity(index, TraceStore.COLUMNS))))
@@ -0,0 +1,237 @@
+# Standard library imports.
+import os
+import shutil
+import tempfile
+
+# Related third party imports.
+import numpy as np
+
+# Local application/library specific imports.
+from .trace_store import STORE_DTYPES, TraceStore
+
+# Each level keeps one point out of LOD_FACTOR of the previous one
+LOD_FACTOR = 4
+
+# No coarser level is built once a level has at most this many points
+LOD_MIN_POINTS = 1000
+
+# Cells per side of the density grid
+DENSITY_RESOLUTION = 512
+
+# Rows binned at once when building the density grid
+DENSITY_CHUNK = 1 << 22
+
+
+class TraceLOD:
+    """
+    Level-of-detail pyramid of a stored trace, for plotting.
+
+    Level k keeps every (LOD_FACTOR ** k)-th point of each entity plus its last point, so
+    every entity is still drawn, from its first to its last position, at every level. Each
+    level is laid out as a TraceStore (columns plus entity offsets) in the `lod` directory
+    of the store, next to a density grid counting the points of the whole trace.
+
+    Attributes:
+        store (TraceStore): The full-resolution trace, which is level 0.
+        path (str): Directory holding the levels and the density grid.
+    """
+
+    def __init__(self, store):
+        """
+        Args:
+            store (TraceStore): The store of the trace.
+        """
+        self.store = store
+        self.path = os.path.join(store.path, 'lod')
+
+    @classmethod
+    def build(cls, store):
+        """
+        Builds the levels and the density grid of a stored trace, replacing any previous ones.
+
+        Args:
+            store (TraceStore): An existing trace store.
+
+        Returns:
+            TraceLOD: The pyramid of the store.
+        """
+        lod = cls(store)
+        columns = {column: store.column(column) for column in TraceStore.COLUMNS}
+        entities, offsets = store.index()
+
+        staging = tempfile.mkdtemp(dir=store.path)
+
+        try:
+            level, stride = 1, LOD_FACTOR
+            num_points = len(columns['id'])
+
+            while num_points > LOD_MIN_POINTS:
+                rows, level_offsets = _stride_rows(offsets, stride)
+
+                if len(rows) >= num_points:
+                    break
+
+                directory = os.path.join(staging, f'level-{level}')
+                os.makedirs(directory)
+
+                for column, dtype in STORE_DTYPES.items():
+                    np.save(os.path.join(directory, f'{column}.npy'), np.asarray(columns[column][rows], dtype=dtype))
+
+                np.save(os.path.join(directory, 'entities.npy'), entities)
+                np.save(os.path.join(directory, 'offsets.npy'), level_offsets)
+
+                level, stride, num_points = level + 1, stride * LOD_FACTOR, len(rows)
+
+            counts, bounds = _density(columns['x'], columns['y'], DENSITY_RESOLUTION)
+            np.save(os.path.join(staging, 'density.npy'), counts)
+            np.save(os.path.join(staging, 'density_bounds.npy'), bounds)
+
+            shutil.rmtree(lod.path, ignore_errors=True)
+            os.replace(staging, lod.path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return lod
+
+    def exists(self):
+        """Returns whether the pyramid of the trace has been built."""
+        return os.path.isdir(self.path)
+
+    def level(self, level):
+        """
+        Returns a level of the pyramid.
+
+        Args:
+            level (int): 0 for the full trace, up to the number of levels.
+
+        Returns:
+            TraceStore: The level, readable like the full store.
+        """
+        if level == 0:
+            return self.store
+
+        store = TraceStore(self.store.file_name, self.store.root)
+        store.path = os.path.join(self.path, f'level-{level}')
+
+        return store
+
+    def num_levels(self):
+        """Returns the number of levels, counting the full trace."""
+        return 1 + sum(name.startswith('level-') for name in os.listdir(self.path))
+
+    def read(self, max_points, entity_ids=None, columns=None):
+        """
+        Reads the finest level whose selected entities have at most `max_points` points.
+
+        Only the index of each level is loaded to pick it; the rows are then read from that
+        level alone. If even the coarsest level is larger, the coarsest level is returned.
+
+        Args:
+            max_points (int): Maximum number of points wanted.
+            entity_ids (iterable): Only read these entities. Defaults to every entity.
+            columns (iterable): Columns to read. Defaults to TraceStore.COLUMNS.
+
+        Returns:
+            pd.DataFrame: The selected rows of the level, sorted by 'id' and 'time'.
+        """
+        entity_ids = None if entity_ids is None else list(entity_ids)
+        levels = self.num_levels()
+
+        for level in range(levels):
+            store = self.level(level)
+
+            if level == levels - 1 or _count(store, entity_ids) <= max_points:
+                return store.read(entity_ids=entity_ids, columns=columns)
+
+    def density(self, resolution=None):
+        """
+        Returns the density grid of the trace, optionally merged into coarser cells.
+
+        Args:
+            resolution (int): Cells per side. Must divide DENSITY_RESOLUTION. Defaults to it.
+
+        Returns:
+            tuple: (counts, x_edges, y_edges) where counts[i, j] is the number of points with
+                   x in [x_edges[i], x_edges[i + 1]) and y in [y_edges[j], y_edges[j + 1]).
+        """
+        counts = np.load(os.path.join(self.path, 'density.npy'))
+        x_min, x_max, y_min, y_max = np.load(os.path.join(self.path, 'density_bounds.npy'))
+
+        if resolution is not None and resolution != len(counts):
+            merge = len(counts) // resolution
+            counts = counts.reshape(resolution, merge, resolution, merge).sum(axis=(1, 3))
+
+        return (
+            counts,
+            np.linspace(x_min, x_max, len(counts) + 1),
+            np.linspace(y_min, y_max, len(counts) + 1),
+        )
+
+
+def _stride_rows(offsets, stride):
+    """
+    Selects every `stride`-th row of each entity range, plus the last row of the range.
+
+    Args:
+        offsets (np.ndarray): Start row of each entity, followed by the number of rows.
+        stride (int): Step between kept rows.
+
+    Returns:
+        tuple: (rows, offsets) of the kept rows and of each entity among them.
+    """
+    sizes = np.diff(offsets)
+
+    counts = (sizes - 1) // stride + 1 + ((sizes - 1) % stride != 0)
+    level_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    entity = np.repeat(np.arange(len(sizes)), counts)
+    position = np.arange(level_offsets[-1]) - level_offsets[entity]
+
+    rows = offsets[entity] + np.minimum(position * stride, sizes[entity] - 1)
+
+    return rows, level_offsets
+
+
+def _density(x, y, resolution):
+    """
+    Counts the points of each cell of a square grid over the bounding box of the trace.
+
+    Returns:
+        tuple: (counts, bounds) with the (resolution, resolution) counts and the
+               [x_min, x_max, y_min, y_max] bounds of the grid.
+    """
+    counts = np.zeros(resolution * resolution, dtype=np.int64)
+
+    if len(x) == 0:
+        return counts.reshape(resolution, resolution), np.zeros(4)
+
+    bounds = np.array([np.min(x), np.max(x), np.min(y), np.max(y)], dtype=np.float64)
+    x_width = (bounds[1] - bounds[0]) or 1.0
+    y_width = (bounds[3] - bounds[2]) or 1.0
+
+    for start in range(0, len(x), DENSITY_CHUNK):
+        chunk_x = np.asarray(x[start:start + DENSITY_CHUNK])
+        chunk_y = np.asarray(y[start:start + DENSITY_CHUNK])
+
+        i = np.minimum(((chunk_x - bounds[0]) / x_width * resolution).astype(np.int64), resolution - 1)
+        j = np.minimum(((chunk_y - bounds[2]) / y_width * resolution).astype(np.int64), resolution - 1)
+
+        counts += np.bincount(i * resolution + j, minlength=resolution * resolution)
+
+    return counts.reshape(resolution, resolution), bounds
+
+
+def _count(store, entity_ids):
+    """Returns the number of points of the selected entities in a level, from its index only."""
+    entities, offsets = store.index()
+
+    if entity_ids is None:
+        return int(offsets[-1])
+
+    wanted = np.unique(np.asarray(entity_ids, dtype=entities.dtype))
+    positions = np.searchsorted(entities, wanted)
+    found = positions < len(entities)
+    positions = positions[found][entities[positions[found]] == wanted[found]]
+
+    return int((offsets[positions + 1] - offsets[positions]).sum())
@@ -0,0 +1,252 @@
+# Standard library imports.
+import os
+import shutil
+import tempfile
+from urllib.parse import quote
+
+# Related third party imports.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+# Local application/library specific imports.
+from .partition import entity_offsets
+
+STORE_DTYPES = {
+    'id': np.int64,
+    'time': np.float64,
+    'x': np.float64,
+    'y': np.float64,
+    'z': np.float64,
+}
+
+
+class TraceStore:
+    """
+    Columnar on-disk storage of the formatted trace of one file.
+
+    Each column is an `.npy` file sorted by entity and time, so every entity occupies a
+    contiguous range recorded in `entities.npy`/`offsets.npy`. Columns are opened memory
+    mapped; reads restricted to some entities or to a time range only touch the pages of
+    the selected ranges.
+
+    Attributes:
+        file_name (str): Name of the file the trace belongs to.
+        path (str): Directory holding the columns of the trace.
+    """
+
+    COLUMNS = tuple(STORE_DTYPES)
+
+    def __init__(self, file_name, root=None):
+        """
+        Initialize the TraceStore of a file. Nothing is read until it is used.
+
+        Args:
+            file_name (str): Name of the file the trace belongs to.
+            root (str): Directory holding every store. Defaults to settings.TRACE_STORE_DIR.
+        """
+        self.file_name = file_name
+        self.root = str(root or settings.TRACE_STORE_DIR)
+        self.path = os.path.join(self.root, f"{quote(file_name, safe='')}.trace")
+
+    @classmethod
+    def write(cls, file_name, trace, root=None):
+        """
+        Stores a formatted trace, replacing any previous store of the file.
+
+        Args:
+            file_name (str): Name of the file the trace belongs to.
+            trace (pd.DataFrame): Trace with 'id', 'time', 'x', 'y' and 'z' columns.
+            root (str): Directory holding every store. Defaults to settings.TRACE_STORE_DIR.
+
+        Returns:
+            TraceStore: The store of the file.
+        """
+        if not trace['id'].is_monotonic_increasing:
+            trace = trace.sort_values(by=['id', 'time'], kind='stable')
+
+        entities, offsets = entity_offsets(trace['id'].to_numpy(dtype=STORE_DTYPES['id']))
+        columns = {column: trace[column].to_numpy() for column in STORE_DTYPES}
+
+        return cls.write_parts(file_name, entities, offsets, [columns], root)
+
+    @classmethod
+    def write_parts(cls, file_name, entities, offsets, parts, root=None):
+        """
+        Stores a trace given as parts holding disjoint sets of entities, replacing any
+        previous store of the file. Only one part is held in memory at a time.
+
+        Every column is preallocated on disk with the final number of rows, and each part
+        is copied to the rows of its entities, so the parts may come in any order.
+
+        Args:
+            file_name (str): Name of the file the trace belongs to.
+            entities (np.ndarray): Sorted ids of every entity of the trace.
+            offsets (np.ndarray): Start row of each entity, followed by the number of rows.
+            parts (iterable): dicts with one array per column of STORE_DTYPES, sorted by
+                              'id' and 'time'.
+            root (str): Directory holding every store. Defaults to settings.TRACE_STORE_DIR.
+
+        Returns:
+            TraceStore: The store of the file.
+        """
+        store = cls(file_name, root)
+        os.makedirs(store.root, exist_ok=True)
+
+        entities = np.asarray(entities, dtype=STORE_DTYPES['id'])
+        offsets = np.asarray(offsets, dtype=np.int64)
+
+        # Written next to the final location and swapped in, so readers never see a partial store
+        staging = tempfile.mkdtemp(dir=store.root)
+
+        try:
+            columns = {
+                column: np.lib.format.open_memmap(
+                    os.path.join(staging, f'{column}.npy'), mode='w+', dtype=dtype, shape=(int(offsets[-1]),)
+                )
+                for column, dtype in STORE_DTYPES.items()
+            }
+
+            for part in parts:
+                rows = _part_rows(part['id'], entities, offsets)
+
+                for column, values in columns.items():
+                    values[rows] = part[column]
+
+            for values in columns.values():
+                values.flush()
+            del columns
+
+            np.save(os.path.join(staging, 'entities.npy'), entities)
+            np.save(os.path.join(staging, 'offsets.npy'), offsets)
+
+            store.delete()
+            os.replace(staging, store.path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return store
+
+    def exists(self):
+        """Returns whether the trace of the file has been stored."""
+        return os.path.isdir(self.path)
+
+    def delete(self):
+        """Removes the stored trace of the file, if any."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def column(self, name):
+        """
+        Opens a column memory mapped.
+
+        Args:
+            name (str): One of TraceStore.COLUMNS.
+
+        Returns:
+            np.ndarray: Read-only memory-mapped column.
+        """
+        return np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')
+
+    def index(self):
+        """
+        Returns:
+            tuple: (entities, offsets) where entity `entities[i]` occupies the rows
+                   [offsets[i], offsets[i + 1]) of every column.
+        """
+        return (
+            np.load(os.path.join(self.path, 'entities.npy')),
+            np.load(os.path.join(self.path, 'offsets.npy')),
+        )
+
+    def read(self, entity_ids=None, time_range=None, columns=None):
+        """
+        Reads the trace, or part of it, as a DataFrame in the layout produced by Format.
+
+        Args:
+            entity_ids (iterable): Only read these entities. Defaults to every entity.
+            time_range (tuple): (start, end) inclusive bounds on 'time'. Either bound may be None.
+            columns (iterable): Columns to read. Defaults to TraceStore.COLUMNS.
+
+        Returns:
+            pd.DataFrame: The selected rows, sorted by 'id' and 'time'.
+        """
+        columns = tuple(columns or self.COLUMNS)
+        rows = self._select(entity_ids, time_range)
+
+        return pd.DataFrame({column: np.asarray(self.column(column)[rows]) for column in columns})
+
+    def _select(self, entity_ids, time_range):
+        """
+        Resolves the entity and time predicates to the rows to read.
+
+        Returns:
+            slice or np.ndarray: The selected rows, in storage order.
+        """
+        entities, offsets = self.index()
+
+        if entity_ids is None:
+            positions = np.arange(len(entities))
+        else:
+            wanted = np.unique(np.asarray(list(entity_ids), dtype=entities.dtype))
+            positions = np.searchsorted(entities, wanted)
+            found = positions < len(entities)
+            positions = positions[found][entities[positions[found]] == wanted[found]]
+
+        starts, ends = offsets[positions], offsets[positions + 1]
+
+        if time_range is not None:
+            start_time, end_time = time_range
+            time = self.column('time')
+
+            # Time is sorted within each entity, so each range is narrowed with a binary search
+            for index, (start, end) in enumerate(zip(starts, ends)):
+                entity_time = time[start:end]
+
+                if start_time is not None:
+                    starts[index] = start + np.searchsorted(entity_time, start_time, side='left')
+                if end_time is not None:
+                    ends[index] = start + np.searchsorted(entity_time, end_time, side='right')
+
+        if entity_ids is None and time_range is None:
+            return slice(0, int(offsets[-1]))
+
+        kept = ends > starts
+        starts, ends = starts[kept], ends[kept]
+
+        if len(starts) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Concatenated aranges of every [start, end) range
+        steps = np.ones(int((ends - starts).sum()), dtype=np.int64)
+        steps[0] = starts[0]
+        steps[np.cumsum(ends - starts)[:-1]] = starts[1:] - ends[:-1] + 1
+
+        return np.cumsum(steps)
+
+
+def _part_rows(ids, entities, offsets):
+    """
+    Returns the rows of the store a part is copied to.
+
+    Args:
+        ids (np.ndarray): Sorted 'id' column of the part.
+        entities (np.ndarray): Sorted ids of every entity of the trace.
+        offsets (np.ndarray): Start row of each entity, followed by the number of rows.
+
+    Returns:
+        slice or np.ndarray: The rows of each entity of the part, in the order of the part.
+    """
+    if len(ids) == 0:
+        return slice(0, 0)
+
+    part_entities, part_offsets = entity_offsets(ids)
+    starts = offsets[np.searchsorted(entities, part_entities)]
+
+    # Entities that are also consecutive in the store are copied as one block
+    if np.array_equal(starts - starts[0], part_offsets[:-1]):
+        return slice(int(starts[0]), int(starts[0]) + len(ids))
+
+    lengths = np.diff(part_offsets)
+
+    return np.arange(len(ids)) + np.repeat(starts - part_offsets[:-1], lengths)
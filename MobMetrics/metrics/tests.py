@@ -0,0 +1,202 @@
+# Standard library imports.
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from unittest import mock
+
+# Related third party imports.
+import numpy as np
+from django.test import TestCase, TransactionTestCase, override_settings
+
+# Local application/library specific imports.
+from . import views
+from .benchmarks.runner import benchmark_parameters
+from .benchmarks.synthetic import synthetic_trace
+from .metrics.spatial.trajectory_correlation import QUARTILES
+from .metrics.utils.cosine_statistics import cosine_percentiles, normalize_rows
+from .models import ConfigModel, ContactModel, MetricsModel, ProcessingJobModel
+from .process.factory import Factory
+from .process.instrumentation import ExtractionProfiler
+from .process import jobs
+from .process.jobs import claim_next_job, enqueue, run_job
+from .process.trace_arrays import TraceArrays
+from .process.trace_store import TraceStore
+
+# Queries issued by each stage of an extraction, inside the transaction of a test. They must
+# not depend on the size of the trace: a stage whose count grows with the entities is
+# querying once per row again.
+STAGE_QUERIES = {
+    'Per-entity metrics': 0,
+    'Stay points': 0,
+    'Write entity rows': 6,
+    'Entropy': 2,
+    'Importance degree': 2,
+    'Contacts': 3,
+    'Global metrics': 14,
+    'Quadrant entropy': 5,
+    'Trajectory correlation': 1,
+    'Visit time CV': 3,
+    'Speed CV': 3,
+}
+
+
+class QueryCountProfiler(ExtractionProfiler):
+    """Profiler that asserts the number of queries of every stage with assertNumQueries."""
+
+    def __init__(self, test_case):
+        """
+        Args:
+            test_case (TestCase): The test the assertions belong to.
+        """
+        super().__init__()
+        self.test_case = test_case
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        with self._expect(name, STAGE_QUERIES[name]), super().stage(name, rows) as record:
+            yield record
+
+    @contextmanager
+    def interleaved(self, *names):
+        queries = sum(STAGE_QUERIES[name] for name in names)
+
+        with self._expect(' + '.join(names), queries), super().interleaved(*names) as lap:
+            yield lap
+
+    @contextmanager
+    def _expect(self, name, queries):
+        with self.test_case.subTest(stage=name), self.test_case.assertNumQueries(queries):
+            yield
+
+
+class TraceStoreTestCase(TestCase):
+    """TestCase whose trace stores are written to a temporary directory."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+        settings = override_settings(TRACE_STORE_DIR=os.path.join(self.directory, 'trace_store'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class ExtractionQueryCountTest(TraceStoreTestCase):
+    """Every stage of Factory.extract issues the same number of queries for any trace size."""
+
+    def _extract(self, entities):
+        parameters = benchmark_parameters()
+        trace = synthetic_trace(entities=entities, points=200, dwells=2, dwell_points=40, seed=1)
+        profiler = QueryCountProfiler(self)
+
+        Factory(TraceArrays.from_frame(parameters[4], trace), parameters, workers=1, profiler=profiler).extract()
+
+        self.assertEqual(list(profiler.stages), list(STAGE_QUERIES))
+
+    def test_small_trace(self):
+        self._extract(entities=3)
+
+    def test_larger_trace(self):
+        self._extract(entities=12)
+
+
+class RunJobTest(TraceStoreTestCase):
+    """Processing of the queued uploads by run_job."""
+
+    def _run(self, file_name, **trace_options):
+        path = os.path.join(self.directory, f'{file_name}.csv')
+        synthetic_trace(points=200, dwells=2, dwell_points=40, **trace_options).to_csv(path, index=False)
+
+        parameters = benchmark_parameters()
+        parameters[4] = file_name
+        enqueue(path, parameters)
+
+        job = claim_next_job()
+        run_job(job)
+        job.refresh_from_db()
+
+        return job
+
+    def test_trace_without_contacts(self):
+        # Entities walking far apart in a large area never come within the contact radius
+        job = self._run('sparse', entities=3, contact_density=0, area=1e7)
+
+        self.assertEqual(job.state, ProcessingJobModel.DONE, job.error)
+        self.assertFalse(ContactModel.objects.filter(file_name='sparse').exists())
+        self.assertEqual(
+            set(MetricsModel.objects.filter(file_name='sparse').values_list('num_contacts', flat=True)), {0}
+        )
+
+    def test_existing_file_is_kept(self):
+        self._run('trace', entities=3)
+        rows = MetricsModel.objects.filter(file_name='trace').count()
+
+        job = self._run('trace', entities=5, seed=1)
+
+        self.assertEqual(job.state, ProcessingJobModel.FAILED)
+        self.assertIn("already processed", job.error)
+        self.assertEqual(ConfigModel.objects.filter(file_name='trace').count(), 1)
+        self.assertEqual(MetricsModel.objects.filter(file_name='trace').count(), rows)
+        self.assertEqual(len(TraceStore('trace').index()[0]), 3)
+
+    def test_job_failed_while_running_stays_failed(self):
+        create_config_model = jobs.create_config_model
+
+        def fail_then_register(parameters):
+            # What fail_stale_jobs does from another worker when the heartbeats stopped
+            ProcessingJobModel.objects.filter(file_name=parameters[4]).update(
+                state=ProcessingJobModel.FAILED, error="stale"
+            )
+            create_config_model(parameters)
+
+        with mock.patch.object(jobs, 'create_config_model', fail_then_register):
+            job = self._run('trace', entities=3)
+
+        self.assertEqual(job.state, ProcessingJobModel.FAILED)
+        self.assertEqual(job.error, "stale")
+        self.assertFalse(ConfigModel.objects.filter(file_name='trace').exists())
+        self.assertFalse(MetricsModel.objects.filter(file_name='trace').exists())
+
+
+class CosinePercentilesTest(TestCase):
+    """The blocked and sampled percentiles agree with the exact pairwise similarities."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.normal(size=(300, 4))
+
+        rows = normalize_rows(self.vectors)
+        upper = np.triu_indices(len(rows), k=1)
+        self.exact = np.percentile((rows @ rows.T)[upper], QUARTILES)
+
+    def test_blocked(self):
+        np.testing.assert_allclose(cosine_percentiles(self.vectors, QUARTILES, block_size=64), self.exact, atol=1e-4)
+
+    def test_sampled(self):
+        np.testing.assert_allclose(cosine_percentiles(self.vectors, QUARTILES, sample_size=20000), self.exact, atol=0.03)
+
+
+class DashboardFragmentTest(TransactionTestCase):
+    """Plots without data render a notice, any other error is a server error.
+
+    The fragments are built in a worker thread, which only sees committed rows.
+    """
+
+    def setUp(self):
+        parameters = benchmark_parameters()
+        parameters[4] = 'trace'
+        jobs.create_config_model(parameters)
+        self.client.raise_request_exception = False
+
+    def test_plot_without_data(self):
+        response = self.client.get('/fragments/stay_points/', {'fileName': 'trace'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['html'], views.NO_DATA_FRAGMENT)
+
+    def test_plot_error(self):
+        with mock.patch.object(views, 'plot_stay_points', side_effect=ValueError("broken plot")):
+            response = self.client.get('/fragments/stay_points/', {'fileName': 'trace'})
+
+        self.assertEqual(response.status_code, 500)
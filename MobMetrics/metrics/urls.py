@@ -6,4 +6,7 @@ from . import views
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),  # Main view
+    path('jobs/<int:job_id>/', views.job_status_view, name='job_status'),  # Processing job progress
+    path('profile/', views.extraction_profile_view, name='extraction_profile'),  # Extraction profile export
+    path('fragments/<str:name>/', views.dashboard_fragment_view, name='dashboard_fragment'),  # Lazily loaded plots
 ]
@@ -0,0 +1,101 @@
+# Standard library imports.
+import sys
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    In-process cache bounded by the total size of its values, evicting the least recently
+    used entries first. Safe to share between threads.
+
+    Attributes:
+        max_bytes (int): Maximum total size of the cached values.
+        size (int): Current total size of the cached values.
+        hits (int): Lookups that found their key.
+        misses (int): Lookups that did not.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): Maximum total size of the cached values. 0 disables the cache.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for `key`, marking it as the most recently used.
+
+        Args:
+            key (hashable): Key of the entry.
+            default (Any): Returned if the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[0]
+
+    def set(self, key, value, size=None):
+        """
+        Caches a value, evicting the least recently used entries until it fits.
+
+        Args:
+            key (hashable): Key of the entry.
+            value (Any): Value to cache.
+            size (int, optional): Size of the value. Defaults to its length for strings and
+                                  bytes, or sys.getsizeof otherwise.
+        """
+        if size is None:
+            size = len(value) if isinstance(value, (str, bytes)) else sys.getsizeof(value)
+
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+
+            while self._entries and self.size + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+    def discard(self, predicate):
+        """
+        Removes every entry whose key matches.
+
+        Args:
+            predicate (callable): Called with each key; entries returning True are removed.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._remove(key)
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self.size -= entry[1]
@@ -8,18 +8,20 @@ import subprocess
 
 # Related third party imports.
 import pandas as pd
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404
 from django.contrib import messages
-from django.http import HttpResponse
-from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse
 from django.conf import settings
+from django.db import connection
 
 # Local application/library specific imports.
 from .forms import UploadForm, FileNameForm, DataAnalytcsParamsForm,ModelSelectForm,BonnmotionMobmetricsForm,BonnmotionScenarioForm,BonnmotionRandomSpeedBase,BoundlessForm,ColumnForm,DisasterAreaForm,OriginalGaussMarkovForm,GaussMarkovForm,ManhattanGridForm,RandomStreetForm,MSLAWForm,NomadicForm,ProbRandomWalkForm,PursueForm,RandomDirectionForm,RandomWalkForm,RandomWaypointForm,RPGMForm,SLAWForm,SMOOTHForm,StaticForm,StaticDriftForm,SteadyStateRandomWaypointForm,SWIMForm,TIMMForm,TLWForm
 from .utils.csv_converter import convert
 from .utils.model_params import functions
-from .process.factory import Factory
-from .process.format import Format
+from .process.jobs import ACTIVE_STATES, enqueue, is_active, is_taken, save_upload, start_worker, delete_file_data
+from .process.trace_store import TraceStore
+from .process.DataAnalytcs.feature_matrix import FeatureMatrix, analytics_cache, datasets_version
 from .process.DataAnalytcs.pca import PCA
 from .process.DataAnalytcs.tSNE import tSNE
 from .process.DataAnalytcs.clustering.DBscan import DBscan # Não será usado diretamente para plot, mas sim para dados
@@ -46,12 +48,19 @@ from .visualizations.metrics.global_metrics import (
     plot_metric_histogram,
     plot_metric_boxplot
 )
+from .visualizations.exceptions import NoPlotData
 
 from .models import (ConfigModel, MetricsModel,
                       JourneyModel, StayPointModel,
                       VisitModel, ContactModel,
                       QuadrantEntropyModel, GlobalMetricsModel,
-                      TraceModel)
+                      ProcessingJobModel, ExtractionProfileModel)
+
+# Plots of the dashboard served by dashboard_fragment_view
+DASHBOARD_FRAGMENTS = ('trace', 'trace_in_time', 'stay_points', 'radar', 'histogram', 'boxplot', 'comparison')
+
+# Shown in place of a plot that has no data, e.g. the stay points of a file without any
+NO_DATA_FRAGMENT = '<p class="text-muted small mb-0">No data available for this plot.</p>'
 
 def dashboard_view(request):
     """
@@ -135,53 +144,16 @@ def dashboard_view(request):
 
     last_config = ConfigModel.objects.last()
 
-    entity_id = request.GET.get('entity_id')
-    stay_point_id = request.GET.get('stay_point_id')
-    trace_in_time_html = None
-
+    # The plots are fetched by the page from dashboard_fragment_view once it is shown
     if last_config:
         file_name = last_config.file_name
         metrics = MetricsModel.objects.filter(file_name=file_name).order_by("entity_id")
         global_metrics = GlobalMetricsModel.objects.filter(file_name=file_name).first()
         staypoints = StayPointModel.objects.filter(file_name=file_name).order_by("stay_point_id")
-        trace_plot_html = plot_trace_entities(file_name=file_name, max_points=5000)
-        radar_chart_html = plot_radar_chart(file_name=file_name)
-        stay_points_html = plot_stay_points(file_name=file_name)
-
-        if entity_id is not None:
-            try:
-                entity_id = int(entity_id)
-                trace_in_time_html = plot_trace_in_time(file_name=file_name, entity_id=entity_id)
-                travel_distance_compare_plot_html = plot_travel_distance_comparison(file_name=file_name, entity_id=entity_id)
-                metric_histogram_html = plot_metric_histogram(file_name=file_name)
-                metric_boxplot_html = plot_metric_boxplot(file_name=file_name)
-            except ValueError:
-                trace_in_time_html = plot_trace_in_time(file_name=file_name)
-        else:
-            trace_in_time_html = plot_trace_in_time(file_name=file_name)
-            travel_distance_compare_plot_html = plot_travel_distance_comparison(file_name=file_name, entity_id=0)
-            metric_histogram_html = plot_metric_histogram(file_name=file_name)
-            metric_boxplot_html = plot_metric_boxplot(file_name=file_name)
-        
-        if stay_point_id is not None:
-            try:
-                stay_point_id = int(stay_point_id)
-                stay_points_html = plot_stay_points(file_name=file_name, highlight_spId=stay_point_id)
-            except ValueError:
-                stay_points_html = plot_stay_points(file_name=file_name)
-        else:
-            stay_points_html = plot_stay_points(file_name=file_name)
-
     else:
         metrics = None
         global_metrics = None
         staypoints = None
-        trace_plot_html = None
-        radar_chart_html = None
-        travel_distance_compare_plot_html = None
-        metric_histogram_html = None
-        metric_boxplot_html = None
-        stay_points_html = None
 
     return render(request, 'base.html', {
         'upload_form': upload_form,
@@ -216,19 +188,15 @@ def dashboard_view(request):
 
         'analytcs_form': analytcs_form,
         'file_names': file_names,
+        'active_jobs': ProcessingJobModel.objects.filter(state__in=ACTIVE_STATES).order_by('id'),
 
         # Pass HTML variables directly to the context
         'metrics': metrics,
         'staypoints': staypoints,
         'global_metrics': global_metrics,
         'last_file_name': last_config.file_name if last_config else None,
-        'trace_plot_html': trace_plot_html,
-        'radar_chart_html': radar_chart_html,
-        'trace_in_time_html': trace_in_time_html,
-        'travel_distance_compare_plot': travel_distance_compare_plot_html,
-        'metric_histogram': metric_histogram_html,
-        'metric_boxplot': metric_boxplot_html,
-        'stay_point_scatter_plot': stay_points_html,
+        'selected_entity_id': _int_param(request.GET, 'entity_id'),
+        'selected_staypoint_id': _int_param(request.GET, 'stay_point_id'),
         'pca_metrics_plot_html': pca_metrics_plot_html,
         'pca_explained_plot_html': pca_explained_plot_html,
         'pca_dbscan_metrics_plot_html': pca_dbscan_metrics_plot_html,
@@ -238,9 +206,130 @@ def dashboard_view(request):
         'tsne_global_plot_html': tsne_global_plot_html,
     })
 
+def job_status_view(request, job_id):
+    """
+        Reports the state and progress of a processing job, for polling from the dashboard.
+
+        Returns:
+            JsonResponse: The job state, running stage and progress counters.
+    """
+    job = get_object_or_404(ProcessingJobModel, pk=job_id)
+
+    return JsonResponse({
+        'id': job.id,
+        'file_name': job.file_name,
+        'state': job.state,
+        'stage': job.stage,
+        'progress': job.progress,
+        'total': job.total,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+def extraction_profile_view(request):
+    """
+        Exports the per-stage profile of a file's extraction as JSON.
+
+        Returns:
+            JsonResponse: Wall time, CPU time, peak RSS, rows and query count of each stage.
+    """
+    profile = get_object_or_404(ExtractionProfileModel, file_name=request.GET.get('fileName'))
+
+    return JsonResponse(_profile_data(profile))
+
+async def dashboard_fragment_view(request, name):
+    """
+        Renders one plot of the dashboard, so the page can fetch its plots in parallel and show
+        each one as soon as it is ready. The plot is built in a worker thread, so concurrent
+        fragments are built concurrently.
+
+        Query parameters:
+            fileName (str): File of the plot. Defaults to the last processed file.
+            entity_id (int): Entity of the 'trace_in_time' and 'comparison' fragments.
+            stay_point_id (int): Stay point highlighted by the 'stay_points' fragment.
+
+        Returns:
+            JsonResponse: The name of the fragment and its HTML.
+    """
+    if name not in DASHBOARD_FRAGMENTS:
+        raise Http404(f"Unknown fragment '{name}'.")
+
+    html = await sync_to_async(_render_fragment, thread_sensitive=False)(name, request.GET.copy())
+
+    return JsonResponse({'name': name, 'html': html})
+
+def _render_fragment(name, params):
+    """
+        Builds the HTML of a dashboard fragment, or an empty string when no file is processed.
+        A plot that raises NoPlotData (e.g. for a file without stay points, or an unknown
+        entity) renders as a short notice instead; any other error reaches the error handler.
+
+        It runs in a worker thread of its own, so the database connection of that thread is
+        closed once the fragment is built.
+    """
+    try:
+        file_name = params.get('fileName')
+        if not file_name:
+            file_name = ConfigModel.objects.values_list('file_name', flat=True).last()
+
+        if not file_name:
+            return ""
+
+        return _fragment_html(name, file_name, params)
+    except NoPlotData:
+        return NO_DATA_FRAGMENT
+    finally:
+        connection.close()
+
+def _fragment_html(name, file_name, params):
+    """
+        Builds the plot of a dashboard fragment for a file.
+    """
+    entity_id = _int_param(params, 'entity_id')
+    stay_point_id = _int_param(params, 'stay_point_id')
+
+    if name == 'trace':
+        return plot_trace_entities(file_name=file_name, max_points=5000)
+    elif name == 'trace_in_time':
+        if entity_id is None:
+            return plot_trace_in_time(file_name=file_name)
+        return plot_trace_in_time(file_name=file_name, entity_id=entity_id)
+    elif name == 'stay_points':
+        if stay_point_id is None:
+            return plot_stay_points(file_name=file_name)
+        return plot_stay_points(file_name=file_name, highlight_spId=stay_point_id)
+    elif name == 'radar':
+        return plot_radar_chart(file_name=file_name)
+    elif name == 'histogram':
+        return plot_metric_histogram(file_name=file_name)
+    elif name == 'boxplot':
+        return plot_metric_boxplot(file_name=file_name)
+    elif name == 'comparison':
+        return plot_travel_distance_comparison(file_name=file_name, entity_id=entity_id or 0)
+
+def _int_param(params, name):
+    """
+        Returns a query parameter as an int, or None when it is missing or not an integer.
+    """
+    try:
+        return int(params[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _profile_data(profile):
+    """ Function responsable to build the JSON export of an ExtractionProfileModel """
+    return {
+        'file_name': profile.file_name,
+        'total_wall_time': profile.total_wall_time,
+        'updated_at': profile.updated_at.isoformat(),
+        'stages': profile.stages,
+    }
+
 def _handle_upload(request):
     """
-        Function responsable to get the UploadForm and process all metrics
+        Function responsable to get the UploadForm and queue the upload for processing
 
         Return:
             file_names (list): List of uploaded file names.
@@ -252,18 +341,15 @@ def _handle_upload(request):
         trace_file, parameters = _get_data(upload_form)
         file_name = parameters[4]
 
-        if ConfigModel.objects.filter(file_name=file_name).exists():
+        if is_taken(file_name):
             messages.warning(request, "A file with the same name already exists.")
         else:
-            data_frame = pd.read_csv(trace_file)
-            data_frame = Format(data_frame).extract()
-
-            _create_config_model(parameters)
-            _create_trace_model(parameters, data_frame)
+            job = enqueue(save_upload(trace_file), parameters)
 
-            Factory(data_frame, parameters).extract()
+            if settings.JOB_AUTOSTART_WORKER:
+                start_worker()
 
-            messages.success(request, "Upload and processing completed.")
+            messages.success(request, f"Upload queued for processing (job {job.id}).")
 
     file_names = ConfigModel.objects.values_list('file_name', flat=True).distinct()
 
@@ -278,18 +364,14 @@ def _handle_delete(request):
     """
 
     file_name = request.POST.get('fileName')
-    models_list = [
-            ConfigModel, MetricsModel,
-            JourneyModel, StayPointModel,
-            VisitModel, ContactModel,
-            QuadrantEntropyModel, GlobalMetricsModel,
-            TraceModel
-        ]
 
-    if file_name:
-        for model in models_list:
-            # Delet data from that file name for each Model
-            model.objects.filter(file_name=file_name).delete()
+    if file_name and is_active(file_name):
+        # The job would keep writing rows of the file while they are deleted
+        messages.warning(request, f"'{file_name}' is still being processed; it can be deleted once its job finishes.")
+    elif file_name:
+        # Delet data from that file name for each Model
+        delete_file_data(file_name)
+        ProcessingJobModel.objects.filter(file_name=file_name).exclude(state__in=ACTIVE_STATES).delete()
         messages.success(request, f"Data for '{file_name}' deleted.")
     else:
         messages.error(request, "No file name provided.")
@@ -328,6 +410,16 @@ def _handle_download(request):
                     csv_buffer.seek(0)
                     zip_file.writestr(f'{model_name}.csv', csv_buffer.read())
 
+            trace_store = TraceStore(file_name)
+            if trace_store.exists():
+                csv_buffer = BytesIO()
+                trace_store.read().to_csv(csv_buffer, index=False)
+                zip_file.writestr('Trace.csv', csv_buffer.getvalue())
+
+            profile = ExtractionProfileModel.objects.filter(file_name=file_name).first()
+            if profile is not None:
+                zip_file.writestr('ExtractionProfile.json', json.dumps(_profile_data(profile), indent=2))
+
         zip_buffer.seek(0)
         response = HttpResponse(zip_buffer, content_type='application/zip')
         response['Content-Disposition'] = f'attachment; filename={file_name}.zip'
@@ -367,19 +459,28 @@ def _handle_generate_graphs(request):
 
         dbscan_parameters = (dbscan_eps, dbscan_min_samples)
 
-        # Load data
-        metrics_df = pd.DataFrame.from_records(MetricsModel.objects.all().values())
-        global_metrics_df = pd.DataFrame.from_records(GlobalMetricsModel.objects.all().values())
+        # The same parameters on the same processed files give the same graphs
+        version = datasets_version()
+        graphs_key = (version, 'graphs', (pca_n_components, tsne_n_components, tsne_perplexity, *dbscan_parameters))
+        graphs = analytics_cache.get(graphs_key)
+
+        if graphs is not None:
+            return graphs
+
+        # Standardized data of every processed file, loaded only when the files changed and
+        # shared by all the analyses, whose results are cached along with it
+        columns_metrics, columns_global = _columns_analytics()
 
-        columns_metrics, columns_global = _columns_analytics(metrics_df, global_metrics_df)
+        metrics_features = FeatureMatrix.load(MetricsModel, columns_metrics, version)
+        global_metrics_features = FeatureMatrix.load(GlobalMetricsModel, columns_global, version)
 
         # Perform PCA for metrics and global data
-        pca_metrics_results = PCA(pca_n_components, metrics_df.copy(), columns_metrics, dbscan_parameters).extract()
-        pca_global_metrics_results = PCA(pca_n_components, global_metrics_df.copy(), columns_global, dbscan_parameters).extract()
+        pca_metrics_results = PCA(pca_n_components, metrics_features, dbscan_parameters).extract()
+        pca_global_metrics_results = PCA(pca_n_components, global_metrics_features, dbscan_parameters).extract()
 
         # Perform t-SNE for metrics and global data
-        tsne_metrics_results = tSNE(tsne_n_components, tsne_perplexity, metrics_df.copy(), columns_metrics, dbscan_parameters).extract()
-        tsne_global_metrics_results = tSNE(tsne_n_components, tsne_perplexity, global_metrics_df.copy(), columns_global, dbscan_parameters).extract()
+        tsne_metrics_results = tSNE(tsne_n_components, tsne_perplexity, metrics_features, dbscan_parameters).extract()
+        tsne_global_metrics_results = tSNE(tsne_n_components, tsne_perplexity, global_metrics_features, dbscan_parameters).extract()
 
         
         # PCA - MetricsModel
@@ -443,26 +544,35 @@ def _handle_generate_graphs(request):
             color_by='label'
         )
 
+        graphs = (pca_metrics_plot_html, pca_explained_plot_html, pca_dbscan_metrics_plot_html,
+                  tsne_metrics_plot_html, tsne_dbscan_metrics_plot_html,
+                  pca_global_plot_html, tsne_global_plot_html)
+        analytics_cache.set(graphs_key, graphs, size=sum(len(html) for html in graphs))
+
     return (pca_metrics_plot_html, pca_explained_plot_html, pca_dbscan_metrics_plot_html,
             tsne_metrics_plot_html, tsne_dbscan_metrics_plot_html,
             pca_global_plot_html, tsne_global_plot_html)
 
-def _columns_analytics(metrics_df, global_metrics_df):
+def _columns_analytics():
     """
     Function to define wich metrics will be analysed
 
-    Parameters:
-        - metrics_df (pd.DataFrame): Metrics DataFrame colected from MetricsModel.
-        - global_metrics_df (pd.DataFrame): Global Metrics DataFrame GlobalMetricsModel.
+    Returns:
+        - columns_metrics (list): Columns of MetricsModel to analyse.
+        - columns_global (list): Columns of GlobalMetricsModel to analyse.
     """
 
     # Columns that should be excluded
     exclude_columns_metrics = ['id', 'file_name', 'label', 'entityId', 'x_center', 'y_center', 'z_center']
-    exclude_columns_global = ['id', 'file_name', 'label', 'entityId', 'avgX_center', 'avgY_center', 'avgZ_center']
+    exclude_columns_global = ['id', 'file_name', 'label', 'entityId', 'avgX_center', 'avgY_center', 'avgZ_center',
+                              # Only computed by the blocked and sampled trajectory correlation modes
+                              'trajectory_similarity_q1', 'trajectory_similarity_median', 'trajectory_similarity_q3']
 
-    # Remove those columns from dataframe
-    columns_metrics = [col for col in metrics_df.columns if col not in exclude_columns_metrics]
-    columns_global = [col for col in global_metrics_df.columns if col not in exclude_columns_global]
+    # Remove those columns from the fields of the models
+    columns_metrics = [field.attname for field in MetricsModel._meta.concrete_fields
+                       if field.attname not in exclude_columns_metrics]
+    columns_global = [field.attname for field in GlobalMetricsModel._meta.concrete_fields
+                      if field.attname not in exclude_columns_global]
 
     return columns_metrics, columns_global
 
@@ -497,44 +607,15 @@ def _get_data(form):
 
     return trace_file, parameters
 
-def _create_config_model(parameters):
-    """ Function Responsable to create ConfigModel with all parameters"""
-    ConfigModel.objects.create(
-        file_name = parameters[4],
-        label = parameters[5],
-        is_geographical_coordinates = parameters[6],
-        distance_threshold = parameters[0],
-        time_threshold = parameters[1],
-        radius_threshold = parameters[2],
-        quadrant_parts = parameters[3],
-    )
-
-def _create_trace_model(parameters, df):
-    """Function for creating a TraceModel with all the trace data"""
-    file_name = parameters[4]
-
-    required_columns = {'id', 'x', 'y', 'time'}
-    if not required_columns.issubset(df.columns):
-        raise ValueError(f"DataFrame must contain columns: {required_columns}")
-
-    trace_objects = [
-        TraceModel(
-            file_name=file_name,
-            entity_id=int(row['id']),
-            x=float(row['x']),
-            y=float(row['y']),
-            timestamp=int(row['time'])
-        )
-        for _, row in df.iterrows()
-    ]
-
-    with transaction.atomic():
-        TraceModel.objects.bulk_create(trace_objects, batch_size=1000)
-
 def _handle_bonnmotion(request):
     data = request.POST
     scenario_name = data.get('scenario_name')
     model = data.get('model')
+
+    # The scenario is processed under its name, which must not replace an existing file
+    if is_taken(scenario_name):
+        messages.warning(request, "A file with the same name already exists.")
+        return
     random_seed = data.get('random_seed')
     area_depth = data.get('area_depth')
     use_circular_shape = data.get('use_circular_shape') #TODO Check why it isn't being sent
@@ -579,11 +660,6 @@ def _handle_bonnmotion(request):
     
     convert(scenario_name)
 
-    csvFile = open(f"{scenario_name}.csv",'r')
-
-    data_frame = pd.read_csv(csvFile)
-    data_frame = Format(data_frame).extract()
-
     output_path = f"{settings.AUX_PATH}/generated_scenarios/{model}/{scenario_name}"
     os.makedirs(output_path, exist_ok=True)
     [shutil.move(f, f"{output_path}/{f}") for f in [f"{scenario_name}.params", f"{scenario_name}.movements.gz", f"{scenario_name}.csv"]]
@@ -606,8 +682,10 @@ def _handle_bonnmotion(request):
         True if data.get('skip_contact_detection') else False
     ]
 
-    _create_config_model(parameters)
-    _create_trace_model(parameters, data_frame)
-    
-    Factory(data_frame, parameters).extract()
+    job = enqueue(f"{output_path}/{scenario_name}.csv", parameters)
+
+    if settings.JOB_AUTOSTART_WORKER:
+        start_worker()
+
+    messages.success(request, f"Scenario queued for processing (job {job.id}).")
 
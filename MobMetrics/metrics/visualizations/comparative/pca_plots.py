@@ -21,9 +21,9 @@ def generate_pca_plot_html(data_frame, contributors, n_components, title, color_
     if n_components >= 3:
         fig = px.scatter_3d(
             df,
-            x=contributors[0],
-            y=contributors[1],
-            z=contributors[2],
+            x='PC1',
+            y='PC2',
+            z='PC3',
             color=color_by,
             title=title
         )
@@ -37,8 +37,8 @@ def generate_pca_plot_html(data_frame, contributors, n_components, title, color_
     else:
         fig = px.scatter(
             df,
-            x=contributors[0],
-            y=contributors[1],
+            x='PC1',
+            y='PC2',
             color=color_by,
             title=title
         )
@@ -97,9 +97,9 @@ def generate_dbscan_pca_plot_html(data_frame, contributors, n_components, title,
     if n_components >= 3:
         fig = px.scatter_3d(
             df,
-            x=contributors[0],
-            y=contributors[1],
-            z=contributors[2],
+            x='PC1',
+            y='PC2',
+            z='PC3',
             color=color_by,
             title=title
         )
@@ -113,8 +113,8 @@ def generate_dbscan_pca_plot_html(data_frame, contributors, n_components, title,
     else:
         fig = px.scatter(
             df,
-            x=contributors[0],
-            y=contributors[1],
+            x='PC1',
+            y='PC2',
             color=color_by,
             title=title
         )
@@ -0,0 +1,2 @@
+class NoPlotData(Exception):
+    """Raised by a plot function when the file has no data to show in it."""
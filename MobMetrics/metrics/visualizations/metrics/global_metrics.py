@@ -2,8 +2,11 @@ import pandas as pd
 import plotly.graph_objects as go
 
 from  ...models import GlobalMetricsModel, MetricsModel
+from ..exceptions import NoPlotData
+from ..plot_cache import cached_plot
 
 
+@cached_plot
 def plot_radar_chart(file_name):
     """
     Gera um radar chart para um único rastro com as métricas especificadas.
@@ -87,8 +90,9 @@ def plot_radar_chart(file_name):
         )
     )
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
+@cached_plot
 def plot_count_bars(file_name):
     queryset = GlobalMetricsModel.objects.filter(file_name=file_name).values(
         'num_stay_points',
@@ -113,10 +117,11 @@ def plot_count_bars(file_name):
     fig = go.Figure([go.Bar(x=labels, y=values)])
     fig.update_layout(title=f"Count Metrics for {file_name}")
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
 import plotly.express as px
 
+@cached_plot
 def plot_correlation_heatmap(file_name):
     queryset = GlobalMetricsModel.objects.filter(file_name=file_name).values(
         'avg_travel_time',
@@ -142,8 +147,9 @@ def plot_correlation_heatmap(file_name):
         aspect="auto"
     )
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
+@cached_plot
 def plot_metric_histogram(file_name, metric_name='avg_journey_distance'):
     """
     Gera um histograma de uma métrica específica para todas as entidades em um determinado arquivo.
@@ -196,9 +202,10 @@ def plot_metric_histogram(file_name, metric_name='avg_journey_distance'):
         yaxis=dict(title_text='')
     )
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
 
+@cached_plot
 def plot_metric_boxplot(file_name, metric_name='avg_journey_distance'):
     """
     Gera um boxplot de uma métrica específica para todas as entidades de um arquivo.
@@ -250,8 +257,9 @@ def plot_metric_boxplot(file_name, metric_name='avg_journey_distance'):
         yaxis=dict(title_text='')
     )
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
+@cached_plot
 def plot_travel_distance_comparison(file_name, entity_id):
     """
     Generates a bar plot comparing avg_travel_distance for a given eplot_travel_distance_comparisonntity_id
@@ -280,7 +288,7 @@ def plot_travel_distance_comparison(file_name, entity_id):
     df_plot = df[df['entity_id'].isin(selected_ids)].copy()
 
     if df_plot.empty:
-        raise ValueError(f"No data available for entity_id {entity_id} and nearby entities.")
+        raise NoPlotData(f"No data available for entity_id {entity_id} and nearby entities.")
 
     df_plot['color'] = df_plot['entity_id'].apply(
         lambda x: 'rgba(31, 119, 180, 1)' if x == entity_id else 'rgba(200, 200, 200, 0.8)'
@@ -312,4 +320,4 @@ def plot_travel_distance_comparison(file_name, entity_id):
         xaxis=dict(title='Entity ID')
     )
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
@@ -0,0 +1,74 @@
+# Standard library imports.
+import functools
+import inspect
+
+# Related third party imports.
+from django.conf import settings
+
+# Local application/library specific imports.
+from ..models import ConfigModel
+from ..utils.lru_cache import LRUCache
+
+# Rendered plot fragments of this process, keyed by (file_name, plot kind, arguments, version)
+plot_cache = LRUCache(getattr(settings, 'PLOT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+
+def dataset_version(file_name):
+    """
+    Returns the version of a processed file: the id of its ConfigModel row.
+
+    The row is created when a file finishes processing and deleted with the file, so a
+    reprocessed file always gets a new version, even when the processing ran in another
+    process.
+
+    Args:
+        file_name (str): Name of the file.
+
+    Returns:
+        int or None: The version, or None while the file is not processed.
+    """
+    return ConfigModel.objects.filter(file_name=file_name).values_list('pk', flat=True).first()
+
+
+def cached_plot(plot):
+    """
+    Decorator caching the HTML returned by a plot function of a file.
+
+    The function must take the file name as its `file_name` argument; the other arguments
+    are part of the key, so they must be hashable. Plots of files that are not processed
+    yet are not cached.
+    """
+    signature = inspect.signature(plot)
+
+    @functools.wraps(plot)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+
+        arguments = dict(bound.arguments)
+        file_name = arguments.pop('file_name')
+        version = dataset_version(file_name)
+
+        if version is None:
+            return plot(*args, **kwargs)
+
+        key = (file_name, plot.__name__, tuple(sorted(arguments.items())), version)
+        html = plot_cache.get(key)
+
+        if html is None:
+            html = plot(*args, **kwargs)
+            plot_cache.set(key, html)
+
+        return html
+
+    return wrapper
+
+
+def invalidate_plots(file_name):
+    """
+    Drops the cached plots of a file.
+
+    Args:
+        file_name (str): Name of the file.
+    """
+    plot_cache.discard(lambda key: key[0] == file_name)
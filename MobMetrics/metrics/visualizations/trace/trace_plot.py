@@ -1,15 +1,173 @@
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+from django.conf import settings
 
 from  ...models import TraceModel, StayPointModel
+from ...process.trace_lod import DENSITY_RESOLUTION, TraceLOD
+from ...process.trace_store import TraceStore
+from ..exceptions import NoPlotData
+from ..plot_cache import cached_plot
+from .trace_raster import density_image, png_data_uri, rasterize
 
-def plot_trace_entities(file_name, max_points=5000, is_geographical=False):
-    queryset = TraceModel.objects.filter(file_name=file_name).values(
-        'entity_id', 'x', 'y', 'timestamp'
+def load_trace(file_name, entity_id=None, max_points=None):
+    """
+    Loads the trace points of a file, or of one of its entities, for plotting.
+
+    Reads the columnar TraceStore, falling back to TraceModel rows for files that were
+    uploaded before the store existed. With `max_points`, the finest level of the
+    TraceLOD pyramid that fits is read instead of the full trace, when it was built.
+
+    Args:
+        file_name (str): Name of the file.
+        entity_id (int): Only load this entity. Defaults to every entity.
+        max_points (int): Number of points the plot needs. Defaults to every point.
+
+    Returns:
+        pd.DataFrame: Columns 'entity_id', 'x', 'y' and 'timestamp'.
+    """
+    store = TraceStore(file_name)
+
+    if store.exists():
+        entity_ids = None if entity_id is None else [entity_id]
+        columns = ('id', 'x', 'y', 'time')
+        lod = TraceLOD(store)
+
+        if max_points is not None and lod.exists():
+            df = lod.read(max_points, entity_ids=entity_ids, columns=columns)
+        else:
+            df = store.read(entity_ids=entity_ids, columns=columns)
+
+        return df.rename(columns={'id': 'entity_id', 'time': 'timestamp'})
+
+    queryset = TraceModel.objects.filter(file_name=file_name)
+    if entity_id is not None:
+        queryset = queryset.filter(entity_id=entity_id)
+
+    return pd.DataFrame.from_records(
+        queryset.values('entity_id', 'x', 'y', 'timestamp'),
+        columns=['entity_id', 'x', 'y', 'timestamp']
     )
 
-    df = pd.DataFrame.from_records(queryset)
+def trace_size(file_name):
+    """Returns the number of points of the trace of a file."""
+    store = TraceStore(file_name)
+
+    if store.exists():
+        return int(store.index()[1][-1])
+
+    return TraceModel.objects.filter(file_name=file_name).count()
+
+def load_trace_density(file_name, resolution, entity_colors=False):
+    """
+    Bins the whole trace of a file into a square grid, without loading it into a DataFrame.
+
+    The density grid of the TraceLOD is reused when it has a compatible resolution; the
+    columns of the TraceStore are binned otherwise.
+
+    Args:
+        file_name (str): Name of the file.
+        resolution (int): Cells per side of the grid.
+        entity_colors (bool): Also compute the mean colour of the entities of each cell.
+
+    Returns:
+        tuple: (counts, colors, bounds), as returned by rasterize.
+    """
+    store = TraceStore(file_name)
+
+    if not store.exists():
+        df = load_trace(file_name)
+        ids = df['entity_id'].to_numpy() if entity_colors else None
+
+        return rasterize(df['x'].to_numpy(), df['y'].to_numpy(), resolution, ids=ids)
+
+    lod = TraceLOD(store)
+
+    if not entity_colors and lod.exists() and DENSITY_RESOLUTION % resolution == 0:
+        counts, x_edges, y_edges = lod.density(resolution)
+
+        return counts, None, [x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]]
+
+    ids = store.column('id') if entity_colors else None
+
+    return rasterize(store.column('x'), store.column('y'), resolution, ids=ids, entities=store.index()[0])
+
+def plot_trace_density(file_name, num_points, is_geographical=False, resolution=None, entity_colors=None):
+    """
+    Plots the trace as a density image rendered on the server, whose size does not grow
+    with the number of points.
+
+    Args:
+        file_name (str): Name of the file.
+        num_points (int): Number of points of the trace, for the title.
+        is_geographical (bool): Draw the image over a map, with x as longitude and y as latitude.
+        resolution (int): Cells per side. Defaults to settings.TRACE_RASTER_RESOLUTION.
+        entity_colors (bool): Colour each cell by its entities instead of by its density.
+                              Defaults to settings.TRACE_RASTER_ENTITY_COLORS.
+
+    Returns:
+        str: The HTML of the plot.
+    """
+    resolution = resolution or getattr(settings, 'TRACE_RASTER_RESOLUTION', 256)
+    if entity_colors is None:
+        entity_colors = getattr(settings, 'TRACE_RASTER_ENTITY_COLORS', False)
+
+    counts, colors, (x_min, x_max, y_min, y_max) = load_trace_density(file_name, resolution, entity_colors)
+    image = density_image(counts, colors)
+
+    if is_geographical:
+        # Map image layers are placed by their corners, top row first
+        fig = go.Figure(go.Scattermapbox(
+            lon=[x_min, x_max], lat=[y_min, y_max], mode="markers",
+            marker=dict(opacity=0), hoverinfo="skip"
+        ))
+        fig.update_layout(
+            mapbox=dict(
+                style="open-street-map",
+                center=dict(lon=(x_min + x_max) / 2, lat=(y_min + y_max) / 2),
+                zoom=10,
+                layers=[dict(
+                    sourcetype="image",
+                    source=png_data_uri(image[::-1]),
+                    coordinates=[[x_min, y_max], [x_max, y_max], [x_max, y_min], [x_min, y_min]]
+                )]
+            ),
+            title=f"Geographical Trace Density - {file_name} ({num_points} points)",
+            height=480,
+            width=480
+        )
+    else:
+        dx = ((x_max - x_min) or 1.0) / image.shape[1]
+        dy = ((y_max - y_min) or 1.0) / image.shape[0]
+
+        fig = go.Figure(go.Image(
+            source=png_data_uri(image),
+            x0=x_min + dx / 2, dx=dx, y0=y_min + dy / 2, dy=dy,
+            hoverinfo="x+y"
+        ))
+        # With the y axis increasing, the first row of the image is drawn at the bottom, at y0
+        fig.update_yaxes(autorange=True)
+        fig.update_layout(
+            title=f"Trace Density Plot - {file_name} ({num_points} points)",
+            xaxis_title="X",
+            yaxis_title="Y",
+            height=480,
+            width=480
+        )
+
+    fig.update_layout(template="plotly_white")
+
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+
+@cached_plot
+def plot_trace_entities(file_name, max_points=5000, is_geographical=False):
+    num_points = trace_size(file_name)
+
+    # Above the threshold, the payload is a fixed-size image instead of one record per point
+    if num_points > getattr(settings, 'TRACE_RASTER_THRESHOLD', 200_000):
+        return plot_trace_density(file_name, num_points, is_geographical=is_geographical)
+
+    df = load_trace(file_name, max_points=max_points)
 
     if df.empty:
         return "<p>No data available for this file.</p>"
@@ -48,13 +206,9 @@ def plot_trace_entities(file_name, max_points=5000, is_geographical=False):
     return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
 
-def plot_trace_in_time(file_name, entity_id=0, is_geographical=False):
-    queryset = TraceModel.objects.filter(
-        file_name=file_name,
-        entity_id=entity_id
-    ).values("x", "y", "timestamp")
-
-    df = pd.DataFrame.from_records(queryset)
+@cached_plot
+def plot_trace_in_time(file_name, entity_id=0, is_geographical=False, max_points=5000):
+    df = load_trace(file_name, entity_id=entity_id, max_points=max_points)
 
     if df.empty:
         return f"<p>No data available for entity {entity_id} in file {file_name}.</p>"
@@ -96,6 +250,7 @@ def plot_trace_in_time(file_name, entity_id=0, is_geographical=False):
 
     return fig.to_html(full_html=False, include_plotlyjs='cdn')
 
+@cached_plot
 def plot_stay_points(file_name, highlight_spId=1, is_geographical=False):
     queryset = StayPointModel.objects.filter(file_name=file_name).values(
         "stay_point_id", "x_center", "y_center"
@@ -104,7 +259,7 @@ def plot_stay_points(file_name, highlight_spId=1, is_geographical=False):
     df_plot = pd.DataFrame.from_records(queryset)
 
     if df_plot.empty:
-        raise ValueError("DataFrame is empty or does not contain enough points.")
+        raise NoPlotData("DataFrame is empty or does not contain enough points.")
 
     df_highlight = df_plot[df_plot["stay_point_id"] == highlight_spId]
     df_others = df_plot[df_plot["stay_point_id"] != highlight_spId]
@@ -174,4 +329,4 @@ def plot_stay_points(file_name, highlight_spId=1, is_geographical=False):
             font=dict(color="black")
         )
 
-    return fig.to_html(full_html=False)
+    return fig.to_html(full_html=False, include_plotlyjs='cdn')
@@ -0,0 +1,139 @@
+# Standard library imports.
+import base64
+import struct
+import zlib
+
+# Related third party imports.
+import numpy as np
+from plotly.colors import qualitative, sample_colorscale
+
+# Points binned at once, so memory-mapped columns are never loaded whole
+RASTER_CHUNK = 1 << 22
+
+# Colours given to the entities, in the order of their ids, when they are kept per cell
+ENTITY_PALETTE = qualitative.Plotly
+
+# Empty cells are transparent; the others are at least this opaque
+MIN_ALPHA = 96
+
+
+def rasterize(x, y, resolution, ids=None, entities=None):
+    """
+    Bins points into a square grid over their bounding box.
+
+    Args:
+        x (np.ndarray): X coordinate of each point. May be memory mapped.
+        y (np.ndarray): Y coordinate of each point. May be memory mapped.
+        resolution (int): Cells per side of the grid.
+        ids (np.ndarray, optional): Entity of each point. When given, the mean colour of the
+                                    entities of each cell is accumulated too.
+        entities (np.ndarray, optional): Sorted ids of every entity, coloured in this order.
+                                         Defaults to the unique values of `ids`.
+
+    Returns:
+        tuple: (counts, colors, bounds) where counts[i, j] is the number of points in the
+               x cell i and y cell j, colors is the (resolution, resolution, 3) mean RGB of
+               those points (None without `ids`) and bounds is [x_min, x_max, y_min, y_max].
+    """
+    counts = np.zeros(resolution * resolution, dtype=np.int64)
+    colors = None if ids is None else np.zeros((3, resolution * resolution))
+
+    if len(x) == 0:
+        return counts.reshape(resolution, resolution), None, np.zeros(4)
+
+    bounds = np.array([np.min(x), np.max(x), np.min(y), np.max(y)], dtype=np.float64)
+    x_width = (bounds[1] - bounds[0]) or 1.0
+    y_width = (bounds[3] - bounds[2]) or 1.0
+
+    if ids is not None:
+        entities = np.unique(ids) if entities is None else np.asarray(entities)
+        palette = np.array([_rgb(color) for color in ENTITY_PALETTE], dtype=np.float64)
+
+    for start in range(0, len(x), RASTER_CHUNK):
+        chunk_x = np.asarray(x[start:start + RASTER_CHUNK])
+        chunk_y = np.asarray(y[start:start + RASTER_CHUNK])
+
+        i = np.minimum(((chunk_x - bounds[0]) / x_width * resolution).astype(np.int64), resolution - 1)
+        j = np.minimum(((chunk_y - bounds[2]) / y_width * resolution).astype(np.int64), resolution - 1)
+        cells = i * resolution + j
+
+        counts += np.bincount(cells, minlength=resolution * resolution)
+
+        if ids is not None:
+            ranks = np.searchsorted(entities, np.asarray(ids[start:start + RASTER_CHUNK]))
+            point_colors = palette[ranks % len(palette)]
+
+            for channel in range(3):
+                colors[channel] += np.bincount(
+                    cells, weights=point_colors[:, channel], minlength=resolution * resolution
+                )
+
+    if colors is not None:
+        colors = (colors / np.maximum(counts, 1)).T.reshape(resolution, resolution, 3)
+
+    return counts.reshape(resolution, resolution), colors, bounds
+
+
+def density_image(counts, colors=None, colorscale='Viridis'):
+    """
+    Turns a density grid into an RGBA image, on a logarithmic scale of the counts.
+
+    Args:
+        counts (np.ndarray): (nx, ny) points per cell, as returned by rasterize.
+        colors (np.ndarray, optional): (nx, ny, 3) colour of each cell. Defaults to the
+                                       colorscale applied to the density.
+        colorscale (str): Plotly colorscale used without `colors`.
+
+    Returns:
+        np.ndarray: (ny, nx, 4) uint8 image whose first row is the lowest y cell.
+    """
+    level = np.log1p(counts) / np.log1p(max(int(counts.max()), 1))
+
+    if colors is None:
+        lookup = np.array(
+            [_rgb(color) for color in sample_colorscale(colorscale, np.linspace(0, 1, 256))]
+        )
+        colors = lookup[np.round(level * 255).astype(np.int64)]
+
+    alpha = np.where(counts > 0, MIN_ALPHA + (255 - MIN_ALPHA) * level, 0)
+    image = np.concatenate((colors, alpha[..., None]), axis=2)
+
+    return np.round(image).astype(np.uint8).transpose(1, 0, 2)
+
+
+def png_data_uri(image):
+    """
+    Encodes an RGBA image as a PNG data URI, the compact form Plotly images accept.
+
+    Args:
+        image (np.ndarray): (height, width, 4) uint8 image, top row first.
+
+    Returns:
+        str: The 'data:image/png;base64,...' URI.
+    """
+    height, width, _ = image.shape
+
+    # Every scanline starts with its filter type, 0 (none)
+    scanlines = np.hstack((np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)))
+
+    png = b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 9)),
+        _png_chunk(b'IEND', b''),
+    ))
+
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+
+
+def _png_chunk(tag, data):
+    """Returns a PNG chunk: its length, tag, data and CRC."""
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def _rgb(color):
+    """Parses a '#rrggbb' or 'rgb(r, g, b)' Plotly colour into its components."""
+    if color.startswith('#'):
+        return [int(color[k:k + 2], 16) for k in (1, 3, 5)]
+
+    return [float(value) for value in color[color.index('(') + 1:-1].split(',')]
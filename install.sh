@@ -50,9 +50,12 @@ else
     exit 1
 fi
 
-echo "Running makemigrations and migrate..."
-python MobMetrics/manage.py makemigrations metrics
-python MobMetrics/manage.py migrate
+echo "Running migrate..."
+if ! python MobMetrics/manage.py migrate; then
+    echo "Error: migrate failed. If MobMetrics/db.sqlite3 was created with locally generated migrations,"
+    echo "see the 'Apply migrations' step of readme.md to upgrade it."
+    exit 1
+fi
 
 echo "Installation complete! Activate the environment with: conda activate MobMetrics."
 echo "BonnMotion ready at ./bonnmotion-3.0.1/bin/bm."